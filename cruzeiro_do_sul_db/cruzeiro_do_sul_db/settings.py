@@ -127,3 +127,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = "database.User"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
+
+# Cache of normalized spectra (see database/norm_cache.py), shared by the web and worker processes
+NORM_CACHE_DIR = BASE_DIR / "norm_cache"
+
+# Reference libraries of the comparison page (see database/reference_library.py), built by build_reference_library
+NORM_LIBRARY_DIR = BASE_DIR / "norm_library"
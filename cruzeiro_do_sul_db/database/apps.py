@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DatabaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'database'
+
+    def ready(self):
+        from .signals import create_search_tables
+        post_migrate.connect(create_search_tables, sender=self)
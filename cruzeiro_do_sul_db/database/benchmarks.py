@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import pandas as pd
+from .xdi_parser import parse_xdi, column_labels
+
+
+def legacy_decode(file):
+    """
+    Data decoding as done by read_file before the bulk decoder: a list of string lists
+    converted cell by cell into floats.
+
+    Parameters:
+    file (str): Path to the XDI file.
+
+    Returns:
+    DataFrame: Decoded data.
+    """
+    with open(file, "r") as fl:
+        header = {}
+        values = []
+        reading_header = True
+        for line in fl:
+            line = line.strip()
+            if reading_header:
+                if line.startswith("#"):
+                    partes = line[1:].split(":", 1)
+                    if len(partes) == 2:
+                        header[partes[0].strip()] = partes[1].strip()
+                    continue
+                reading_header = False
+            if line:
+                values.append(line.split())
+
+    df = pd.DataFrame(values, columns=column_labels(header), dtype=object)
+    for j in range(df.shape[1]):
+        for u in range(df.shape[0]):
+            df.iat[u, j] = float(df.iat[u, j])
+    return df
+
+
+def bulk_decode(file):
+    """
+    Data decoding as done by read_file: NumPy's C reader wrapped in a DataFrame without copying.
+
+    Parameters:
+    file (str): Path to the XDI file.
+
+    Returns:
+    DataFrame: Decoded data.
+    """
+    with open(file, "r") as fl:
+        header, values = parse_xdi(fl)
+    return pd.DataFrame(values, columns=column_labels(header), copy=False)
+
+
+def best_time(func, file, repeat):
+    """Return the best wall time (in seconds) of repeat calls of func(file)."""
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func(file)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def bench_decode(root="XDI_files", repeat=3):
+    """
+    Compare the legacy and the bulk decoder over every .xdi file below root.
+
+    Parameters:
+    root (str): Directory to be searched for .xdi files. Default is "XDI_files".
+    repeat (int): Number of timed runs per file; the best one is kept. Default is 3.
+
+    Returns:
+    list: A list of (file, n_points, legacy seconds, bulk seconds) tuples.
+    """
+    resultados = []
+    for pasta, subpastas, arquivos in os.walk(root):
+        subpastas[:] = sorted(d for d in subpastas if not d.startswith("."))
+        for nome in sorted(arquivos):
+            if not nome.endswith(".xdi"):
+                continue
+            file = os.path.join(pasta, nome)
+            try:
+                n_points = len(bulk_decode(file))
+                legacy = best_time(legacy_decode, file, repeat)
+                bulk = best_time(bulk_decode, file, repeat)
+            except Exception as e:
+                print(f"Skipping {file}: {e}")
+                continue
+            resultados.append((file, n_points, legacy, bulk))
+    return resultados
+
+
+if __name__ == "__main__":
+    # Usage (from the folder containing manage.py): python -m database.benchmarks [root]
+    root = sys.argv[1] if len(sys.argv) > 1 else "XDI_files"
+    resultados = bench_decode(root)
+    print(f"{'file':60s} {'points':>7s} {'legacy ms':>10s} {'bulk ms':>9s} {'speedup':>8s}")
+    for file, n_points, legacy, bulk in resultados:
+        print(f"{file:60s} {n_points:7d} {legacy * 1e3:10.2f} {bulk * 1e3:9.2f} {legacy / bulk:7.1f}x")
+    total_legacy = sum(r[2] for r in resultados)
+    total_bulk = sum(r[3] for r in resultados)
+    if resultados:
+        print(f"{len(resultados)} files: legacy {total_legacy:.2f} s, bulk {total_bulk:.2f} s, speedup {total_legacy / total_bulk:.1f}x")
@@ -0,0 +1,75 @@
+from django.db.models import Q
+from .formula import parse_formula, composition_key
+from .models import Composition
+
+# Tolerance of the atom counts compared in stoichiometry searches (counts are parsed as floats: "0.5(H2O)")
+COUNT_TOLERANCE = 1e-6
+
+
+def save_compositions(experiments, using="default"):
+    """
+    Replace the Composition rows of experiments with the parsed elements of their sample formula.
+
+    Parameters:
+    experiments (iterable): Saved experiments (with id and sample_formula).
+    using (str): Database alias.
+    """
+    experiments = [experiment for experiment in experiments if experiment.id is not None]
+    if not experiments:
+        return
+    linhas = [
+        Composition(experiment_id=experiment.id, element=elemento, count=contagem)
+        for experiment in experiments
+        for elemento, contagem in parse_formula(experiment.sample_formula or "").items()
+    ]
+    Composition.objects.using(using).filter(experiment_id__in=[experiment.id for experiment in experiments]).delete()
+    Composition.objects.using(using).bulk_create(linhas)
+
+
+def contains_elements(symbols):
+    """
+    Filter the experiments whose sample has every given element (and possibly others).
+
+    Each element is an indexed lookup of the Composition table, instead of a substring
+    scan of the formulas ("O" is not found in "Os", and "Fe O" does not match FeS).
+
+    Parameters:
+    symbols (iterable): Element symbols, in any case. Ex: ["Fe", "o"].
+
+    Returns:
+    Q: The filter on Experiment.
+    """
+    filtro = Q()
+    for simbolo in {simbolo.strip().capitalize() for simbolo in symbols if simbolo.strip()}:
+        filtro &= Q(id__in=Composition.objects.filter(element=simbolo).values("experiment_id"))
+    return filtro
+
+
+def stoichiometry_filter(formula):
+    """
+    Filter the experiments whose sample has exactly the composition of a formula.
+
+    The formula is parsed like the sample formulas, so how it is written does not matter
+    ("Fe2O3", "O3Fe2" and "Fe2 O3" are the same), but the counts do (Fe2O3 is not Fe3O4).
+
+    Parameters:
+    formula (str): Chemical formula with known counts. Ex: "Fe2O3", "CaSO4.2(H2O)".
+
+    Raises:
+    ValueError: If the formula has no element or a variable count.
+
+    Returns:
+    Q: The filter on Experiment.
+    """
+    contagens = parse_formula(formula)
+    if not contagens or None in contagens.values():
+        raise ValueError(f"INVALID FORMULA: {formula}")
+    # No other element (indexed sample_elements) and every element with its count
+    filtro = Q(sample_elements=composition_key(contagens))
+    for elemento, contagem in contagens.items():
+        filtro &= Q(id__in=Composition.objects.filter(
+            element=elemento,
+            count__gte=contagem - COUNT_TOLERANCE,
+            count__lte=contagem + COUNT_TOLERANCE,
+        ).values("experiment_id"))
+    return filtro
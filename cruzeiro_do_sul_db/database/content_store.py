@@ -0,0 +1,59 @@
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import default_storage
+from .xdi_parser import TextDecoder, XDIStreamParser
+
+
+def save_content_addressed(uploaded_file, folder, extension=".xdi"):
+    """
+    Save an uploaded XDI file under its content hash, parsing it in the same pass.
+
+    The upload is read once, chunk by chunk: every chunk updates the SHA-256, is written
+    to a temporary file in the storage folder and is fed to the streaming XDI parser
+    (decoded as UTF-8, or Latin-1 when it is not valid UTF-8; see TextDecoder).
+    The temporary file is then renamed to the hash, or dropped when identical content
+    is already stored.
+
+    Parameters:
+    uploaded_file (File): Django uploaded file.
+    folder (str): Storage folder, ending with "/". Ex: "XDIs/".
+    extension (str): Extension of the stored file. Default is ".xdi".
+
+    Raises:
+    ValueError: If the XDI data block cannot be decoded.
+
+    Returns:
+    tuple: A tuple containing the storage name, the content hash, whether the same
+    content was already stored, the XDI header and the XDI data block (see parse_xdi).
+    """
+    pasta = default_storage.path(folder)
+    os.makedirs(pasta, exist_ok=True)
+
+    sha = hashlib.sha256()
+    parser = XDIStreamParser()
+    decoder = TextDecoder()
+
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            for chunk in uploaded_file.chunks():
+                sha.update(chunk)
+                destino.write(chunk)
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b"", final=True))
+        header, tabela = parser.close()
+
+        digest = sha.hexdigest()
+        name = f"{folder}{digest}{extension}"
+        existente = default_storage.exists(name)
+        if existente:
+            os.remove(temporario)
+        else:
+            os.replace(temporario, default_storage.path(name))
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    return name, digest, existente, header, tabela
@@ -0,0 +1,82 @@
+import bisect
+import csv
+import os
+from functools import lru_cache
+
+# Resource with the absorption edge energies, one "symbol,edge,energy_min,energy_max" line per edge:
+EDGE_ENERGIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "edge_energies.csv")
+
+# Edges spanning several sub-edges (an energy range instead of an edge energy):
+GENERIC_EDGES = frozenset(("L", "M", "N", "O", "P"))
+
+
+class EdgeTable:
+    """
+    Absorption edge energies, indexed by (symbol, edge) and sorted by energy.
+
+    Attributes:
+    energies (dict): {(symbol, edge): (energy_min, energy_max)} in eV (equal for single edges).
+    edges (list): (energy, symbol, edge) of the single edges, sorted by energy.
+    """
+
+    def __init__(self, linhas):
+        self.energies = {}
+        for simbolo, edge, minimo, maximo in linhas:
+            self.energies[(simbolo, edge)] = (float(minimo), float(maximo))
+        self.edges = sorted(
+            (minimo, simbolo, edge)
+            for (simbolo, edge), (minimo, maximo) in self.energies.items()
+            if edge not in GENERIC_EDGES
+        )
+        self._chaves = [energia for energia, _, _ in self.edges]
+
+    def energy(self, symbol, edge):
+        """
+        Energy of an absorption edge, in O(1).
+
+        Parameters:
+        symbol (str): Element symbol. Ex: "Fe".
+        edge (str): Edge. Ex: "K", "L3".
+
+        Returns:
+        float or tuple: The edge energy in eV, the (min, max) energy range of a generic edge
+        spanning several sub-edges, or None when the edge is unknown.
+        """
+        energia = self.energies.get((symbol, edge))
+        if energia is None:
+            return None
+        return energia[0] if energia[0] == energia[1] else energia
+
+    def between(self, emin, emax):
+        """
+        Single edges whose energy lies in an interval, found by binary search.
+
+        Parameters:
+        emin (float): Lower bound, in eV (inclusive).
+        emax (float): Upper bound, in eV (inclusive).
+
+        Returns:
+        list: (energy, symbol, edge) of the edges in [emin, emax], sorted by energy.
+        """
+        inicio = bisect.bisect_left(self._chaves, emin)
+        fim = bisect.bisect_right(self._chaves, emax)
+        return self.edges[inicio:fim]
+
+
+@lru_cache(maxsize=None)
+def edge_table():
+    """The edge energy table, read from EDGE_ENERGIES_FILE on the first call."""
+    with open(EDGE_ENERGIES_FILE, newline="") as arquivo:
+        linhas = csv.reader(linha for linha in arquivo if not linha.startswith("#"))
+        next(linhas)
+        return EdgeTable(linhas)
+
+
+def edge_energy(symbol, edge):
+    """Energy of an absorption edge (see EdgeTable.energy)."""
+    return edge_table().energy(symbol, edge)
+
+
+def edges_between(emin, emax):
+    """Single absorption edges with energy in [emin, emax] eV (see EdgeTable.between)."""
+    return edge_table().between(emin, emax)
@@ -0,0 +1,123 @@
+import re
+
+ELEMENT_SYMBOLS = frozenset((
+    "H", "He", "Li", "Be", "B", "C", "N", "O", "F", "Ne", "Na", "Mg", "Al", "Si", "P", "S", "Cl", "Ar",
+    "K", "Ca", "Sc", "Ti", "V", "Cr", "Mn", "Fe", "Co", "Ni", "Cu", "Zn", "Ga", "Ge", "As", "Se", "Br", "Kr",
+    "Rb", "Sr", "Y", "Zr", "Nb", "Mo", "Tc", "Ru", "Rh", "Pd", "Ag", "Cd", "In", "Sn", "Sb", "Te", "I", "Xe",
+    "Cs", "Ba", "La", "Ce", "Pr", "Nd", "Pm", "Sm", "Eu", "Gd", "Tb", "Dy", "Ho", "Er", "Tm", "Yb", "Lu",
+    "Hf", "Ta", "W", "Re", "Os", "Ir", "Pt", "Au", "Hg", "Tl", "Pb", "Bi", "Po", "At", "Rn",
+    "Fr", "Ra", "Ac", "Th", "Pa", "U", "Np", "Pu", "Am", "Cm", "Bk", "Cf", "Es", "Fm", "Md", "No", "Lr",
+    "Rf", "Db", "Sg", "Bh", "Hs", "Mt", "Ds", "Rg", "Cn", "Nh", "Fl", "Mc", "Lv", "Ts", "Og",
+))
+
+# Separators of formula parts (hydrates, adducts): whitespace, "·", "*", a dot after a symbol or a
+# group and a dot after a count and before an optional integer multiplier and water or a group. Other
+# dots between digits are decimal points: CaSO4.2(H2O) and CuSO4.5H2O are hydrates, Fe2.95O4 and Li1.2Mn0.8O2 are not
+_PARTES = re.compile(r"[\s·*]+|(?<![0-9])\.|(?:(?<=[A-Za-z)\]][1-9])|(?<=[A-Za-z)\]][1-9][0-9]))\.(?=\d*(?:[(\[]|[HD]2O))")
+_MULTIPLICADOR = re.compile(r"(\d*\.\d+|\d+)(?=[A-Z(\[])|([a-z])(?=[(\[])")
+_TOKENS = re.compile(r"([A-Z][a-z]?)|(\d*\.\d+|\d+)|([(\[])|([)\]])|([a-z]+)|(.)")
+
+
+def parse_formula(formula):
+    """
+    Parse a sample formula into element counts.
+
+    The parser is tolerant: hydrates ("FeSO4.7H2O", "Fe2O3 0.5(H2O)"), groups ("Zn3(PO4)2") and
+    fractional counts ("Fe0.5Ni0.5", "Fe2.95O4") are expanded, while variable or ambiguous counts ("FexSx",
+    "Fe(1-x)S", "n(H2O)", "(Fe,Ni)9S8") keep the element with an unknown (None) count.
+
+    Parameters:
+    formula (str): Sample formula, as written in the XDI header. Ex: "CaSO4.2(H2O)".
+
+    Returns:
+    dict: {element symbol: count (float, or None when unknown)}, in order of appearance.
+    Empty when the text has no element symbol (ex: "scotch tape").
+    """
+    contagens = {}
+    for parte in _PARTES.split(formula.strip()):
+        if not parte:
+            continue
+        multiplicador = 1.0
+        inicio = _MULTIPLICADOR.match(parte)
+        if inicio is not None:
+            multiplicador = float(inicio.group(1)) if inicio.group(1) else None
+            parte = parte[inicio.end():]
+        for simbolo, contagem in _parse_group(parte):
+            if contagem is not None and multiplicador is not None:
+                contagem *= multiplicador
+            else:
+                contagem = None
+            if simbolo in contagens:
+                anterior = contagens[simbolo]
+                contagens[simbolo] = None if anterior is None or contagem is None else anterior + contagem
+            else:
+                contagens[simbolo] = contagem
+    return contagens
+
+
+def _parse_group(texto):
+    """Element counts of one formula part, as a list of (symbol, count or None)."""
+    # Stack of open groups: their (symbol, count) items, whether their counts are ambiguous and
+    # what preceded the opening parenthesis ("Fe(1-x)" is a count of Fe, not a group)
+    pilha = [([], False, None)]
+    ultimo = None           # what the next number multiplies: ("element", index) or ("group", start, end)
+    for elemento, numero, abre, fecha, variavel, outro in _TOKENS.findall(texto):
+        itens, ambiguo, anterior = pilha[-1]
+        if elemento:
+            if elemento in ELEMENT_SYMBOLS:
+                itens.append((elemento, None if ambiguo else 1.0))
+                ultimo = ("element", len(itens) - 1)
+            elif elemento[0] in ELEMENT_SYMBOLS:
+                # "Sx": the element followed by a variable count
+                itens.append((elemento[0], None))
+                ultimo = None
+            else:
+                ultimo = None
+        elif numero and ultimo is not None:
+            _multiply(itens, ultimo, float(numero))
+            ultimo = None
+        elif abre:
+            pilha.append(([], False, ultimo))
+            ultimo = None
+        elif fecha and len(pilha) > 1:
+            pilha.pop()
+            if ambiguo:
+                itens = [(simbolo, None) for simbolo, _ in itens]
+            if not itens and ambiguo and anterior is not None:
+                _multiply(pilha[-1][0], anterior, None)
+            pilha[-1][0].extend(itens)
+            ultimo = ("group", len(pilha[-1][0]) - len(itens), len(pilha[-1][0])) if itens else None
+        elif variavel or outro in ",+-/":
+            # "x" in "FexSx", "," in "(Fe,Ni)" and "1-x": the count of what precedes is unknown
+            if ultimo is not None:
+                _multiply(itens, ultimo, None)
+            pilha[-1] = (itens, ambiguo or len(pilha) > 1, anterior)
+            ultimo = None
+    while len(pilha) > 1:
+        itens, _, _ = pilha.pop()
+        pilha[-1][0].extend(itens)
+    return pilha[0][0]
+
+
+def _multiply(itens, alvo, fator):
+    """Multiply the count of the last element or group read (None makes it unknown)."""
+    if alvo[0] == "element":
+        indices = [alvo[1]]
+    else:
+        indices = range(alvo[1], alvo[2])
+    for i in indices:
+        simbolo, contagem = itens[i]
+        itens[i] = (simbolo, None if contagem is None or fator is None else contagem * fator)
+
+
+def composition_key(symbols):
+    """
+    Canonical text of an element set, used to index and match exact compositions.
+
+    Parameters:
+    symbols (iterable): Element symbols, in any order and case. Ex: ["o", "Fe"].
+
+    Returns:
+    str: Sorted distinct symbols separated by spaces. Ex: "Fe O".
+    """
+    return " ".join(sorted({simbolo.strip().capitalize() for simbolo in symbols if simbolo.strip()}))
@@ -0,0 +1,149 @@
+import re
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Side table with the searchable text of each experiment: a FTS5 virtual table on SQLite (rowid is the
+# experiment id) and a tsvector column with a GIN index on PostgreSQL. It is created after "migrate"
+# (see apps.py), kept in sync by the Experiment signals (see signals.py) and by the bulk loaders, and
+# rebuilt by "manage.py rebuild_search_index".
+FTS_TABLE = "database_experiment_fts"
+
+# Indexed text, from the most to the least relevant, and its weight in the ranking:
+# (column, weight on SQLite bm25, weight class on PostgreSQL ts_rank)
+FTS_COLUMNS = (
+    ("title",       10.0, "A"),
+    ("sample_name", 10.0, "A"),
+    ("formula",      5.0, "B"),
+    ("sample_prep",  2.0, "C"),
+    ("notes",        1.0, "D"),
+)
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def fulltext_available(using="default"):
+    """Whether the database backend has a full-text index (SQLite and PostgreSQL)."""
+    return connections[using].vendor in ("sqlite", "postgresql")
+
+
+def create_fulltext_index(using="default"):
+    """Create the full-text table of the database, if it does not exist yet."""
+    connection = connections[using]
+    colunas = [coluna for coluna, *_ in FTS_COLUMNS]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(colunas)}, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+                f"experiment_id bigint PRIMARY KEY REFERENCES database_experiment (id) ON DELETE CASCADE, "
+                f"document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_idx ON {FTS_TABLE} USING GIN (document)")
+
+
+def experiment_document(experiment):
+    """
+    Searchable text of an experiment.
+
+    Parameters:
+    experiment (Experiment): The experiment.
+
+    Returns:
+    tuple: Text of each column in FTS_COLUMNS ("" when missing).
+    """
+    sample = (experiment.metadata or {}).get("sample", {})
+    return (
+        experiment.experiment_title or "",
+        sample.get("name", ""),
+        experiment.sample_formula or "",
+        sample.get("prep", ""),
+        experiment.additional_info or "",
+    )
+
+
+def index_experiments(experiments, using="default"):
+    """
+    Add or replace experiments in the full-text index.
+
+    Parameters:
+    experiments (iterable): Saved experiments (with id).
+    using (str): Database alias.
+    """
+    if not fulltext_available(using):
+        return
+    linhas = [(experiment.id, *experiment_document(experiment)) for experiment in experiments]
+    if not linhas:
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            colunas = ", ".join(coluna for coluna, *_ in FTS_COLUMNS)
+            marcadores = ", ".join(["%s"] * (len(FTS_COLUMNS) + 1))
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(linha[0],) for linha in linhas])
+            cursor.executemany(f"INSERT INTO {FTS_TABLE} (rowid, {colunas}) VALUES ({marcadores})", linhas)
+        else:
+            documento = " || ".join(f"setweight(to_tsvector('simple', %s), '{peso}')" for _, _, peso in FTS_COLUMNS)
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (experiment_id, document) VALUES (%s, {documento}) "
+                f"ON CONFLICT (experiment_id) DO UPDATE SET document = EXCLUDED.document",
+                linhas,
+            )
+
+
+def unindex_experiments(ids, using="default"):
+    """Remove experiments (by id) from the full-text index."""
+    if not fulltext_available(using):
+        return
+    coluna = "rowid" if connections[using].vendor == "sqlite" else "experiment_id"
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE {coluna} = %s", [(id,) for id in ids])
+
+
+def fulltext_search(queryset, texto):
+    """
+    Restrict experiments to the ones matching every word of a free-text query, best matches first.
+
+    Words match the start of indexed words, ignoring case and accents on SQLite ("hema" finds
+    "Hematite"). On other backends than SQLite and PostgreSQL, titles and notes are scanned instead.
+
+    Parameters:
+    queryset (QuerySet): Experiments to search.
+    texto (str): Free-text query. Ex: "hematite powder".
+
+    Returns:
+    QuerySet: The matching experiments, annotated with "rank" (lower is better) and ordered by it.
+    """
+    palavras = _PALAVRA.findall(texto)
+    if not palavras:
+        return queryset
+    using = queryset.db
+    vendor = connections[using].vendor
+    if vendor == "sqlite":
+        # Each word is quoted, so FTS5 operators typed by users are searched as words
+        consulta = " ".join(f'"{palavra}"*' for palavra in palavras)
+        pesos = ", ".join(str(peso) for _, peso, _ in FTS_COLUMNS)
+        ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (consulta,))
+        rank = RawSQL(
+            f"SELECT bm25({FTS_TABLE}, {pesos}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = database_experiment.id",
+            (consulta,),
+        )
+    elif vendor == "postgresql":
+        consulta = " & ".join(f"{palavra}:*" for palavra in palavras)
+        ids = RawSQL(f"SELECT experiment_id FROM {FTS_TABLE} WHERE document @@ to_tsquery('simple', %s)", (consulta,))
+        rank = RawSQL(
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {FTS_TABLE} "
+            f"WHERE experiment_id = database_experiment.id",
+            (consulta,),
+        )
+    else:
+        filtro = Q()
+        for palavra in palavras:
+            filtro &= Q(experiment_title__icontains=palavra) | Q(additional_info__icontains=palavra)
+        return queryset.filter(filtro)
+    return queryset.filter(id__in=ids).annotate(rank=rank).order_by("rank", "id")
@@ -1,9 +1,8 @@
 import numpy as np
 import plotly.graph_objs as go
 import time  # For the random seed
-import pickle
-import os
 import pandas as pd
+from .reference_library import open_matrix
 
 import keyboard 
 
@@ -43,26 +42,10 @@ def ga(
     N_MATERIALS = n_materials
 
     try:
-        processed_pickle_files = {}
-
-        norm_pkl_path = os.path.join(os.getcwd(), 'norm_pkl_files')
-        abs_element_pkl_path = os.path.join(norm_pkl_path, absorbing_element)
-
-        for filename in os.listdir(abs_element_pkl_path):
-            file_path = os.path.join(abs_element_pkl_path, filename)
-            if filename.endswith(".pickle") and os.path.isfile(file_path):
-                try:
-                    with open(file_path, 'rb') as file:
-                        header, df = pickle.load(file)
-                    file_key = filename[:-12]
-                    processed_pickle_files[file_key] = (header, df)
-                except Exception as e:
-                    print(f"Erro ao processar o arquivo {filename}: {e}")
-
-        min_max_ranges = [(min(df['energy eV']), max(df['energy eV'])) for _, df in processed_pickle_files.values()]
-        min_of_maxes = max([min_max[0] for min_max in min_max_ranges])
-        max_of_mins = min([min_max[1] for min_max in min_max_ranges])
-        domain = np.linspace(min_of_maxes, max_of_mins, num=5000)
+        # References of the element and edge already resampled on their common energy grid
+        # (read-only rows of the memory-mapped matrix, nothing is unpickled or interpolated here)
+        matriz = open_matrix(absorbing_element, edge)
+        domain = matriz.domain
 
         try: # Arrumar isso pra deixar padrão
             x = target_function['energy eV']
@@ -73,15 +56,7 @@ def ga(
     except Exception as e:
         raise ValueError(e)
 
-    spectra = {}
-    interpolated_functions = []
-    for key, (header, df) in processed_pickle_files.items():
-        interpolated_norm = np.interp(domain, df['energy eV'], df['norm'])
-        interpolated_functions.append(interpolated_norm)
-
-    for i in range(len(processed_pickle_files.keys())):
-        key = list(processed_pickle_files.keys())[i]
-        spectra[key] = interpolated_functions[i]
+    spectra = dict(zip(matriz.names, matriz.matrix))
 
     def fitness(individual, target_function=target_spectrum):
         rmse = (sum((target_function - individual)**2))**(1/2)
@@ -0,0 +1,197 @@
+import numpy as np
+from .edges import edges_between
+
+# Largest distance (eV) between the E0 of a spectrum and the tabulated energy of its edge: the E0 of
+# compounds is shifted from the metal edge by the oxidation state (up to ~20 eV for high valences)
+E0_TOLERANCE = 30.0
+# Distances (eV) from the edge of the windows compared by edge_step, below the edge and above the chemical shift:
+EDGE_WINDOW = (10.0, 80.0)
+# Preference between edges matching the same E0, from the most to the least measured:
+EDGE_PRIORITY = {edge: i for i, edge in enumerate(("K", "L3", "L2", "L1", "M5", "M4", "M3", "M2", "M1"))}
+# Jumps at least this fraction of the largest one are taken as similar, and ranked by EDGE_PRIORITY: the
+# windows of an edge a few tens of eV below the true one also span its jump (Tm L1 10116 eV, W L3 10207 eV)
+JUMP_SIMILARITY = 0.5
+
+
+def absorption(colunas, tabela):
+    """
+    Find the energy and absorption (mu) of a XDI data block.
+
+    mu is taken from a mutrans/mufluor/murefer column, or computed from the measured intensities
+    (ln(i0/itrans) in transmission, ifluor/i0 in fluorescence). Since some files swap the i0 and
+    itrans columns, the edge may be a drop of mu instead of a rise: see edge_step and estimate_e0.
+
+    Parameters:
+    colunas (list): Column labels, as returned by xdi_parser.column_labels. Ex: ["energy", "i0", "itrans"].
+    tabela (ndarray): XDI data block, one row per point.
+
+    Returns:
+    tuple: A tuple containing the energy (eV) and mu arrays, sorted by energy; None when the block
+    has no energy column, and mu is None when it cannot be computed.
+    """
+    indices = {coluna.split()[0].lower(): i for i, coluna in enumerate(colunas[:tabela.shape[1]]) if coluna}
+    if "energy" not in indices:
+        return None
+    energia = tabela[:, indices["energy"]]
+
+    mu = None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for coluna in ("mutrans", "mufluor", "murefer"):
+            if coluna in indices:
+                mu = tabela[:, indices[coluna]]
+                break
+        else:
+            if "i0" in indices and "itrans" in indices:
+                mu = np.log(tabela[:, indices["i0"]] / tabela[:, indices["itrans"]])
+            elif "i0" in indices and "ifluor" in indices:
+                mu = tabela[:, indices["ifluor"]] / tabela[:, indices["i0"]]
+
+    ordem = np.argsort(energia, kind="stable")
+    energia = energia[ordem]
+    if mu is not None:
+        mu = mu[ordem]
+        validos = np.isfinite(mu)
+        if validos.sum() < 5:
+            mu = None
+        else:
+            energia, mu = energia[validos], mu[validos]
+    return energia, mu
+
+
+def edge_step(energia, mu, energia_edge, janela=EDGE_WINDOW):
+    """
+    Absorption jump of a spectrum across an edge energy: |median of mu above the edge - median below it|.
+
+    Parameters:
+    energia (ndarray): Energy (eV), increasing.
+    mu (ndarray): Absorption.
+    energia_edge (float): Tabulated energy of the edge (eV).
+    janela (tuple): Start and end of the windows (eV away from the edge); the window above starts
+    after the largest chemical shift (E0_TOLERANCE).
+
+    Returns:
+    float: The jump, or None when the spectrum has less than 3 points in a window.
+    """
+    inicio, fim = janela
+    abaixo = (energia >= energia_edge - fim) & (energia <= energia_edge - inicio)
+    acima = (energia >= energia_edge + E0_TOLERANCE) & (energia <= energia_edge + E0_TOLERANCE + fim)
+    if abaixo.sum() < 3 or acima.sum() < 3:
+        return None
+    # The pre-edge line is extrapolated above the edge: on the steep backgrounds of weak edges
+    # (Cr K of dilute samples) the background change between the windows exceeds the jump itself
+    inclinacao, intercepto = np.polyfit(energia[abaixo], mu[abaixo], 1)
+    return float(abs(np.median(mu[acima] - (inclinacao * energia[acima] + intercepto))))
+
+
+def estimate_e0(energia, mu, emin=None, emax=None):
+    """
+    Estimate the edge energy (E0) of a spectrum as the maximum of its derivative (in absolute value).
+
+    Parameters:
+    energia (ndarray): Energy (eV), increasing.
+    mu (ndarray): Absorption.
+    emin (float): Lower bound of the search (eV), to skip glitches away from the edge. Default is the whole scan.
+    emax (float): Upper bound of the search (eV).
+
+    Returns:
+    float: E0 in eV, or None when the spectrum has less than 5 distinct energies in the interval.
+    """
+    energia, unicos = np.unique(energia, return_index=True)
+    mu = mu[unicos]
+    dentro = np.ones(len(energia), dtype=bool)
+    if emin is not None:
+        dentro &= energia >= emin
+    if emax is not None:
+        dentro &= energia <= emax
+    energia, mu = energia[dentro], mu[dentro]
+    if len(energia) < 5:
+        return None
+    # A 3-point moving average keeps single noisy points from being taken as the edge
+    suave = np.convolve(mu, np.ones(3) / 3, mode="valid")
+    derivada = np.gradient(suave, energia[1:-1])
+    return float(energia[1 + np.argmax(np.abs(derivada))])
+
+
+def identify_edges(energia, mu=None, e0=None, elements=None, candidates=None, tolerance=E0_TOLERANCE):
+    """
+    Find the absorption edges (element and edge) a spectrum may have been measured at.
+
+    The edges inside the scanned energy range are found by binary search in the edge table
+    (see edges.edges_between). When E0 is known, only those within tolerance below it are kept, the
+    most measured kind of edge (EDGE_PRIORITY) first, then the closest; otherwise, when mu is known,
+    only those with an absorption jump: the jumps of similar size (JUMP_SIMILARITY) first, the most
+    measured kind of edge first among them, then the largest.
+
+    Parameters:
+    energia (ndarray): Energy of the spectrum (eV), increasing.
+    mu (ndarray): Absorption of the spectrum, if known.
+    e0 (float): Edge energy of the spectrum (eV), if known.
+    elements (iterable): Elements the sample has (ex: from its formula), to discard the others.
+    candidates (iterable): (symbol, edge) pairs accepted (ex: those with a reference library).
+    tolerance (float): Largest distance between E0 and the tabulated edge energy (eV).
+
+    Returns:
+    list: (symbol, edge, edge energy) of the candidate edges, best first (in energy order when
+    neither E0 nor mu is known); empty when no edge fits.
+    """
+    if len(energia) == 0:
+        return []
+    emin, emax = float(energia[0]), float(energia[-1])
+    if e0 is not None:
+        emin, emax = max(emin, e0 - tolerance), min(emax, e0 + tolerance)
+    elementos = None if elements is None else set(elements)
+    aceitos = None if candidates is None else set(candidates)
+    encontrados = [
+        (simbolo, edge, energia_edge)
+        for energia_edge, simbolo, edge in edges_between(emin, emax)
+        if (elementos is None or simbolo in elementos) and (aceitos is None or (simbolo, edge) in aceitos)
+    ]
+    if e0 is not None:
+        # The E0 of compounds is above the tabulated (metal) edge; among the edges close to it, the
+        # most measured kind is preferred (K, then L3, L2, L1...), since neighbour edges a few eV
+        # apart (Cr K 5989 eV, Ba L1 6011 eV) cannot be told apart by energy alone
+        encontrados = [candidato for candidato in encontrados if candidato[2] <= e0 + EDGE_WINDOW[0]]
+        encontrados.sort(key=lambda candidato: (EDGE_PRIORITY.get(candidato[1], len(EDGE_PRIORITY)), abs(candidato[2] - e0)))
+    elif mu is not None:
+        saltos = [edge_step(energia, mu, candidato[2]) for candidato in encontrados]
+        pares = [(salto, candidato) for salto, candidato in zip(saltos, encontrados) if salto is not None and salto > 0]
+        limite = JUMP_SIMILARITY * max((salto for salto, _ in pares), default=0.0)
+        encontrados = [candidato for _, candidato in sorted(
+            pares, key=lambda par: (par[0] < limite, EDGE_PRIORITY.get(par[1][1], len(EDGE_PRIORITY)), -par[0]),
+        )]
+    return encontrados
+
+
+def identify_spectrum(colunas, tabela, e0=None, elements=None, candidates=None):
+    """
+    Identify the most likely absorbing element and edge of a XDI data block.
+
+    Parameters:
+    colunas (list): Column labels of the data block.
+    tabela (ndarray): XDI data block.
+    e0 (float): Edge energy from the header (eV), if any; estimated around the identified edge otherwise.
+    elements (iterable): Elements the sample has, if known.
+    candidates (iterable): (symbol, edge) pairs accepted, if restricted.
+
+    Returns:
+    tuple: A tuple containing the symbol, edge and E0 (None if it cannot be estimated) of the best
+    candidate, or None when no edge fits.
+    """
+    if tabela is None or tabela.ndim != 2 or len(tabela) == 0:
+        return None
+    dados = absorption(colunas, tabela)
+    if dados is None:
+        return None
+    energia, mu = dados
+    encontrados = identify_edges(energia, mu, e0, elements, candidates)
+    if not encontrados:
+        return None
+    simbolo, edge, energia_edge = encontrados[0]
+    if e0 is None and mu is not None:
+        e0 = estimate_e0(energia, mu, energia_edge - EDGE_WINDOW[1], energia_edge + EDGE_WINDOW[1])
+        if e0 is not None:
+            # Edges a few eV apart (Cr K 5989 eV, Ba L1 6011 eV) have the same jump: the E0 decides
+            proximos = identify_edges(energia, None, e0, elements, candidates)
+            if proximos:
+                simbolo, edge, _ = proximos[0]
+    return simbolo, edge, e0
@@ -0,0 +1,359 @@
+import hashlib
+import re
+import tarfile
+import zipfile
+from datetime import datetime, timezone
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from .content_store import save_content_addressed
+from .formula import parse_formula, composition_key
+from .identification import identify_spectrum
+from .spectrum import pack_spectrum
+from .xdi_parser import decode_text, parse_xdi, column_labels
+
+NOT_INFORMED = "Not Informed"
+
+# "room temperature" (and its variants) is stored as this value, in kelvin:
+ROOM_TEMPERATURE = 295.0
+
+_NUMERO = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def split_value(texto, padrao=""):
+    """
+    Split a numeric XDI value into number and unit.
+
+    Parameters:
+    texto (str): XDI value. Ex: "100.833 mA", "102.047 || S:SRcurrentAI.VAL".
+    padrao (str): Unit assumed when the value has none.
+
+    Returns:
+    tuple: A tuple containing the number and the lower-case unit, or None when the value is not a number.
+    """
+    texto = texto.split("||", 1)[0].strip()
+    encontrado = _NUMERO.match(texto)
+    if encontrado is None:
+        return None
+    unidade = texto[encontrado.end():].strip().rstrip(".").lower()
+    return float(encontrado.group()), unidade or padrao
+
+
+def parse_number(texto, unidades=None, padrao=""):
+    """
+    Read the leading number of a XDI value, converted by its unit.
+
+    Parameters:
+    texto (str): XDI value. Ex: "3.13555", "100.833 mA".
+    unidades (dict): Factor of each accepted unit (lower case) to the stored unit. Default ignores the unit.
+    padrao (str): Unit assumed when the value has none.
+
+    Returns:
+    float: The value, or None when it is not a number or its unit is not accepted.
+    """
+    partes = split_value(texto, padrao)
+    if partes is None:
+        return None
+    valor, unidade = partes
+    if unidades is None:
+        return valor
+    if unidade not in unidades:
+        return None
+    return valor * unidades[unidade]
+
+
+def parse_temperature(texto):
+    """Sample temperature in kelvin ("10K", "10 K", "25 C", "room temperature"...), or None."""
+    if texto.strip().lower().startswith("room"):
+        return ROOM_TEMPERATURE
+    partes = split_value(texto, "k")
+    if partes is None:
+        return None
+    valor, unidade = partes
+    deslocamentos = {"k": 0.0, "c": 273.15, "°c": 273.15, "degc": 273.15}
+    if unidade not in deslocamentos:
+        return None
+    return valor + deslocamentos[unidade]
+
+
+def parse_energy(texto):
+    """Energy in eV ("7112.", "7.112 keV"...), or None."""
+    return parse_number(texto, {"ev": 1.0, "kev": 1000.0}, padrao="ev")
+
+
+def parse_current(texto):
+    """Storage ring current in mA ("100.8 mA", "0.1 A"...), or None."""
+    return parse_number(texto, {"ma": 1.0, "a": 1000.0}, padrao="ma")
+
+
+def parse_timestamp(texto):
+    """
+    Read a XDI (ISO 8601) timestamp as an aware UTC datetime.
+
+    Timestamps without a UTC offset are taken as UTC, since the facility time zone is not recorded.
+
+    Parameters:
+    texto (str): XDI value. Ex: "1997-04-19 23:43:03", "2016-07-05T18:29:20-05:00".
+
+    Returns:
+    datetime: The timestamp in UTC, or None when it is not an ISO 8601 date.
+    """
+    try:
+        instante = datetime.fromisoformat(texto.strip())
+    except ValueError:
+        return None
+    if instante.tzinfo is None:
+        return instante.replace(tzinfo=timezone.utc)
+    return instante.astimezone(timezone.utc)
+
+
+def parse_symbol(texto):
+    """Element symbol with canonical case ("fe", "FE" and "Fe" are stored as "Fe"), or None."""
+    return texto.strip().capitalize() or None
+
+
+def parse_edge(texto):
+    """Absorption edge in upper case ("k" and "K" are stored as "K"), or None."""
+    return texto.strip().upper() or None
+
+
+def parse_sample_formula(texto):
+    """Sample formula as written, without surrounding spaces, or None."""
+    return texto.strip() or None
+
+
+def parse_sample_elements(texto):
+    """Canonical element set of a sample formula ("CaSO4.2(H2O)" is "Ca H O S"), or None."""
+    return composition_key(parse_formula(texto)) or None
+
+
+# Experiment columns kept outside the metadata JSON: the XDI keys ("family.key", alternative keys...)
+# they are read from, the conversion of the XDI value and the value used when the header has none:
+XDI_FIELDS = (
+    ("element_symbol",     ("element.symbol",),                                      parse_symbol,      NOT_INFORMED),
+    ("element_edge",       ("element.edge",),                                        parse_edge,        NOT_INFORMED),
+    ("sample_formula",     ("sample.formula",),                                     parse_sample_formula, ""),
+    ("sample_elements",    ("sample.formula",),                                     parse_sample_elements, ""),
+    ("sample_temperature", ("sample.temperature",),                                  parse_temperature, None),
+    ("e0",                 ("scanparameters.e0", "scan.edge_energy"),                parse_energy,      None),
+    ("mono_d_spacing",     ("mono.d_spacing",),                                      parse_number,      None),
+    ("ring_current",       ("beamline.storage_ring_current", "facility.ring_current"), parse_current,   None),
+    ("scan_start_time",    ("scan.start_time",),                                     parse_timestamp,   None),
+    ("scan_end_time",      ("scan.end_time",),                                       parse_timestamp,   None),
+)
+
+# Experiment fields derived from the XDI file content (copied from an identical file already uploaded):
+PARSED_FIELDS = tuple(campo for campo, *_ in XDI_FIELDS) + ("metadata", "spectrum")
+
+
+def xdi_metadata(header):
+    """
+    Group a XDI header into the structure stored in Experiment.metadata.
+
+    XDI family and key names are case-insensitive, so they are lower-cased
+    ("Facility.Name" and "Facility.name" both become {"facility": {"name": ...}}).
+
+    Parameters:
+    header (dict): Header as returned by parse_xdi ({"Family.key": value}).
+
+    Returns:
+    dict: Every header field, grouped by family ({"family": {"key": value}}).
+    """
+    metadata = {}
+    for chave, valor in header.items():
+        familia, campo = chave.split(".", 1)
+        metadata.setdefault(familia.lower(), {})[campo.lower()] = valor
+    return metadata
+
+
+def experiment_fields(metadata):
+    """
+    Read the Experiment columns kept outside the metadata JSON from a XDI header.
+
+    Parameters:
+    metadata (dict): Header grouped by family, as returned by xdi_metadata.
+
+    Returns:
+    dict: Experiment field values; "Not Informed" for missing element keys, "" for a missing
+    sample formula and None for missing or unreadable numeric and date keys.
+    """
+    campos = {}
+    for campo, chaves, conversor, padrao in XDI_FIELDS:
+        valor = None
+        for chave in chaves:
+            familia, nome = chave.split(".", 1)
+            if nome in metadata.get(familia, {}):
+                valor = conversor(metadata[familia][nome])
+                break
+        campos[campo] = padrao if valor is None else valor
+    return campos
+
+
+def identify_absorber(metadata, colunas, tabela, candidates=None):
+    """
+    Find the absorbing element and edge of a XDI file, from its header or, when the header does not
+    have them, from the energy range and edge of its spectrum (see identification.identify_spectrum).
+
+    The elements of the sample formula, when it has any, are the only ones considered at first.
+
+    Parameters:
+    metadata (dict): Header grouped by family, as returned by xdi_metadata.
+    colunas (list): Column labels of the data block.
+    tabela (ndarray): XDI data block (None if the file has no data).
+    candidates (iterable): (symbol, edge) pairs accepted (ex: those with a reference library).
+
+    Returns:
+    tuple: A tuple containing the symbol, edge and E0 (None if unknown), or None when they cannot be found.
+    """
+    campos = experiment_fields(metadata)
+    simbolo, edge, e0 = campos["element_symbol"], campos["element_edge"], campos["e0"]
+    aceitos = None if candidates is None else set(candidates)
+    if simbolo != NOT_INFORMED and edge != NOT_INFORMED and (aceitos is None or (simbolo, edge) in aceitos):
+        return simbolo, edge, e0
+    if tabela is None:
+        return None
+
+    if simbolo != NOT_INFORMED:
+        tentativas = [[simbolo]]
+    else:
+        elementos = list(parse_formula(campos["sample_formula"]))
+        tentativas = [elementos, None] if elementos else [None]
+    for elementos in tentativas:
+        encontrado = identify_spectrum(colunas, tabela, e0, elementos, aceitos)
+        if encontrado is not None:
+            return encontrado
+    return None
+
+
+def experiment_from_xdi(header, tabela):
+    """
+    Build the Experiment fields a parsed XDI file provides (metadata and packed spectrum).
+
+    Parameters:
+    header (dict): XDI header, as returned by parse_xdi.
+    tabela (ndarray): XDI data block, as returned by parse_xdi (None if the file has no data).
+
+    Returns:
+    dict: Experiment field values, ready to be passed to Experiment(**fields).
+    """
+    metadata = xdi_metadata(header)
+    campos = experiment_fields(metadata)
+    campos["metadata"] = metadata
+
+    campos["spectrum"] = None
+    if tabela is not None:
+        colunas = column_labels(header)[:tabela.shape[1]]
+        colunas += [f"Column.{i + 1}" for i in range(len(colunas), tabela.shape[1])]
+        campos["spectrum"] = pack_spectrum(tabela, colunas)
+
+        # Files without Element.symbol/Element.edge get the ones their spectrum was measured at
+        if NOT_INFORMED in (campos["element_symbol"], campos["element_edge"]):
+            encontrado = identify_absorber(metadata, colunas, tabela)
+            if encontrado is not None:
+                campos["element_symbol"], campos["element_edge"] = encontrado[:2]
+                if campos["e0"] is None:
+                    campos["e0"] = encontrado[2]
+
+    return campos
+
+
+def read_xdi_experiment(lines):
+    """
+    Parse a XDI file into the Experiment fields it provides (metadata and packed spectrum).
+
+    Parameters:
+    lines (str or iterable): XDI content, as accepted by parse_xdi.
+
+    Returns:
+    dict: Experiment field values, ready to be passed to Experiment(**fields).
+    """
+    return experiment_from_xdi(*parse_xdi(lines))
+
+
+# Content hashes skipped by store_xdi_file in this process (see set_known_hashes)
+_conhecidos = frozenset()
+
+
+def set_known_hashes(hashes):
+    """Set the content hashes store_xdi_file skips; the initializer of the bulk ingest worker processes."""
+    global _conhecidos
+    _conhecidos = frozenset(hashes)
+
+
+def store_xdi_file(caminho, folder="XDIs/"):
+    """
+    Store one XDI file under its content hash and parse it in the same pass (see
+    content_store.save_content_addressed); used by the bulk ingest worker processes.
+
+    The file is hashed first: contents in the known hashes (see set_known_hashes) are neither
+    stored nor parsed, so resuming an ingestion only reads the files already ingested once.
+
+    Parameters:
+    caminho (str): Path to the XDI file.
+    folder (str): Storage folder, ending with "/". Default is "XDIs/".
+
+    Returns:
+    tuple: A tuple containing the path, the content hash, the Experiment field values (with the
+    storage name as "xdi_file" and the content hash as "xdi_hash"; None when the content is known
+    or the file could not be stored or parsed) and the error message.
+    """
+    digest = None
+    try:
+        with open(caminho, "rb") as fl:
+            sha = hashlib.sha256()
+            for chunk in iter(lambda: fl.read(1 << 16), b""):
+                sha.update(chunk)
+            digest = sha.hexdigest()
+            if digest in _conhecidos:
+                return caminho, digest, None, None
+            fl.seek(0)
+            name, digest, existente, header, tabela = save_content_addressed(File(fl), folder)
+        if tabela is None:
+            # Not kept in the storage when no experiment refers to it
+            if not existente:
+                default_storage.delete(name)
+            raise ValueError("FILE HAS NO DATA.")
+        campos = experiment_from_xdi(header, tabela)
+    except Exception as e:
+        return caminho, digest, None, f"{type(e).__name__}: {e}"
+    campos["xdi_file"] = name
+    campos["xdi_hash"] = digest
+    return caminho, digest, campos, None
+
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+def is_archive(nome):
+    """Return whether a file name has one of the supported archive extensions."""
+    return nome.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def archive_members(arquivo, nome):
+    """
+    Iterate over the regular files of a zip or tar archive without extracting them to disk.
+
+    Parameters:
+    arquivo (file): Seekable binary file object with the archive content.
+    nome (str): Archive file name, used to pick zip or tar.
+
+    Raises:
+    ValueError: If the archive cannot be read.
+
+    Yields:
+    tuple: A tuple containing the member name and a binary file object streaming its content.
+    """
+    try:
+        if nome.lower().endswith(".zip"):
+            with zipfile.ZipFile(arquivo) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir():
+                        with zf.open(info) as membro:
+                            yield info.filename, membro
+        else:
+            # "r|*" reads the tar (compressed or not) as a stream, member by member
+            with tarfile.open(fileobj=arquivo, mode="r|*") as tf:
+                for info in tf:
+                    if info.isfile():
+                        yield info.name, tf.extractfile(info)
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ValueError(f"Invalid archive {nome}: {e}")
@@ -0,0 +1,42 @@
+import os
+import pickle
+from django.core.management.base import BaseCommand, CommandError
+from database.reference_library import library_path, write_library, rebuild_matrices
+
+
+class Command(BaseCommand):
+    help = 'Converts the normalized reference pickles (norm_pkl_files/<element>/*_norm.pickle) into memory-mappable reference libraries and their per-edge reference matrices.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pickles', default='norm_pkl_files', help='Folder with one sub-folder of pickles per element.')
+        parser.add_argument('--output', default=None, help='Folder the library files are written to. Default is settings.NORM_LIBRARY_DIR.')
+
+    def handle(self, *args, **options):
+        origem = options['pickles']
+        if not os.path.isdir(origem):
+            raise CommandError(f'{origem} is not a directory.')
+
+        for element in sorted(os.listdir(origem)):
+            pasta = os.path.join(origem, element)
+            if element.startswith('.') or not os.path.isdir(pasta):
+                continue
+
+            referencias = {}
+            for filename in sorted(os.listdir(pasta)):
+                if not filename.endswith('_norm.pickle'):
+                    continue
+                try:
+                    # Only pickles produced by this project should be converted: unpickling runs arbitrary code
+                    with open(os.path.join(pasta, filename), 'rb') as fl:
+                        header, df = pickle.load(fl)
+                    referencias[filename[:-len('_norm.pickle')]] = (header, df['energy eV'].to_numpy(), df['norm'].to_numpy())
+                except Exception as e:
+                    self.stderr.write(f'{filename}: {e}')
+
+            if referencias:
+                caminho = library_path(element, options['output'])
+                write_library(caminho, referencias)
+                rebuild_matrices(element, options['output'])
+                self.stdout.write(f'{caminho}: {len(referencias)} references.')
+
+        self.stdout.write(self.style.SUCCESS('Reference libraries written.'))
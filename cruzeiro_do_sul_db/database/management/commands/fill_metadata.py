@@ -0,0 +1,59 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from database.signals import experiments_saved
+from database.ingest import xdi_metadata, experiment_fields, XDI_FIELDS, NOT_INFORMED
+from database.models import Experiment
+from database.xdi_parser import decode_text, parse_xdi
+
+# Columns filled from the spectrum when the header does not have them, and their "missing" value:
+IDENTIFIED_FIELDS = {'element_symbol': NOT_INFORMED, 'element_edge': NOT_INFORMED, 'e0': None}
+
+
+class Command(BaseCommand):
+    help = 'Fills Experiment.metadata and the columns parsed from it with the header of the stored XDI files (experiments created before these fields).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of experiments updated per transaction.')
+        parser.add_argument('--all', action='store_true', help='Also re-read the experiments that already have metadata.')
+
+    def handle(self, *args, **options):
+        pendentes = Experiment.objects.exclude(xdi_file='').exclude(xdi_file__isnull=True)
+        if not options['all']:
+            pendentes = pendentes.filter(metadata={})
+
+        lote = []
+        preenchidos = 0
+        falhas = 0
+        for experiment in pendentes.only('id', 'xdi_file', 'experiment_title', 'additional_info', 'element_symbol', 'element_edge', 'e0').iterator(chunk_size=options['batch_size']):
+            caminho_arquivo = os.path.join(settings.MEDIA_ROOT, experiment.xdi_file.name)
+            try:
+                with open(caminho_arquivo, 'rb') as fl:
+                    # Only the header is needed: data lines are not decoded
+                    header, _ = parse_xdi(decode_text(line) for line in fl if line.startswith(b'#'))
+            except (OSError, ValueError) as e:
+                falhas += 1
+                self.stderr.write(f'Experiment {experiment.id}: {e}')
+                continue
+            experiment.metadata = xdi_metadata(header)
+            for campo, valor in experiment_fields(experiment.metadata).items():
+                # Element, edge and E0 missing from the header were identified from the spectrum at
+                # ingestion (see ingest.identify_absorber): the stored values are kept
+                if campo in IDENTIFIED_FIELDS and valor == IDENTIFIED_FIELDS[campo]:
+                    continue
+                setattr(experiment, campo, valor)
+            lote.append(experiment)
+            if len(lote) >= options['batch_size']:
+                preenchidos += self.save(lote)
+                lote = []
+        preenchidos += self.save(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'{preenchidos} experiments filled, {falhas} failed.'))
+
+    def save(self, lote):
+        with transaction.atomic():
+            Experiment.objects.bulk_update(lote, ['metadata'] + [campo for campo, *_ in XDI_FIELDS])
+            # Sample name, formula and preparation are indexed words, and the formula is parsed
+            experiments_saved(lote)
+        return len(lote)
@@ -0,0 +1,91 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from database.signals import experiments_saved
+from database.stats import experiments_added
+from database.ingest import set_known_hashes, store_xdi_file
+from database.models import Experiment, User
+
+
+class Command(BaseCommand):
+    help = 'Bulk ingests every .xdi file below a directory tree (ex: XDI_files/<Element>/) as Experiments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Root of the XDI directory tree.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of parser processes.')
+        parser.add_argument('--batch-size', type=int, default=200, help='Number of experiments created per transaction.')
+        parser.add_argument('--experiment-type', default='1', choices=[tipo for tipo, _ in Experiment.TYPES], help='Experiment type of the ingested files.')
+        parser.add_argument('--user', default=None, help='E-mail of the user the experiments are assigned to.')
+        parser.add_argument('--prefix', default='XDIs/', help='Storage folder the files are stored in, under their content hash (as uploads).')
+
+    def handle(self, *args, **options):
+        raiz = os.path.abspath(options['directory'])
+        if not os.path.isdir(raiz):
+            raise CommandError(f'{raiz} is not a directory.')
+
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User {options["user"]} does not exist.')
+
+        arquivos = []
+        for pasta, subpastas, nomes in os.walk(raiz):
+            # Skips hidden folders such as .ipynb_checkpoints
+            subpastas[:] = sorted(d for d in subpastas if not d.startswith('.'))
+            arquivos += [os.path.join(pasta, nome) for nome in sorted(nomes) if nome.endswith('.xdi')]
+        self.stdout.write(f'{len(arquivos)} files found.')
+
+        # Contents already in the database (ingested by a previous, possibly interrupted, run or uploaded) are skipped
+        ingeridos = set(Experiment.objects.exclude(xdi_hash__isnull=True).values_list('xdi_hash', flat=True))
+
+        inicio = time.perf_counter()
+        lote = []
+        criados = 0
+        repetidos = 0
+        falhas = 0
+        # Workers hash each file, skip the known contents and store the others under their hash while
+        # parsing them; only the Experiment fields come back to this process
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=set_known_hashes, initargs=(ingeridos,)) as pool:
+            for caminho, digest, campos, erro in pool.map(partial(store_xdi_file, folder=options['prefix']), arquivos, chunksize=8):
+                if erro is not None:
+                    falhas += 1
+                    self.stderr.write(f'{caminho}: {erro}')
+                    continue
+                # Known before the run, or already seen in this run (identical files)
+                if digest in ingeridos:
+                    repetidos += 1
+                    continue
+
+                titulo = campos['metadata'].get('sample', {}).get('name') or os.path.splitext(os.path.basename(caminho))[0]
+                lote.append(Experiment(
+                    user            = user,
+                    experiment_title= titulo[:150],
+                    experiment_type = options['experiment_type'],
+                    **campos
+                ))
+                ingeridos.add(digest)
+                if len(lote) >= options['batch_size']:
+                    criados += self.save(lote, inicio)
+                    lote = []
+        criados += self.save(lote, inicio)
+
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{criados} experiments created, {repetidos} already ingested, {falhas} failed in {duracao:.1f} s ({criados / max(duracao, 1e-9):.1f} files/s).'
+        ))
+
+    def save(self, lote, inicio):
+        if not lote:
+            return 0
+        with transaction.atomic():
+            Experiment.objects.bulk_create(lote)
+            # bulk_create does not send post_save (search indexes and home-page counts)
+            experiments_saved(lote)
+            experiments_added(lote)
+        self.stdout.write(f'  {len(lote)} experiments committed ({time.perf_counter() - inicio:.1f} s).')
+        return len(lote)
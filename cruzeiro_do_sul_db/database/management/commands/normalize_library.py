@@ -0,0 +1,133 @@
+import csv
+import os
+import time
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+from database.normalization import DEFAULT_STRATEGY, STRATEGIES, benchmark_strategies, get_strategy, normalize_batch, xdi_spectrum
+from database.reference_library import library_path, add_references, open_library
+
+
+class Command(BaseCommand):
+    help = 'Normalizes the XDI spectra of the reference library (XDI_files/<element>/*.xdi) in parallel and writes one library file per element.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', nargs='?', default='XDI_files', help='Folder with one sub-folder of XDI files per element.')
+        parser.add_argument('--element', action='append', default=[], help='Only this absorbing element (repeatable). Default is every element.')
+        parser.add_argument('--edge', default=None, help='Only spectra of this edge (Element.edge). Ex: K.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes.')
+        parser.add_argument('--strategy', default=DEFAULT_STRATEGY, choices=sorted(STRATEGIES), help='Normalization strategy (see database/normalization.py).')
+        parser.add_argument('--n', type=int, default=None, help='Pre-edge range for normalization (strategy default otherwise).')
+        parser.add_argument('--polyfit-start', type=float, default=None, help='Starting point (0 to 1) of the post-edge fit (polynomial strategy).')
+        parser.add_argument('--polyfit-end', type=float, default=None, help='Ending point (0 to 1) of the post-edge fit (polynomial strategy).')
+        parser.add_argument('--max-points', type=int, default=None, help='Largest post-edge window searched (edge_jump strategy).')
+        parser.add_argument('--output', default=None, help='Folder the library files are written to. Default is settings.NORM_LIBRARY_DIR.')
+        parser.add_argument('--report', default=None, help='CSV file with the time and error of every file.')
+        parser.add_argument('--benchmark', action='store_true', help='Only time every strategy on the files and compare them to the current library, without writing it.')
+
+    def handle(self, *args, **options):
+        raiz = options['directory']
+        if not os.path.isdir(raiz):
+            raise CommandError(f'{raiz} is not a directory.')
+
+        params = {
+            nome: options[nome] for nome in ('n', 'polyfit_start', 'polyfit_end', 'max_points')
+            if options[nome] is not None
+        }
+        try:
+            completos = get_strategy(options['strategy']).params(params)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if completos.get('polyfit_end', 0) >= completos.get('polyfit_start', 1):
+            raise CommandError('--polyfit-start must be higher than --polyfit-end.')
+
+        elementos = set(options['element'])
+        caminhos = []
+        for element in sorted(os.listdir(raiz)):
+            pasta = os.path.join(raiz, element)
+            if element.startswith('.') or not os.path.isdir(pasta) or (elementos and element not in elementos):
+                continue
+            caminhos += [os.path.join(pasta, nome) for nome in sorted(os.listdir(pasta)) if nome.endswith('.xdi')]
+
+        if options['benchmark']:
+            self.benchmark(caminhos, params, options)
+            return
+
+        self.stdout.write(f'{len(caminhos)} files to normalize with the {options["strategy"]} strategy and {options["workers"]} workers.')
+
+        inicio = time.perf_counter()
+        referencias = defaultdict(dict)
+        linhas = []
+        falhas = 0
+        for caminho, header, resultado, duracao, erro in normalize_batch(caminhos, options['workers'], options['strategy'], **params):
+            element = os.path.basename(os.path.dirname(caminho))
+            edge = header.get('Element.edge', '') if header else ''
+            if erro is None and options['edge'] and edge != options['edge']:
+                continue
+            linhas.append((caminho, element, edge, 0 if resultado is None else len(resultado.norm), f'{duracao:.6f}', erro or ''))
+            if erro is not None:
+                falhas += 1
+                self.stderr.write(f'{caminho}: {erro}')
+                continue
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'  {caminho}: {len(resultado.norm)} points in {duracao * 1e3:.1f} ms')
+            # The library of an element is the one of its folder, as for the pickles (norm_pkl_files/<element>/)
+            referencias[element][os.path.splitext(os.path.basename(caminho))[0]] = (header, resultado.energy, resultado.norm)
+        normalizacao = time.perf_counter() - inicio
+
+        # One consolidated file per element: references of other edges or sources are kept, the normalized ones replaced
+        for element, novas in sorted(referencias.items()):
+            total = add_references(element, novas, options['output'])
+            self.stdout.write(f'{library_path(element, options["output"])}: {len(novas)} references normalized, {total} in total.')
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as arquivo:
+                escritor = csv.writer(arquivo)
+                escritor.writerow(['file', 'element', 'edge', 'points', 'seconds', 'error'])
+                escritor.writerows(linhas)
+
+        duracao = time.perf_counter() - inicio
+        tempos = sorted((float(linha[4]), linha[0]) for linha in linhas)
+        normalizados = len(linhas) - falhas
+        self.stdout.write(self.style.SUCCESS(
+            f'{normalizados} spectra normalized, {falhas} failed in {duracao:.1f} s '
+            f'({normalizacao:.1f} s normalizing, {normalizados / max(normalizacao, 1e-9):.1f} files/s).'
+        ))
+        if tempos:
+            self.stdout.write(f'Per file: mean {sum(t for t, _ in tempos) / len(tempos) * 1e3:.1f} ms, slowest {tempos[-1][0] * 1e3:.1f} ms ({tempos[-1][1]}).')
+
+    def benchmark(self, caminhos, params, options):
+        spectra = []
+        for caminho in caminhos:
+            try:
+                with open(caminho, 'rb') as fl:
+                    spectrum = xdi_spectrum(fl.read(), os.path.splitext(os.path.basename(caminho))[0])
+            except Exception as e:
+                self.stderr.write(f'{caminho}: {type(e).__name__}: {e}')
+                continue
+            if options['edge'] and spectrum.header.get('Element.edge', '') != options['edge']:
+                continue
+            spectrum.element = os.path.basename(os.path.dirname(caminho))
+            spectra.append(spectrum)
+
+        # References with the same name in the current library, for the accuracy column
+        referencias = []
+        bibliotecas = {}
+        for spectrum in spectra:
+            if spectrum.element not in bibliotecas:
+                existe = os.path.exists(library_path(spectrum.element, options['output']))
+                bibliotecas[spectrum.element] = open_library(spectrum.element, options['output']) if existe else None
+            biblioteca = bibliotecas[spectrum.element]
+            referencias.append(biblioteca.spectrum(spectrum.name) if biblioteca is not None and spectrum.name in biblioteca else None)
+
+        # The parameters given apply to the strategies that have them
+        estrategias = {
+            nome: {chave: valor for chave, valor in params.items() if chave in estrategia.defaults}
+            for nome, estrategia in STRATEGIES.items()
+        }
+        self.stdout.write(f'{len(spectra)} spectra, {sum(r is not None for r in referencias)} in the current library.')
+        for nome, resultado in benchmark_strategies(spectra, estrategias, referencias).items():
+            erro = 'n/a' if resultado['max_error'] is None else f'{resultado["max_error"]:.2e}'
+            self.stdout.write(
+                f'{nome:12} {resultado["seconds"] * 1e3 / max(resultado["normalized"], 1):8.3f} ms/spectrum  '
+                f'{resultado["normalized"]} normalized, {resultado["failed"]} failed, max error vs library {erro}'
+            )
@@ -0,0 +1,59 @@
+import ast
+import os
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from database.models import Experiment
+from database.spectrum import pack_spectrum
+from database.xdi_parser import decode_text, parse_xdi, column_labels
+
+
+class Command(BaseCommand):
+    help = 'Converts the legacy Experiment.tabela text tables into packed binary spectra (Experiment.spectrum).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of experiments updated per transaction.')
+        parser.add_argument('--float32', action='store_true', help='Store the columns as float32 instead of float64.')
+
+    def handle(self, *args, **options):
+        dtype = np.float32 if options['float32'] else np.float64
+        pendentes = Experiment.objects.filter(spectrum__isnull=True, tabela__isnull=False).exclude(tabela='')
+
+        lote = []
+        convertidos = 0
+        falhas = 0
+        for experiment in pendentes.only('id', 'xdi_file', 'tabela').iterator(chunk_size=options['batch_size']):
+            try:
+                tabela = np.array(ast.literal_eval(experiment.tabela), dtype=np.float64, ndmin=2)
+                experiment.spectrum = pack_spectrum(tabela, self.labels(experiment, tabela.shape[1]), dtype)
+            except (ValueError, SyntaxError) as e:
+                falhas += 1
+                self.stderr.write(f'Experiment {experiment.id}: {e}')
+                continue
+            experiment.tabela = None
+            lote.append(experiment)
+            if len(lote) >= options['batch_size']:
+                convertidos += self.save(lote)
+                lote = []
+        convertidos += self.save(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'{convertidos} experiments converted, {falhas} failed.'))
+
+    def labels(self, experiment, n_columns):
+        """Column labels from the experiment XDI header, or generic ones when the file is not available."""
+        colunas = []
+        if experiment.xdi_file:
+            caminho_arquivo = os.path.join(settings.MEDIA_ROOT, experiment.xdi_file.name)
+            try:
+                with open(caminho_arquivo, 'rb') as fl:
+                    header, _ = parse_xdi(decode_text(line) for line in fl if line.startswith(b'#'))
+                colunas = column_labels(header)[:n_columns]
+            except OSError:
+                pass
+        return colunas + [f'Column.{i + 1}' for i in range(len(colunas), n_columns)]
+
+    def save(self, lote):
+        with transaction.atomic():
+            Experiment.objects.bulk_update(lote, ['spectrum', 'tabela'])
+        return len(lote)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from database.ingest import parse_sample_elements
+from database.fulltext import FTS_TABLE, create_fulltext_index, fulltext_available
+from database.models import Composition, Experiment
+from database.signals import experiments_saved
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the search indexes of every Experiment: full-text words (SQLite FTS5 or PostgreSQL tsvector), parsed sample composition and element set (run it again after formula parser changes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of experiments indexed per transaction.')
+
+    def handle(self, *args, **options):
+        # Other backends than SQLite and PostgreSQL have no full-text index (their free-text search scans)
+        texto = fulltext_available()
+        if texto:
+            create_fulltext_index()
+        else:
+            self.stderr.write('The database backend has no full-text index: only the compositions are rebuilt.')
+
+        experiments = Experiment.objects.only('id', 'experiment_title', 'additional_info', 'sample_formula', 'sample_elements', 'metadata')
+        with transaction.atomic():
+            if texto:
+                with transaction.get_connection().cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            Composition.objects.all().delete()
+            lote = []
+            indexados = 0
+            corrigidos = 0
+            for experiment in experiments.iterator(chunk_size=options['batch_size']):
+                lote.append(experiment)
+                if len(lote) >= options['batch_size']:
+                    corrigidos += self.save(lote)
+                    indexados += len(lote)
+                    lote = []
+            corrigidos += self.save(lote)
+            indexados += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'{indexados} experiments indexed, {corrigidos} element sets corrected.'))
+
+    def save(self, lote):
+        # The element set is parsed from the formula like the Composition rows, so both follow parser fixes
+        alterados = []
+        for experiment in lote:
+            elementos = parse_sample_elements(experiment.sample_formula or '') or ''
+            if elementos != experiment.sample_elements:
+                experiment.sample_elements = elementos
+                alterados.append(experiment)
+        Experiment.objects.bulk_update(alterados, ['sample_elements'])
+        experiments_saved(lote)
+        return len(alterados)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from database.stats import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recounts the home-page statistics (experiments by type, beamlines, facilities and users).'
+
+    def handle(self, *args, **options):
+        for nome, valor in rebuild_statistics().items():
+            self.stdout.write(f'{nome}: {valor}')
+        self.stdout.write(self.style.SUCCESS('Statistics rebuilt.'))
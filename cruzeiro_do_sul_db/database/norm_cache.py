@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from django.conf import settings
+
+# Normalization results cache: one NumPy .npz file per result in settings.NORM_CACHE_DIR, named after the
+# SHA-256 of (content hash, algorithm, algorithm version, parameters). Reading a result touches its
+# modification time, so evicting the oldest files first when the folder exceeds NORM_CACHE_MAX_BYTES
+# drops the least recently used ones. Files are written through os.replace, so concurrent web and
+# worker processes can share the folder.
+NORM_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def content_hash(conteudo):
+    """SHA-256 (hex) of the content of a file (bytes)."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def cache_key(digest, algorithm, version, params):
+    """
+    Key of a normalization result.
+
+    Parameters:
+    digest (str): Content hash of the normalized file (see content_hash).
+    algorithm (str): Name of the normalization algorithm. Ex: "normalize".
+    version (int): Version of the algorithm: results of older versions are never read.
+    params (dict): Parameters of the normalization (JSON serializable).
+
+    Returns:
+    str: The key (hex).
+    """
+    dados = json.dumps([digest, algorithm, version, params], sort_keys=True)
+    return hashlib.sha256(dados.encode("utf-8")).hexdigest()
+
+
+def cache_dir():
+    """Return the cache folder (settings.NORM_CACHE_DIR, independent of the working directory)."""
+    return os.fspath(settings.NORM_CACHE_DIR)
+
+
+def _cache_path(chave, pasta):
+    return os.path.join(pasta, f"{chave}.npz")
+
+
+def read_cached(chave, pasta=None):
+    """
+    Read a normalization result from the cache, marking it as recently used.
+
+    Parameters:
+    chave (str): Key of the result (see cache_key).
+    pasta (str): Cache folder. Default is cache_dir().
+
+    Returns:
+    dict: {name: array, or number for scalars}, or None when the result is not cached.
+    """
+    caminho = _cache_path(chave, pasta or cache_dir())
+    try:
+        with np.load(caminho, allow_pickle=False) as dados:
+            valores = {nome: dados[nome].item() if dados[nome].ndim == 0 else dados[nome] for nome in dados.files}
+        os.utime(caminho)
+    except (OSError, ValueError):
+        # Missing, evicted meanwhile or truncated: computed again
+        return None
+    return valores
+
+
+def write_cached(chave, valores, pasta=None, max_bytes=NORM_CACHE_MAX_BYTES):
+    """
+    Store a normalization result in the cache, then evict the least recently used results beyond max_bytes.
+
+    Parameters:
+    chave (str): Key of the result (see cache_key).
+    valores (dict): {name: array or number}.
+    pasta (str): Cache folder. Default is cache_dir().
+    max_bytes (int): Size limit of the cache folder. Default is NORM_CACHE_MAX_BYTES.
+    """
+    pasta = pasta or cache_dir()
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".part")
+    try:
+        with os.fdopen(descritor, "wb") as fl:
+            np.savez(fl, **{nome: np.asarray(valor) for nome, valor in valores.items()})
+        os.replace(temporario, _cache_path(chave, pasta))
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    evict(pasta, max_bytes)
+
+
+def evict(pasta=None, max_bytes=NORM_CACHE_MAX_BYTES):
+    """
+    Remove the least recently used results until the cache folder holds at most max_bytes.
+
+    Parameters:
+    pasta (str): Cache folder. Default is cache_dir().
+    max_bytes (int): Size limit. Default is NORM_CACHE_MAX_BYTES.
+
+    Returns:
+    int: Number of results removed.
+    """
+    arquivos = []
+    for entrada in os.scandir(pasta or cache_dir()):
+        if entrada.name.endswith(".npz"):
+            try:
+                estado = entrada.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((estado.st_mtime_ns, estado.st_size, entrada.path))
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    removidos = 0
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(caminho)
+            removidos += 1
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+    return removidos
+
+
+def cached_normalization(digest, algorithm, version, params, calcular, pasta=None):
+    """
+    Return a cached normalization result, computing and storing it on a miss.
+
+    Parameters:
+    digest (str): Content hash of the normalized file (see content_hash).
+    algorithm (str): Name of the normalization algorithm.
+    version (int): Version of the algorithm.
+    params (dict): Parameters of the normalization (JSON serializable).
+    calcular (callable): Function without arguments computing the result ({name: array or number}).
+    pasta (str): Cache folder. Default is cache_dir().
+
+    Returns:
+    dict: The result.
+    """
+    chave = cache_key(digest, algorithm, version, params)
+    valores = read_cached(chave, pasta)
+    if valores is None:
+        valores = calcular()
+        write_cached(chave, valores, pasta)
+    return valores
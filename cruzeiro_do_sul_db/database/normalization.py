@@ -1,15 +1,265 @@
+import inspect
+import numpy as np
 import pandas as pd
-import pickle
-from lmfit.models import LinearModel
-from scipy.optimize import curve_fit
 import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import StringIO
+from chardet import detect
+from .xdi_parser import decode_text, parse_xdi, column_labels
+from .reference_library import add_reference, add_references
+from .norm_cache import content_hash, cached_normalization
+
+# Normalization engine: every algorithm is a strategy registered by name (see register_strategy) that
+# takes the energy and absorption of a Spectrum and gives a NormalizedSpectrum. The normalization page,
+# the comparison pipeline and the library builder all go through normalize_spectrum/normalize_content
+# and the batch entry points, so strategies can be swapped and compared (see benchmark_strategies).
+
+# Default largest post-edge window (points from the end) searched by post_edge_window:
+POST_EDGE_POINTS = 100
+
+# Strategy of the reference library (and of the comparison pipeline, which compares against it):
+DEFAULT_STRATEGY = "polynomial"
+
+
+class Spectrum:
+    """
+    Input of the normalization strategies: one absorption spectrum.
+
+    Attributes:
+    energy (ndarray): Energy (eV), one value per point, increasing.
+    absorption (ndarray): Absorption, one value per energy.
+    name (str): Name of the spectrum (ex: the file name without extension).
+    header (dict): XDI header, when read from a XDI file.
+    digest (str): Content hash of the file it was read from (see norm_cache.content_hash); the results
+    of a spectrum are cached only when it is known.
+    """
 
-def normalize(df, n=15, polyfit_start=0.5, polyfit_end=0.01):
+    def __init__(self, energy, absorption, name="", header=None, digest=None):
+        self.energy = np.asarray(energy, dtype=float)
+        self.absorption = np.asarray(absorption, dtype=float)
+        if self.energy.shape != self.absorption.shape:
+            raise ValueError("ENERGY AND ABSORPTION MUST HAVE THE SAME LENGTH.")
+        self.name = name
+        self.header = header
+        self.digest = digest
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        """
+        Spectrum of a XANES/EXAFS DataFrame: its "energy eV" column and the transmission ratio itrans/i0
+        (i0 and itrans are swapped when an itrans value is above i0, since some files swap the columns).
+
+        Parameters:
+        df (DataFrame): DataFrame with "energy eV", "i0" and "itrans" columns.
+        **kwargs: name, header and digest of the Spectrum.
+
+        Raises:
+        KeyError: If a column is missing.
+
+        Returns:
+        Spectrum: The spectrum.
+        """
+        i0 = df["i0"].to_numpy(dtype=float)
+        itrans = df["itrans"].to_numpy(dtype=float)
+        if (i0 < itrans).any():
+            i0, itrans = itrans, i0
+        return cls(df["energy eV"].to_numpy(dtype=float), itrans / i0, **kwargs)
+
+
+class NormalizedSpectrum:
+    """
+    Output of the normalization strategies.
+
+    Attributes:
+    strategy (str): Name of the strategy.
+    params (dict): Parameters of the strategy, defaults included.
+    energy (ndarray): Energy (eV).
+    norm (ndarray): Normalized absorption.
+    e0 (float): Edge energy found by the strategy (None if it does not look for one).
+    edge_jump (float): Edge jump the absorption was divided by (None if it does not use one).
+    details (dict): Other results of the strategy (fitted lines, post-edge window...).
+    seconds (float): Time spent (only reading the cache, on a hit).
     """
-    Normalize a XANES/EXAFS DataFrame.
+
+    def __init__(self, strategy, params, valores, seconds=0.0):
+        valores = dict(valores)
+        self.strategy = strategy
+        self.params = params
+        self.energy = valores.pop("energy")
+        self.norm = valores.pop("norm")
+        self.e0 = valores.pop("e0", None)
+        self.edge_jump = valores.pop("edge_jump", None)
+        self.details = valores
+        self.seconds = seconds
+
+
+class Strategy:
+    """
+    A normalization algorithm registered in STRATEGIES.
+
+    Attributes:
+    name (str): Name of the strategy. Ex: "polynomial".
+    function (callable): function(energy, absorption, **params), returning a dict with at least
+    "energy" and "norm" (and "e0", "edge_jump" and other results when it has them).
+    version (int): Part of the keys of the cached results (see norm_cache): increase it whenever a
+    change alters the results.
+    description (str): One-line description.
+    defaults (dict): Parameters of the function and their default values.
+    """
+
+    def __init__(self, name, function, version, description):
+        self.name = name
+        self.function = function
+        self.version = version
+        self.description = description
+        self.defaults = {
+            nome: parametro.default
+            for nome, parametro in inspect.signature(function).parameters.items()
+            if parametro.default is not inspect.Parameter.empty
+        }
+
+    def params(self, params):
+        """
+        Complete parameters with the defaults of the strategy.
+
+        Parameters:
+        params (dict): Parameters given.
+
+        Raises:
+        ValueError: If a parameter is not one of the strategy.
+
+        Returns:
+        dict: Every parameter of the strategy.
+        """
+        desconhecidos = set(params) - set(self.defaults)
+        if desconhecidos:
+            raise ValueError(f"UNKNOWN PARAMETERS FOR THE {self.name.upper()} STRATEGY: {', '.join(sorted(desconhecidos))}.")
+        return {**self.defaults, **params}
+
+    def run(self, spectrum, params):
+        """Normalize a spectrum without the cache; params must be complete (see params)."""
+        return self.function(spectrum.energy, spectrum.absorption, **params)
+
+
+# Registered strategies: {name: Strategy}
+STRATEGIES = {}
+
+
+def register_strategy(name, version, description):
+    """Decorator registering a normalization function as a named strategy (see Strategy)."""
+    def registrar(function):
+        STRATEGIES[name] = Strategy(name, function, version, description)
+        return function
+    return registrar
+
+
+def get_strategy(name):
+    """
+    Find a registered strategy.
 
     Parameters:
-    df (DataFrame): DataFrame containing XANES/EXAFS data to be normalized.
+    name (str): Name of the strategy.
+
+    Raises:
+    ValueError: If no strategy has this name.
+
+    Returns:
+    Strategy: The strategy.
+    """
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"UNKNOWN NORMALIZATION STRATEGY: {name}.") from None
+
+
+def polynomial_fit(x, y, degree, x_eval=None):
+    """
+    Least-squares polynomial fit, solved in closed form with one NumPy linear solve.
+
+    x is centered and scaled to [-1, 1] before the Vandermonde matrix is built, so the solve stays
+    well conditioned for energies of thousands of eV (x**2 ~ 1e8).
+
+    Parameters:
+    x (ndarray): Abscissas of the fitted points.
+    y (ndarray): Ordinates of the fitted points.
+    degree (int): Polynomial degree (1 for a line).
+    x_eval (ndarray): Abscissas where the polynomial is evaluated. Default is x.
+
+    Raises:
+    ValueError: If there are fewer points than coefficients.
+
+    Returns:
+    ndarray: The fitted polynomial at x_eval.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= degree:
+        raise ValueError("THE FIT NEEDS MORE POINTS THAN THE POLYNOMIAL DEGREE.")
+    centro = (x[0] + x[-1]) / 2
+    escala = (x[-1] - x[0]) / 2 or 1.0
+    coeficientes, *_ = np.linalg.lstsq(np.vander((x - centro) / escala, degree + 1), y, rcond=None)
+    x_eval = x if x_eval is None else np.asarray(x_eval, dtype=float)
+    return np.polyval(coeficientes, (x_eval - centro) / escala)
+
+
+def post_edge_window(x, y, min_points=20, max_points=POST_EDGE_POINTS):
+    """
+    Find the flattest post-edge window: among the windows x[npt:-1], for npt from -min_points to
+    -(max_points - 1), the one whose least-squares line has the smallest |slope|.
+
+    Every slope comes from the same suffix (cumulative) sums of x, y, x*y and x**2, in one vectorized
+    pass, instead of one linear fit per window, so max_points can be as large as the spectrum.
+
+    Parameters:
+    x (ndarray): Energy, one value per point.
+    y (ndarray): Absorption.
+    min_points (int): Smallest window start, counted from the end. Default is 20.
+    max_points (int): Largest window start (exclusive), counted from the end. Default is POST_EDGE_POINTS.
+
+    Raises:
+    ValueError: If max_points is not greater than min_points or the spectrum has fewer than min_points + 1 points.
+
+    Returns:
+    tuple: A tuple containing the start index (npt, negative) of the flattest window and its slope.
+    """
+    if max_points <= min_points:
+        raise ValueError("MAX_POINTS MUST BE HIGHER THAN MIN_POINTS.")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n_data = len(x)
+    if n_data <= min_points:
+        raise ValueError("THE SPECTRUM HAS TOO FEW POINTS FOR THE POST-EDGE WINDOW.")
+
+    # Shifted to the last fitted point, so the sums of squares do not lose precision (the slope does not change)
+    dx = x[-2::-1] - x[-2]
+    dy = y[-2::-1] - y[-2]
+    soma_x, soma_y = np.cumsum(dx), np.cumsum(dy)
+    soma_xy, soma_xx = np.cumsum(dx * dy), np.cumsum(dx * dx)
+
+    # Window x[npt:-1] has -npt - 1 points; starts before the first point are clamped to it, as in iloc
+    npts = np.arange(-min_points, -max_points, -1)
+    pontos = np.minimum(-npts - 1, n_data - 1)
+    i = pontos - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = (pontos * soma_xy[i] - soma_x[i] * soma_y[i]) / (pontos * soma_xx[i] - soma_x[i] ** 2)
+    slopes = np.where(np.isfinite(slopes), slopes, np.inf)
+    melhor = int(np.argmin(np.abs(slopes)))
+    return int(npts[melhor]), float(slopes[melhor])
+
+
+@register_strategy("polynomial", 2, "Linear pre-edge subtracted, then divided by a quadratic fitted to the post-edge.")
+def polynomial_normalize(energy, absorption, n=15, polyfit_start=0.5, polyfit_end=0.01):
+    """
+    Normalize an absorption spectrum by its pre-edge line and post-edge quadratic (the normalization
+    of the reference library). Both are linear least-squares fits, computed in closed form (see polynomial_fit).
+
+    Parameters:
+    energy (ndarray): Energy, one value per point, increasing.
+    absorption (ndarray): Absorption.
     n (int): Pre-edge range for normalization. Default is 15.
     polyfit_start (float): Starting point (0 to 1) for polynomial fitting. Default is 0.5.
     polyfit_end (float): Ending point (0 to 1) for polynomial fitting. Default is 0.01.
@@ -18,63 +268,232 @@ def normalize(df, n=15, polyfit_start=0.5, polyfit_end=0.01):
     ValueError: If polyfit_start is not greater than polyfit_end.
 
     Returns:
-    DataFrame: Normalized DataFrame with added 'norm' column.
+    dict: "energy", "norm", "pre_edge" (the fitted line) and "post_edge" (the fitted quadratic), over the whole spectrum.
     """
-    norm_df = df.copy()
-    
     if polyfit_end >= polyfit_start:
         raise ValueError("POLYFIT_START MUST BE HIGHER THAN POLYFIT END.")
-    
-    energy = df["energy eV"]
-    if (df["i0"] < df["itrans"]).any():
-        i0 = df["itrans"]
-        itrans = df["i0"]
-    else:
-        i0 = df["i0"]
-        itrans = df["itrans"]
-    
-    y = itrans / i0
-
-    y = y.astype(float)
-    energy = energy.astype(float)
 
-    fit_model = LinearModel()
-    params_linear = fit_model.guess(y[0:n], x=energy[0:n])
-    resultado_fit = fit_model.fit(y[0:n], params_linear, x=energy[0:n])
-    predicted = fit_model.eval(resultado_fit.params, x=energy)
-    pre_edge_norm = y - predicted
+    energy = np.asarray(energy, dtype=float)
+    y = np.asarray(absorption, dtype=float)
 
-    def polynomial(x, a, b, c):  # Polynomial to fit
-        return a * x**2 + b * x + c
+    pre_edge = polynomial_fit(energy[0:n], y[0:n], 1, energy)
+    pre_edge_norm = y - pre_edge
 
     n_data = len(energy)
     start = n_data - int(n_data * polyfit_start)
     end = n_data - int(n_data * polyfit_end)
 
-    params, covariance = curve_fit(polynomial, energy[start:end], pre_edge_norm[start:end])
+    polynomial_values = polynomial_fit(energy[start:end], pre_edge_norm[start:end], 2, energy)
+
+    return {"energy": energy, "norm": pre_edge_norm / polynomial_values, "pre_edge": pre_edge, "post_edge": polynomial_values}
+
+
+@register_strategy("edge_jump", 2, "Divided by the edge jump between the pre-edge and post-edge lines at the derivative-maximum E0.")
+def edge_jump_normalize(energy, absorption, max_points=POST_EDGE_POINTS, n=20):
+    """
+    Normalize an absorption spectrum by its edge jump: the distance, at E0, between the pre-edge
+    line (fitted to the first n points) and the post-edge line (fitted to the flattest end window,
+    see post_edge_window). E0 is the maximum of the derivative of absorption / post-edge line.
+
+    Parameters:
+    energy (ndarray): Energy, one value per point, increasing.
+    absorption (ndarray): Absorption.
+    max_points (int): Largest post-edge window searched. Default is POST_EDGE_POINTS.
+    n (int): Points of the pre-edge fit, and smallest post-edge window. Default is 20.
+
+    Returns:
+    dict: "energy", "norm" (absorption / edge jump), "pre_edge" and "post_edge" (the fitted lines
+    over the whole spectrum), "e0", "edge_jump", "post_edge_start" (npt of the window) and "post_edge_slope".
+    """
+    x = np.asarray(energy, dtype=float)
+    y = np.asarray(absorption, dtype=float)
+
+    pre_edge = polynomial_fit(x[0:n], y[0:n], 1, x)
+    npt, slope = post_edge_window(x, y, n, max_points)
+    post_edge = polynomial_fit(x[npt:-1], y[npt:-1], 1, x)
+
+    local = int(np.argmax(np.diff(y / post_edge) / np.diff(x)))
+    edge_jump = abs(post_edge[local] - pre_edge[local])
+
+    return {
+        "energy": x, "norm": y / edge_jump, "pre_edge": pre_edge, "post_edge": post_edge,
+        "e0": float(x[local]), "edge_jump": float(edge_jump), "post_edge_start": npt, "post_edge_slope": slope,
+    }
+
+
+def normalize_spectrum(spectrum, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Normalize a spectrum with a named strategy, reusing the cached result of the same file content,
+    strategy version and parameters when the spectrum has a digest (see norm_cache).
+
+    Parameters:
+    spectrum (Spectrum): The spectrum.
+    strategy (str): Name of the strategy (see STRATEGIES). Default is DEFAULT_STRATEGY.
+    **params: Parameters of the strategy (the defaults of its function otherwise).
+
+    Raises:
+    ValueError: If the strategy or a parameter is unknown.
+
+    Returns:
+    NormalizedSpectrum: The result.
+    """
+    estrategia = get_strategy(strategy)
+    params = estrategia.params(params)
+    inicio = time.perf_counter()
+    if spectrum.digest is None:
+        valores = estrategia.run(spectrum, params)
+    else:
+        valores = cached_normalization(spectrum.digest, estrategia.name, estrategia.version, params, partial(estrategia.run, spectrum, params))
+    return NormalizedSpectrum(estrategia.name, params, valores, time.perf_counter() - inicio)
 
-    a, b, c = params
 
-    polynomial_values = polynomial(energy, a, b, c)
+def normalize_content(conteudo, ler, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Normalize the spectrum of a file content, reading it only when the result is not cached
+    (a page posted again with other plot options neither parses nor fits the file).
 
-    norm = pre_edge_norm / polynomial_values
+    Parameters:
+    conteudo (bytes): Content of the file.
+    ler (callable): Reader of the content, returning a Spectrum. Ex: text_spectrum.
+    strategy (str): Name of the strategy (see STRATEGIES). Default is DEFAULT_STRATEGY.
+    **params: Parameters of the strategy.
 
-    norm_exafs = norm.reset_index(drop=True)
+    Raises:
+    ValueError: If the strategy or a parameter is unknown.
+
+    Returns:
+    NormalizedSpectrum: The result.
+    """
+    estrategia = get_strategy(strategy)
+    params = estrategia.params(params)
+    inicio = time.perf_counter()
+    valores = cached_normalization(
+        content_hash(conteudo), estrategia.name, estrategia.version, params,
+        lambda: estrategia.run(ler(conteudo), params),
+    )
+    return NormalizedSpectrum(estrategia.name, params, valores, time.perf_counter() - inicio)
 
-    serie_norm = norm_exafs.squeeze()
 
-    norm_df["norm"] = serie_norm
+def normalize(df, n=15, polyfit_start=0.5, polyfit_end=0.01):
+    """
+    Normalize a XANES/EXAFS DataFrame with the polynomial strategy (see polynomial_normalize).
 
+    Parameters:
+    df (DataFrame): DataFrame containing XANES/EXAFS data to be normalized.
+    n (int): Pre-edge range for normalization. Default is 15.
+    polyfit_start (float): Starting point (0 to 1) for polynomial fitting. Default is 0.5.
+    polyfit_end (float): Ending point (0 to 1) for polynomial fitting. Default is 0.01.
+
+    Raises:
+    ValueError: If polyfit_start is not greater than polyfit_end.
+
+    Returns:
+    DataFrame: Normalized DataFrame with added 'norm' column.
+    """
+    norm_df = df.copy()
+    spectrum = Spectrum.from_dataframe(df)
+    norm_df["norm"] = polynomial_normalize(spectrum.energy, spectrum.absorption, n, polyfit_start, polyfit_end)["norm"]
     return norm_df
 
 
-def read_file(file, **kwargs):
+def normalize_cached(df, digest, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Normalize a XANES/EXAFS DataFrame (see Spectrum.from_dataframe), reusing the cached result of the
+    same file content, strategy and parameters (see normalize_spectrum).
+
+    Parameters:
+    df (DataFrame): DataFrame containing XANES/EXAFS data to be normalized.
+    digest (str): Content hash of the file the data was read from (see norm_cache.content_hash).
+    strategy (str): Name of the strategy. Default is DEFAULT_STRATEGY.
+    **params: Parameters of the strategy. Ex: n=15, polyfit_start=0.5, polyfit_end=0.01.
+
+    Returns:
+    DataFrame: Normalized DataFrame with added 'norm' column.
+    """
+    resultado = normalize_spectrum(Spectrum.from_dataframe(df, digest=digest), strategy, **params)
+    norm_df = df.copy()
+    norm_df["norm"] = resultado.norm
+    return norm_df
+
+
+def text_spectrum(conteudo, name=""):
+    """
+    Read a spectrum from a text file of the normalization page: energy and absorption in the first
+    two columns, tab or space separated, with a header line, in any encoding.
+
+    Parameters:
+    conteudo (bytes): Content of the file.
+    name (str): Name of the spectrum.
+
+    Returns:
+    Spectrum: The spectrum (with the digest of the content).
+    """
+    data = conteudo.decode(detect(conteudo)["encoding"])
+    try:
+        df = pd.read_csv(StringIO(data), sep="\t", header=0)
+    except:
+        df = pd.read_csv(StringIO(re.sub(r"\s{2,}", " ", data)), sep=" ", header=0)
+
+    # Exclue as colunas vazias
+    df = df.dropna(axis=1)
+    return Spectrum(df.iloc[:, 0].values, df.iloc[:, 1].values, name=name, digest=content_hash(conteudo))
+
+
+def xdi_dataframe(header, values):
+    """
+    Wrap the data block of a XDI file in a DataFrame named after its columns.
+
+    Parameters:
+    header (dict): XDI header, as returned by parse_xdi.
+    values (ndarray): XDI data block, as returned by parse_xdi.
+
+    Raises:
+    ValueError: If the data block does not match the header columns.
+
+    Returns:
+    DataFrame: XDI data with one column per "Column.N" header entry.
+    """
+    colunas = column_labels(header)
+
+    try:
+        # values is already a contiguous float64 array, so the DataFrame wraps it without copying
+        return pd.DataFrame(values, columns=colunas, copy=False)
+    except:
+        raise ValueError('Dataframe must have ["energy eV", "norm"] as columns')
+
+
+def xdi_spectrum(conteudo, name=""):
+    """
+    Read a spectrum from the content of a XDI file (see Spectrum.from_dataframe).
+
+    Parameters:
+    conteudo (bytes): Content of the file (UTF-8 or Latin-1).
+    name (str): Name of the spectrum.
+
+    Raises:
+    ValueError: If the file has no data.
+    KeyError: If it has no energy, i0 or itrans column.
+
+    Returns:
+    Spectrum: The spectrum (with the header and the digest of the content).
+    """
+    header, values = parse_xdi(decode_text(conteudo))
+    if values is None:
+        raise ValueError("FILE HAS NO DATA.")
+    return Spectrum.from_dataframe(xdi_dataframe(header, values), name=name, header=header, digest=content_hash(conteudo))
+
+
+def read_file(file, save_reference=True, **kwargs):
     """
     Read and normalize data from a XDI file.
 
+    Every call with save_reference rewrites the reference library of the element: use read_files
+    to read many files, which writes each library once.
+
     Parameters:
     file (str): Path to the XDI file to be read.
-    **kwargs: Additional keyword arguments to be passed to the normalize function.
+    save_reference (bool): Whether to add the result to the reference library of its element (see reference_library). Default is True.
+    **kwargs: Strategy and parameters of the normalization (see normalize_cached).
 
     Raises:
     TypeError: If the file is not a .xdi file.
@@ -85,58 +504,165 @@ def read_file(file, **kwargs):
     if not (file.endswith(".xdi")):
         raise TypeError("File must be .xdi")
 
-    with open(file, "r") as fl:
-        header = {}
-        values = []
-        reading_header = True
-        n_columns = 0
-
-        for line in fl:
-            line = line.strip()
-
-            if reading_header:
-                if line.startswith("#"):
-                    partes = line[1:].split(":", 1)
-                    if len(partes) == 2:
-                        chave = partes[0].strip()
-                        valor = partes[1].strip()
-                        if "Column." in line:
-                            n_columns += 1
-                        if "Note" not in line:
-                            header[chave] = valor
-                else:
-                    reading_header = False
-                    continue
-
-            if not reading_header and line:
-                values.append(line.split())
-
-    colunas = []
-    for i in range(n_columns):
-        colunas.append(header[f"Column.{i+1}"])
+    with open(file, "rb") as fl:
+        conteudo = fl.read()
+    header, values = parse_xdi(decode_text(conteudo))
 
-    try:
-        df = pd.DataFrame(values, columns=colunas)
-    except:
-        raise ValueError('Dataframe must have ["energy eV", "norm"] as columns')
-
-    for i in df:
-        for u in range(len(df[i])):
-            df[i][u] = float(df[i][u])
+    df = xdi_dataframe(header, values)
 
     filename = str(file).split("/")[-1]
     element = header['Element.symbol']
 
-    df_norm = normalize(df, **kwargs)
+    df_norm = normalize_cached(df, content_hash(conteudo), **kwargs)
+
+    if save_reference:
+        add_reference(element, os.path.splitext(filename)[0], header, df_norm["energy eV"].to_numpy(), df_norm["norm"].to_numpy())
+
+    return (header, df_norm)
+
+
+def read_files(files, save_reference=True, **kwargs):
+    """
+    Read and normalize many XDI files (see read_file), adding the results to the reference library
+    of each element in a single write (see reference_library.add_references).
 
-    pickle_path = f"./norm_pkl_files/{element}/"
+    Parameters:
+    files (list): Paths to the XDI files to be read.
+    save_reference (bool): Whether to add the results to the reference libraries. Default is True.
+    **kwargs: Strategy and parameters of the normalization (see normalize_cached).
+
+    Raises:
+    TypeError: If a file is not a .xdi file.
+
+    Returns:
+    list: A (header, normalized DataFrame) tuple per file, in the order of files.
+    """
+    resultados = []
+    referencias = defaultdict(dict)
+    for file in files:
+        header, df_norm = read_file(file, save_reference=False, **kwargs)
+        resultados.append((header, df_norm))
+        nome = os.path.splitext(os.path.basename(file))[0]
+        referencias[header['Element.symbol']][nome] = (header, df_norm["energy eV"].to_numpy(), df_norm["norm"].to_numpy())
+
+    if save_reference:
+        for element, novas in referencias.items():
+            add_references(element, novas)
+    return resultados
+
+
+def normalize_xdi(caminho, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Read and normalize one XDI file, without writing to the library (the worker of normalize_batch).
+
+    Parameters:
+    caminho (str): Path of the XDI file.
+    strategy (str): Name of the strategy. Default is DEFAULT_STRATEGY.
+    **params: Parameters of the strategy.
+
+    Returns:
+    tuple: A tuple containing the path, the header (None on failure), the NormalizedSpectrum (None on
+    failure), the time spent in seconds and the error message (None on success).
+    """
+    inicio = time.perf_counter()
+    header = None
     try:
-        os.makedirs(pickle_path, exist_ok=True)
+        with open(caminho, "rb") as fl:
+            spectrum = xdi_spectrum(fl.read(), os.path.splitext(os.path.basename(caminho))[0])
+        header = spectrum.header
+        resultado = normalize_spectrum(spectrum, strategy, **params)
     except Exception as e:
-        print(f"Erro ao criar diretório: {e}")
+        return caminho, header, None, time.perf_counter() - inicio, f"{type(e).__name__}: {e}"
+    return caminho, header, resultado, time.perf_counter() - inicio, None
 
 
-    with open(pickle_path + filename[:-4] + "_norm.pickle", "wb") as handle:
-        pickle.dump((header, df_norm), handle, protocol=pickle.HIGHEST_PROTOCOL)
+def _map(tarefa, itens, workers):
+    if workers == 1 or len(itens) < 2:
+        yield from map(tarefa, itens)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(tarefa, itens, chunksize=max(1, min(16, len(itens) // (4 * (workers or os.cpu_count() or 1)))))
+
+
+def normalize_batch(caminhos, workers=None, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Normalize many XDI files in parallel worker processes.
 
-    return (header, df_norm)
\ No newline at end of file
+    Parameters:
+    caminhos (list): Paths of the XDI files.
+    workers (int): Number of worker processes. Default is the number of CPUs; 1 normalizes in this process.
+    strategy (str): Name of the strategy. Default is DEFAULT_STRATEGY.
+    **params: Parameters of the strategy.
+
+    Returns:
+    generator: One normalize_xdi result per file, in the order of caminhos.
+    """
+    get_strategy(strategy).params(params)
+    yield from _map(partial(normalize_xdi, strategy=strategy, **params), caminhos, workers)
+
+
+def normalize_spectra(spectra, workers=None, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Normalize many spectra already read, in parallel worker processes (see normalize_spectrum).
+
+    Parameters:
+    spectra (list): Spectrum objects.
+    workers (int): Number of worker processes. Default is the number of CPUs; 1 normalizes in this process.
+    strategy (str): Name of the strategy. Default is DEFAULT_STRATEGY.
+    **params: Parameters of the strategy.
+
+    Raises:
+    ValueError: If the strategy or a parameter is unknown, or a spectrum cannot be normalized.
+
+    Returns:
+    generator: One NormalizedSpectrum per spectrum, in the order of spectra.
+    """
+    get_strategy(strategy).params(params)
+    yield from _map(partial(normalize_spectrum, strategy=strategy, **params), spectra, workers)
+
+
+def benchmark_strategies(spectra, strategies=None, references=None):
+    """
+    Time strategies on the same spectra, in this process and without the cache, and measure how far
+    their results are from reference norms, to pick the fastest strategy that is accurate enough.
+
+    Parameters:
+    spectra (list): Spectrum objects.
+    strategies (dict): {strategy name: parameters}. Default is every strategy with its defaults.
+    references (list): Reference (energy, norm) of each spectrum (ex: from the library), or None where
+    unknown; results are compared at the reference energies inside the spectrum.
+
+    Raises:
+    ValueError: If a strategy or a parameter is unknown.
+
+    Returns:
+    dict: {strategy name: {"seconds": total time, "normalized": number of spectra, "failed": number
+    of failures, "max_error": largest |norm - reference| (None without references)}}.
+    """
+    if strategies is None:
+        strategies = {nome: {} for nome in STRATEGIES}
+    if references is None:
+        references = [None] * len(spectra)
+
+    resultados = {}
+    for nome, params in strategies.items():
+        estrategia = get_strategy(nome)
+        params = estrategia.params(params)
+        segundos, falhas, erro_max = 0.0, 0, None
+        for spectrum, referencia in zip(spectra, references):
+            inicio = time.perf_counter()
+            try:
+                valores = estrategia.run(spectrum, params)
+            except Exception:
+                falhas += 1
+                continue
+            finally:
+                segundos += time.perf_counter() - inicio
+            if referencia is not None:
+                energia, norm = referencia
+                dentro = (energia >= valores["energy"][0]) & (energia <= valores["energy"][-1])
+                if dentro.any():
+                    erro = float(np.nanmax(np.abs(np.interp(energia[dentro], valores["energy"], valores["norm"]) - norm[dentro])))
+                    erro_max = erro if erro_max is None else max(erro_max, erro)
+        resultados[nome] = {"seconds": segundos, "normalized": len(spectra) - falhas, "failed": falhas, "max_error": erro_max}
+    return resultados
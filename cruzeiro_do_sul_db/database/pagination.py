@@ -0,0 +1,135 @@
+from django.core import signing
+from django.db.models import Q
+
+# Experiments per page of the lists:
+PAGE_SIZE = 20
+
+_SALT = "database.pagination"
+
+
+class KeysetPage:
+    """
+    One page of a keyset (cursor) pagination.
+
+    Iterating gives the objects of the page; next_url and previous_url are the query strings of the
+    neighbour pages (None at the ends), with the other query parameters (search filters) kept.
+    """
+
+    def __init__(self, object_list, next_url=None, previous_url=None):
+        self.object_list = object_list
+        self.next_url = next_url
+        self.previous_url = previous_url
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_url is not None
+
+    def has_previous(self):
+        return self.previous_url is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_token(direcao, valores):
+    """Opaque page token: the direction ("n" for the next page, "p" for the previous one) and the ordering values it starts after."""
+    return signing.dumps([direcao, valores], salt=_SALT, compress=True)
+
+
+def decode_token(token):
+    """
+    Read a page token.
+
+    Parameters:
+    token (str): Token from encode_token.
+
+    Returns:
+    tuple: The direction and the ordering values, or None when the token is missing, forged or
+    from the old numbered pages ("?page=3").
+    """
+    if not token:
+        return None
+    try:
+        direcao, valores = signing.loads(token, salt=_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if direcao not in ("n", "p") or not isinstance(valores, list):
+        return None
+    return direcao, valores
+
+
+def _after(ordering, valores):
+    """Filter of the rows after the given ordering values: (a, b) > (x, y) is a > x OR (a = x AND b > y)."""
+    filtro = Q()
+    iguais = Q()
+    for campo, valor in zip(ordering, valores):
+        nome = campo.lstrip("-")
+        lookup = "lt" if campo.startswith("-") else "gt"
+        filtro |= iguais & Q(**{f"{nome}__{lookup}": valor})
+        iguais &= Q(**{nome: valor})
+    return filtro
+
+
+def _reverse(ordering):
+    return [campo[1:] if campo.startswith("-") else "-" + campo for campo in ordering]
+
+
+def paginate(request, queryset, ordering=("id",), per_page=PAGE_SIZE, parametro="page"):
+    """
+    Keyset pagination of a queryset: a page is read as "the next per_page rows after the last row
+    of the previous page" on an indexed ordering, without COUNT(*) or OFFSET, so every page costs
+    the same index range scan (page 5000 as page 1) and pages stay stable as rows are added.
+
+    Parameters:
+    request (HttpRequest): Request with the page token in the "page" query parameter.
+    queryset (QuerySet): Rows to paginate.
+    ordering (tuple): Fields of a unique ordering, ending with the primary key. Ex: ("rank", "id").
+    per_page (int): Rows per page.
+    parametro (str): Query parameter of the page token.
+
+    Returns:
+    KeysetPage: The requested page (the first one for a missing or invalid token, or for a stale
+    token whose page has become empty, as when its rows were deleted).
+    """
+    ordering = list(ordering)
+    posicao = decode_token(request.GET.get(parametro))
+    if posicao is not None and len(posicao[1]) != len(ordering):
+        posicao = None
+
+    if posicao is None:
+        linhas = list(queryset.order_by(*ordering)[:per_page + 1])
+        anterior, seguinte = False, len(linhas) > per_page
+        linhas = linhas[:per_page]
+    elif posicao[0] == "n":
+        linhas = list(queryset.filter(_after(ordering, posicao[1])).order_by(*ordering)[:per_page + 1])
+        anterior, seguinte = True, len(linhas) > per_page
+        linhas = linhas[:per_page]
+    else:
+        invertida = _reverse(ordering)
+        linhas = list(queryset.filter(_after(invertida, posicao[1])).order_by(*invertida)[:per_page + 1])
+        anterior, seguinte = len(linhas) > per_page, True
+        linhas = linhas[:per_page][::-1]
+
+    if not linhas and posicao is not None:
+        # Nothing left after (or before) the token: the first page, instead of an empty page without links
+        linhas = list(queryset.order_by(*ordering)[:per_page + 1])
+        anterior, seguinte = False, len(linhas) > per_page
+        linhas = linhas[:per_page]
+
+    def url(direcao, linha):
+        parametros = request.GET.copy()
+        parametros[parametro] = encode_token(direcao, [getattr(linha, campo.lstrip("-")) for campo in ordering])
+        return "?" + parametros.urlencode()
+
+    if not linhas:
+        return KeysetPage(linhas)
+    return KeysetPage(
+        linhas,
+        next_url=url("n", linhas[-1]) if seguinte else None,
+        previous_url=url("p", linhas[0]) if anterior else None,
+    )
@@ -0,0 +1,393 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import numpy as np
+from django.conf import settings
+
+# Reference library layout (one file per absorbing element, <settings.NORM_LIBRARY_DIR>/<element>.lib):
+#   fixed header  -> magic (4s), version (B), number of references (I), index size (I)
+#   index         -> JSON list with one entry per reference ({"name", "edge", "header", "offset", "npts"}),
+#                    padded with spaces to a multiple of 8 bytes
+#   data          -> for each reference, its energy block followed by its norm block (little-endian float64);
+#                    "offset" is the position of the energy block from the start of the data section
+MAGIC = b"CDSL"
+VERSION = 1
+FIXED_HEADER = struct.Struct("<4sBII")
+DTYPE = np.dtype("<f8")
+
+# Reference matrix layout (one file per absorbing element and edge, <settings.NORM_LIBRARY_DIR>/<element>_<edge>.grid):
+#   fixed header  -> magic (4s), version (B), number of references (I), number of grid points (I), index size (I)
+#   index         -> JSON {"names", "emin", "emax"}, padded with spaces to a multiple of 8 bytes
+#   data          -> (references x points) little-endian float64 matrix, row-major: the norm of each
+#                    reference resampled on np.linspace(emin, emax, points), the energy range all of them cover
+GRID_MAGIC = b"CDSG"
+GRID_VERSION = 1
+GRID_HEADER = struct.Struct("<4sBIII")
+GRID_POINTS = 5000
+
+# Open files of this process, reused while the file is not replaced: {path: (file identity, library or matrix)}
+_abertas = {}
+
+
+def library_dir():
+    """Return the folder of the library files (settings.NORM_LIBRARY_DIR, independent of the working directory)."""
+    return os.fspath(settings.NORM_LIBRARY_DIR)
+
+
+def library_path(element, pasta=None):
+    """Return the path of the reference library file of an absorbing element."""
+    return os.path.join(pasta or library_dir(), f"{element}.lib")
+
+
+def matrix_path(element, edge, pasta=None):
+    """Return the path of the reference matrix file of an absorbing element and edge."""
+    return os.path.join(pasta or library_dir(), f"{element}_{edge}.grid")
+
+
+def _open_cached(caminho, classe):
+    estado = os.stat(caminho)
+    identidade = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+    aberta = _abertas.get(caminho)
+    if aberta is None or aberta[0] != identidade:
+        aberta = (identidade, classe(caminho))
+        _abertas[caminho] = aberta
+    return aberta[1]
+
+
+def _write_atomic(caminho, partes):
+    """Write a file through a temporary file in the same folder, replacing the previous one atomically."""
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".part")
+    try:
+        with os.fdopen(descritor, "wb") as fl:
+            for parte in partes:
+                fl.write(parte)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+class ReferenceLibrary:
+    """
+    Read-only view of a reference library file.
+
+    The file is memory-mapped, so the energy and norm arrays are views of the mapped
+    pages: nothing is deserialized and processes reading the same library share its pages.
+    """
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as fl:
+            self.mapa = mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_referencias, tamanho = FIXED_HEADER.unpack_from(self.mapa, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("INVALID REFERENCE LIBRARY.")
+
+        inicio = FIXED_HEADER.size + (-FIXED_HEADER.size % 8)
+        entradas = json.loads(self.mapa[inicio:inicio + tamanho].decode("utf-8"))
+        self.data_offset = inicio + tamanho
+        self.index = {entrada["name"]: entrada for entrada in entradas}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self, edge=None):
+        """Return the reference names, optionally only those measured at an absorption edge."""
+        return [name for name, entrada in self.index.items() if edge is None or entrada["edge"] == edge]
+
+    def header(self, name):
+        """Return the XDI header ({"Family.key": value}) of a reference."""
+        return self.index[name]["header"]
+
+    def spectrum(self, name):
+        """
+        Return the normalized spectrum of a reference.
+
+        Parameters:
+        name (str): Reference name (the XDI file name without extension).
+
+        Returns:
+        tuple: A tuple containing the energy and norm arrays, read-only views of the mapped file.
+        """
+        entrada = self.index[name]
+        npts = entrada["npts"]
+        dados = np.frombuffer(self.mapa, dtype=DTYPE, count=2 * npts, offset=self.data_offset + entrada["offset"])
+        return dados[:npts], dados[npts:]
+
+
+def open_library(element, pasta=None):
+    """
+    Open the reference library of an absorbing element.
+
+    The mapping is kept open and reused by later calls until a writer replaces the file.
+
+    Parameters:
+    element (str): Absorbing element symbol. Ex: "Fe".
+    pasta (str): Folder of the library files. Default is library_dir().
+
+    Raises:
+    FileNotFoundError: If the element has no reference library.
+
+    Returns:
+    ReferenceLibrary: The library of the element.
+    """
+    return _open_cached(library_path(element, pasta), ReferenceLibrary)
+
+
+def library_edges(pasta=None):
+    """
+    List the absorbing elements and edges that have references.
+
+    Parameters:
+    pasta (str): Folder of the library files. Default is library_dir().
+
+    Returns:
+    set: (element, edge) pairs with at least one reference. Ex: {("As", "K"), ("Fe", "K")}.
+    """
+    pares = set()
+    pasta = pasta or library_dir()
+    if not os.path.isdir(pasta):
+        return pares
+    for nome in os.listdir(pasta):
+        if nome.endswith(".lib"):
+            element = nome[:-len(".lib")]
+            pares.update((element, entrada["edge"]) for entrada in open_library(element, pasta).index.values())
+    return pares
+
+
+def write_library(caminho, referencias):
+    """
+    Write a reference library file, replacing the previous one atomically.
+
+    Readers that already mapped the old file keep reading it until they reopen the library.
+
+    Parameters:
+    caminho (str): Path of the library file.
+    referencias (dict): {name: (header, energy, norm)} of every reference to store.
+    """
+    entradas = []
+    blocos = []
+    offset = 0
+    for name, (header, energy, norm) in referencias.items():
+        bloco = np.concatenate((np.asarray(energy, dtype=DTYPE), np.asarray(norm, dtype=DTYPE)))
+        npts = len(bloco) // 2
+        entradas.append({"name": name, "edge": header.get("Element.edge", ""), "header": header, "offset": offset, "npts": npts})
+        blocos.append(bloco)
+        offset += bloco.nbytes
+
+    index = json.dumps(entradas).encode("utf-8")
+    index += b" " * (-len(index) % 8)
+    fixed = FIXED_HEADER.pack(MAGIC, VERSION, len(entradas), len(index))
+    fixed += b"\0" * (-len(fixed) % 8)
+
+    _write_atomic(caminho, [fixed, index] + [bloco.tobytes() for bloco in blocos])
+
+
+def _load_references(caminho):
+    """Read every reference of a library file into memory ({name: (header, energy, norm)})."""
+    if not os.path.exists(caminho):
+        return {}
+    biblioteca = ReferenceLibrary(caminho)
+    referencias = {}
+    for name in biblioteca:
+        energy, norm = biblioteca.spectrum(name)
+        referencias[name] = (biblioteca.header(name), energy.copy(), norm.copy())
+    return referencias
+
+
+class ReferenceMatrix:
+    """
+    Read-only view of a reference matrix file: every reference of an element and edge
+    already resampled on one common energy grid.
+    """
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as fl:
+            self.mapa = mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_referencias, n_pontos, tamanho = GRID_HEADER.unpack_from(self.mapa, 0)
+        if magic != GRID_MAGIC or version != GRID_VERSION:
+            raise ValueError("INVALID REFERENCE MATRIX.")
+
+        inicio = GRID_HEADER.size + (-GRID_HEADER.size % 8)
+        index = json.loads(self.mapa[inicio:inicio + tamanho].decode("utf-8"))
+        self.names = index["names"]
+        self.emin = index["emin"]
+        self.emax = index["emax"]
+        self.domain = np.linspace(self.emin, self.emax, num=n_pontos)
+        # (references x points) view of the mapped file
+        self.matrix = np.frombuffer(self.mapa, dtype=DTYPE, count=n_referencias * n_pontos,
+                                    offset=inicio + tamanho).reshape(n_referencias, n_pontos)
+
+    def __len__(self):
+        return len(self.names)
+
+    def row(self, name):
+        """Return the resampled norm of a reference (a row view of the matrix)."""
+        return self.matrix[self.names.index(name)]
+
+
+def open_matrix(element, edge, pasta=None):
+    """
+    Open the reference matrix of an absorbing element and edge.
+
+    The mapping is kept open and reused by later calls until a writer replaces the file.
+    A missing matrix is built from the library on first use.
+
+    Parameters:
+    element (str): Absorbing element symbol. Ex: "Fe".
+    edge (str): Absorption edge. Ex: "K".
+    pasta (str): Folder of the library files. Default is library_dir().
+
+    Raises:
+    FileNotFoundError: If the element has no reference for that edge.
+
+    Returns:
+    ReferenceMatrix: The reference matrix of the element and edge.
+    """
+    caminho = matrix_path(element, edge, pasta)
+    if not os.path.exists(caminho):
+        update_matrix(element, edge, pasta=pasta)
+    return _open_cached(caminho, ReferenceMatrix)
+
+
+def update_matrix(element, edge, changed=(), pasta=None, n_points=GRID_POINTS):
+    """
+    Bring the reference matrix of an element and edge up to date with its library.
+
+    The grid spans the energy range covered by every reference of the edge. While that range
+    does not change, the rows of the references already in the matrix are kept and only new
+    or changed references are resampled; otherwise the whole matrix is resampled.
+
+    Parameters:
+    element (str): Absorbing element symbol. Ex: "Fe".
+    edge (str): Absorption edge. Ex: "K".
+    changed (iterable): Names of references whose spectrum was replaced since the last update.
+    pasta (str): Folder of the library files. Default is library_dir().
+    n_points (int): Number of grid points. Default is GRID_POINTS.
+    """
+    caminho = matrix_path(element, edge, pasta)
+    biblioteca = ReferenceLibrary(library_path(element, pasta)) if os.path.exists(library_path(element, pasta)) else None
+    names = biblioteca.names(edge) if biblioteca is not None else []
+    if not names:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        return
+
+    espectros = {name: biblioteca.spectrum(name) for name in names}
+    emin = float(max(energy.min() for energy, _ in espectros.values()))
+    emax = float(min(energy.max() for energy, _ in espectros.values()))
+
+    anteriores = {}
+    if os.path.exists(caminho):
+        anterior = ReferenceMatrix(caminho)
+        if (anterior.emin, anterior.emax, len(anterior.domain)) == (emin, emax, n_points):
+            anteriores = dict(zip(anterior.names, anterior.matrix))
+    for name in changed:
+        anteriores.pop(name, None)
+
+    domain = np.linspace(emin, emax, num=n_points)
+    matriz = np.empty((len(names), n_points), dtype=DTYPE)
+    for i, name in enumerate(names):
+        if name in anteriores:
+            matriz[i] = anteriores[name]
+        else:
+            energy, norm = espectros[name]
+            matriz[i] = np.interp(domain, energy, norm)
+
+    index = json.dumps({"names": names, "emin": emin, "emax": emax}).encode("utf-8")
+    index += b" " * (-len(index) % 8)
+    fixed = GRID_HEADER.pack(GRID_MAGIC, GRID_VERSION, len(names), n_points, len(index))
+    fixed += b"\0" * (-len(fixed) % 8)
+    _write_atomic(caminho, [fixed, index, matriz.tobytes()])
+
+
+def rebuild_matrices(element, pasta=None):
+    """Resample the reference matrices of every edge in the library of an element from scratch."""
+    biblioteca = ReferenceLibrary(library_path(element, pasta))
+    edges = {biblioteca.index[name]["edge"] for name in biblioteca}
+    for edge in sorted(edges):
+        caminho = matrix_path(element, edge, pasta)
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        update_matrix(element, edge, pasta=pasta)
+
+
+def add_reference(element, name, header, energy, norm, pasta=None):
+    """
+    Add a normalized spectrum to the reference library of its absorbing element.
+
+    A reference with the same name is replaced. The reference matrix of its edge is
+    updated too. Only one process should write a given library at a time.
+
+    Parameters:
+    element (str): Absorbing element symbol. Ex: "Fe".
+    name (str): Reference name (the XDI file name without extension).
+    header (dict): XDI header of the reference ({"Family.key": value}).
+    energy (array): Energy values (eV).
+    norm (array): Normalized absorption, one value per energy.
+
+    Raises:
+    ValueError: If energy and norm do not have the same length.
+    """
+    if len(energy) != len(norm):
+        raise ValueError("ENERGY AND NORM MUST HAVE THE SAME LENGTH.")
+    caminho = library_path(element, pasta)
+    referencias = _load_references(caminho)
+    anterior = referencias.get(name)
+    referencias[name] = (header, energy, norm)
+    write_library(caminho, referencias)
+
+    edge = header.get("Element.edge", "")
+    update_matrix(element, edge, changed=[name], pasta=pasta)
+    if anterior is not None and anterior[0].get("Element.edge", "") != edge:
+        update_matrix(element, anterior[0].get("Element.edge", ""), pasta=pasta)
+
+
+def add_references(element, referencias, pasta=None):
+    """
+    Add many normalized spectra to the reference library of their absorbing element, writing the
+    library and resampling its edge matrices once (see add_reference for a single spectrum).
+
+    Parameters:
+    element (str): Absorbing element symbol. Ex: "Fe".
+    referencias (dict): {name: (header, energy, norm)}; references with the same names are replaced.
+    pasta (str): Folder of the library files. Default is library_dir().
+
+    Raises:
+    ValueError: If the energy and norm of a reference do not have the same length.
+
+    Returns:
+    int: Number of references in the library.
+    """
+    for name, (header, energy, norm) in referencias.items():
+        if len(energy) != len(norm):
+            raise ValueError(f"ENERGY AND NORM OF {name} MUST HAVE THE SAME LENGTH.")
+    caminho = library_path(element, pasta)
+    todas = _load_references(caminho)
+    todas.update(referencias)
+    write_library(caminho, todas)
+    rebuild_matrices(element, pasta)
+    return len(todas)
+
+
+def remove_reference(element, name, pasta=None):
+    """Remove a reference from the library of its absorbing element (and from its edge matrix); returns whether it was there."""
+    caminho = library_path(element, pasta)
+    referencias = _load_references(caminho)
+    anterior = referencias.pop(name, None)
+    if anterior is None:
+        return False
+    write_library(caminho, referencias)
+    update_matrix(element, anterior[0].get("Element.edge", ""), pasta=pasta)
+    return True
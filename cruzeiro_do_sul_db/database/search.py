@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta, timezone
+from django.db.models import Q
+from .formula import composition_key
+from .composition import contains_elements, stoichiometry_filter
+
+
+def parse_date(valor):
+    """Read a date or date-time query parameter ("2016-07-05", "2016-07-05T18:00") as UTC."""
+    instante = datetime.fromisoformat(valor)
+    if instante.tzinfo is None:
+        return instante.replace(tzinfo=timezone.utc)
+    return instante
+
+
+def date_upper_bound(valor):
+    """
+    Read the upper bound of a date range parameter.
+
+    A date without time ("2016-07-05") covers the whole day: the bound is the start of the next
+    day, excluded. A date-time ("2016-07-05T18:00") is an included bound.
+
+    Parameters:
+    valor (str): Query parameter value.
+
+    Returns:
+    tuple: A tuple containing the lookup ("lt" or "lte") and the bound (UTC).
+    """
+    try:
+        dia = date.fromisoformat(valor)
+    except ValueError:
+        return "lte", parse_date(valor)
+    return "lt", datetime.combine(dia + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+
+
+# Range filters of the search page: query parameter prefix, Experiment field and conversion of the
+# parameter value. "<prefix>_min" and "<prefix>_max" bound the field (inclusive), blank bounds are ignored;
+# a date-only "_max" of a date field includes the whole day (see date_upper_bound).
+RANGE_FILTERS = (
+    ("temperature",  "sample_temperature", float),   # K
+    ("e0",           "e0",                 float),   # eV
+    ("d_spacing",    "mono_d_spacing",     float),   # Angstrom
+    ("ring_current", "ring_current",       float),   # mA
+    ("start_time",   "scan_start_time",    parse_date),
+)
+
+
+def range_filter(params):
+    """
+    Build the range filters requested in the search query parameters.
+
+    Parameters:
+    params (QueryDict): Search query parameters. Ex: {"temperature_min": "5", "temperature_max": "120"}.
+
+    Raises:
+    ValueError: If a bound is not a valid number or date.
+
+    Returns:
+    Q: The combined filter (empty when no bound was given).
+    """
+    filtro = Q()
+    for prefixo, campo, conversor in RANGE_FILTERS:
+        for sufixo, lookup in (("_min", "gte"), ("_max", "lte")):
+            valor = params.get(prefixo + sufixo, "").strip()
+            if valor:
+                try:
+                    if sufixo == "_max" and conversor is parse_date:
+                        lookup, limite = date_upper_bound(valor)
+                    else:
+                        limite = conversor(valor)
+                    filtro &= Q(**{f"{campo}__{lookup}": limite})
+                except ValueError:
+                    raise ValueError(f"INVALID VALUE FOR {(prefixo + sufixo).upper()}: {valor}")
+    return filtro
+
+
+def prefix_filter(campo, prefixo):
+    """
+    Match the values of a text field that start with a prefix, as an index range.
+
+    "LIKE 'prefix%'" only uses an index under some collations, and "istartswith" never does; the
+    equivalent range prefix <= value < next prefix ("L" <= edge < "M") is always an index range scan.
+
+    Parameters:
+    campo (str): Experiment field. Ex: "element_edge".
+    prefixo (str): Prefix, with the case of the stored values. Ex: "L".
+
+    Returns:
+    Q: The filter (empty when the prefix is empty).
+    """
+    if not prefixo:
+        return Q()
+    seguinte = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return Q(**{f"{campo}__gte": prefixo, f"{campo}__lt": seguinte})
+
+
+def search_experiments(params):
+    """
+    Build the filter of the search page from its query parameters.
+
+    Every filter is an equality or a prefix range on an indexed column, so the query is answered from
+    the composite indexes of Experiment and Composition (no "LIKE '%...%'" scan):
+    - absorbing_element: exact absorbing element symbol, in any case ("fe" is "Fe").
+    - edge: edge prefix, in any case ("L" matches L1, L2 and L3; "L3" only L3). "Any" or blank: every edge.
+    - data_type: exact experiment type ("1", "2", "3"). "Any" or blank: every type.
+    - composition: elements the sample contains, separated by spaces or commas ("Fe O" matches FeO,
+      Fe2O3 and FeOOH, but not FeS). With composition_exact, the sample has no other element (not FeOOH).
+    - stoichiometry: exact composition of the sample ("Fe2O3" matches Fe2O3 and O3Fe2, but not Fe3O4).
+    - formula: sample formula prefix, case-sensitive as chemical formulas are ("Fe2" matches Fe2O3).
+    - The range filters in RANGE_FILTERS.
+
+    Parameters:
+    params (QueryDict): Search query parameters.
+
+    Raises:
+    ValueError: If a range bound is not a valid number or date, or the stoichiometry is not a formula.
+
+    Returns:
+    Q: The combined filter.
+    """
+    filtro = Q()
+    simbolo = params.get("absorbing_element", "").strip().capitalize()
+    if simbolo:
+        filtro &= Q(element_symbol=simbolo)
+    edge = params.get("edge", "").strip().upper()
+    if edge and edge != "ANY":
+        filtro &= prefix_filter("element_edge", edge)
+    tipo = params.get("data_type", "").strip()
+    if tipo and tipo != "Any":
+        filtro &= Q(experiment_type=tipo)
+    elementos = params.get("composition", "").replace(",", " ").split()
+    if elementos and params.get("composition_exact"):
+        filtro &= Q(sample_elements=composition_key(elementos))
+    elif elementos:
+        filtro &= contains_elements(elementos)
+    estequiometria = params.get("stoichiometry", "").strip()
+    if estequiometria:
+        filtro &= stoichiometry_filter(estequiometria)
+    filtro &= prefix_filter("sample_formula", params.get("formula", "").strip())
+    return filtro & range_filter(params)
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .composition import save_compositions
+from .fulltext import create_fulltext_index, index_experiments, unindex_experiments
+from .models import Beamline, Experiment, Facility, User
+from .stats import add_statistics, experiment_type_key, experiments_added
+
+
+def experiments_saved(experiments, using="default"):
+    """
+    Update the search indexes (full-text words and parsed composition) of saved experiments.
+
+    Called for each saved experiment by post_save, and by the bulk loaders, since
+    bulk_create and bulk_update do not send it.
+
+    Parameters:
+    experiments (list): Saved experiments (with id).
+    using (str): Database alias.
+    """
+    index_experiments(experiments, using)
+    save_compositions(experiments, using)
+
+
+@receiver(post_save, sender=Experiment)
+def index_saved_experiment(sender, instance, using, **kwargs):
+    experiments_saved([instance], using)
+
+
+@receiver(post_delete, sender=Experiment)
+def unindex_deleted_experiment(sender, instance, using, **kwargs):
+    unindex_experiments([instance.id], using)
+
+
+@receiver(pre_save, sender=Experiment)
+def remember_experiment_type(sender, instance, using, **kwargs):
+    """Keep the stored type of an edited experiment, to move it between the home-page counts."""
+    instance._tipo_salvo = None
+    if instance.pk is not None and not instance._state.adding:
+        instance._tipo_salvo = Experiment.objects.using(using).filter(pk=instance.pk).values_list('experiment_type', flat=True).first()
+
+
+@receiver(post_save, sender=Experiment)
+def count_saved_experiment(sender, instance, created, using, **kwargs):
+    if created:
+        experiments_added([instance], 1, using)
+    elif getattr(instance, '_tipo_salvo', None) not in (None, instance.experiment_type):
+        add_statistics({experiment_type_key(instance._tipo_salvo): -1, experiment_type_key(instance.experiment_type): 1}, using)
+
+
+@receiver(post_delete, sender=Experiment)
+def count_deleted_experiment(sender, instance, using, **kwargs):
+    experiments_added([instance], -1, using)
+
+
+# Home-page counts of the other models:
+CONTADOS = {User: 'users', Beamline: 'beamlines', Facility: 'facilities'}
+
+
+@receiver(post_save)
+def count_saved_object(sender, created, using, **kwargs):
+    if created and sender in CONTADOS:
+        add_statistics({CONTADOS[sender]: 1}, using)
+
+
+@receiver(post_delete)
+def count_deleted_object(sender, using, **kwargs):
+    if sender in CONTADOS:
+        add_statistics({CONTADOS[sender]: -1}, using)
+
+
+def create_search_tables(sender, using="default", **kwargs):
+    """Create the tables Django does not manage (the full-text index) after "migrate"."""
+    create_fulltext_index(using)
@@ -0,0 +1,97 @@
+import json
+import struct
+import numpy as np
+
+# Packed spectrum layout:
+#   fixed header  -> magic (4s), version (B), dtype code (c), number of columns (H), number of points (I), metadata size (I)
+#   metadata      -> JSON with the column names and units, padded with spaces to a multiple of 8 bytes
+#   data          -> one contiguous block per column (column-major), little-endian float64 or float32
+MAGIC = b"CDSS"
+VERSION = 1
+FIXED_HEADER = struct.Struct("<4sBcHII")
+DTYPES = {
+    b"d": np.dtype("<f8"),
+    b"f": np.dtype("<f4"),
+}
+
+
+def split_label(label):
+    """
+    Split a XDI column label into name and unit.
+
+    Parameters:
+    label (str): Column label as written in the XDI header. Ex: "energy eV".
+
+    Returns:
+    tuple: A tuple containing the column name and its unit ("" when not informed).
+    """
+    partes = label.split(None, 1)
+    if not partes:
+        return "", ""
+    if len(partes) == 1:
+        return partes[0], ""
+    return partes[0], partes[1]
+
+
+def pack_spectrum(data, labels, dtype=np.float64):
+    """
+    Pack a spectrum table into the compact binary representation stored in Experiment.spectrum.
+
+    Parameters:
+    data (ndarray): 2-D array with one column per XDI column (as returned by parse_xdi).
+    labels (list): XDI column labels ("energy eV", "i0", ...), one per column.
+    dtype (dtype): Storage precision, np.float64 or np.float32. Default is np.float64.
+
+    Raises:
+    ValueError: If the number of labels does not match the number of columns or dtype is not supported.
+
+    Returns:
+    bytes: Packed spectrum.
+    """
+    data = np.asarray(data)
+    if data.ndim != 2 or data.shape[1] != len(labels):
+        raise ValueError("THE NUMBER OF LABELS MUST MATCH THE NUMBER OF COLUMNS.")
+
+    dtype = np.dtype(dtype).newbyteorder("<")
+    codigos = {valor: codigo for codigo, valor in DTYPES.items()}
+    if dtype not in codigos:
+        raise ValueError("SPECTRUM DTYPE MUST BE FLOAT64 OR FLOAT32.")
+
+    nomes, unidades = zip(*(split_label(label) for label in labels)) if labels else ((), ())
+    metadata = json.dumps({"names": list(nomes), "units": list(unidades)}).encode("utf-8")
+    metadata += b" " * (-len(metadata) % 8)
+
+    n_points, n_columns = data.shape
+    fixed = FIXED_HEADER.pack(MAGIC, VERSION, codigos[dtype], n_columns, n_points, len(metadata))
+    fixed += b"\0" * (-len(fixed) % 8)
+    # Transposed copy so that each column is one contiguous block
+    blocos = np.ascontiguousarray(data.T, dtype=dtype)
+
+    return fixed + metadata + blocos.tobytes()
+
+
+def unpack_spectrum(blob):
+    """
+    Read a packed spectrum without copying its data.
+
+    Parameters:
+    blob (bytes or memoryview): Packed spectrum as created by pack_spectrum.
+
+    Raises:
+    ValueError: If blob is not a packed spectrum.
+
+    Returns:
+    tuple: A tuple containing the column names, the column units and a read-only
+    (n_columns, n_points) array whose rows are views into blob.
+    """
+    magic, version, codigo, n_columns, n_points, tamanho = FIXED_HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or version != VERSION or codigo not in DTYPES:
+        raise ValueError("INVALID PACKED SPECTRUM.")
+
+    inicio = FIXED_HEADER.size + (-FIXED_HEADER.size % 8)
+    metadata = json.loads(bytes(blob[inicio:inicio + tamanho]).decode("utf-8"))
+    dados = np.frombuffer(blob, dtype=DTYPES[codigo], count=n_columns * n_points, offset=inicio + tamanho)
+    # Also read-only when blob is a writable buffer (bytearray, memoryview)
+    dados.flags.writeable = False
+
+    return metadata["names"], metadata["units"], dados.reshape(n_columns, n_points)
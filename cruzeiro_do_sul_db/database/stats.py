@@ -0,0 +1,96 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F
+from .models import Beamline, Experiment, Facility, Statistic, User
+
+# Experiment types counted on the home page (see the index.html badges):
+EXPERIMENT_TYPES = ("1", "2", "3", "4", "5", "6", "7")
+
+
+def experiment_type_key(tipo):
+    """Statistic name of the experiments of a type ("1" is "experiments_1")."""
+    return f"experiments_{tipo}"
+
+
+def rebuild_statistics(using="default"):
+    """
+    Recount every home-page statistic: one GROUP BY on the experiment types and one count per other model.
+
+    The counts and the writes are done in one transaction, and the statistics are upserted instead of
+    deleted and created again: the table is never empty for concurrent readers, and concurrent rebuilds
+    (ex: the first visits of the home page) do not conflict on the statistic names.
+
+    Parameters:
+    using (str): Database alias.
+
+    Returns:
+    dict: {statistic name: value}.
+    """
+    with transaction.atomic(using=using):
+        valores = {"experiments": 0, **{experiment_type_key(tipo): 0 for tipo in EXPERIMENT_TYPES}}
+        for tipo, total in Experiment.objects.using(using).values_list("experiment_type").annotate(total=Count("id")).order_by():
+            valores[experiment_type_key(tipo)] = total
+            valores["experiments"] += total
+        valores["beamlines"] = Beamline.objects.using(using).count()
+        valores["facilities"] = Facility.objects.using(using).count()
+        valores["users"] = User.objects.using(using).count()
+
+        Statistic.objects.using(using).bulk_create(
+            [Statistic(name=nome, value=valor) for nome, valor in valores.items()],
+            update_conflicts=True, unique_fields=["name"], update_fields=["value"],
+        )
+        # Statistics no longer counted (ex: experiment types removed from EXPERIMENT_TYPES)
+        Statistic.objects.using(using).exclude(name__in=valores).delete()
+    return valores
+
+
+def read_statistics(using="default"):
+    """
+    Read every home-page statistic with one query (they are recounted the first time).
+
+    Parameters:
+    using (str): Database alias.
+
+    Returns:
+    dict: {statistic name: value}.
+    """
+    valores = dict(Statistic.objects.using(using).values_list("name", "value"))
+    if not valores:
+        valores = rebuild_statistics(using)
+    return valores
+
+
+def add_statistics(variacoes, using="default"):
+    """
+    Add to home-page statistics, atomically (concurrent requests do not lose updates).
+
+    Statistics never counted are left to the first read, which recounts them all.
+
+    Parameters:
+    variacoes (dict): {statistic name: value added (negative to subtract)}.
+    using (str): Database alias.
+    """
+    variacoes = {nome: valor for nome, valor in variacoes.items() if valor}
+    if not variacoes or not Statistic.objects.using(using).exists():
+        return
+    with transaction.atomic(using=using):
+        for nome, valor in variacoes.items():
+            if not Statistic.objects.using(using).filter(name=nome).update(value=F("value") + valor):
+                Statistic.objects.using(using).create(name=nome, value=max(valor, 0))
+
+
+def experiments_added(experiments, sinal=1, using="default"):
+    """
+    Count experiments created (sinal=1) or deleted (sinal=-1) in the home-page statistics.
+
+    Called by the Experiment signals, and by the bulk loaders, since bulk_create does not send them.
+
+    Parameters:
+    experiments (iterable): The experiments.
+    sinal (int): 1 for created experiments, -1 for deleted ones.
+    using (str): Database alias.
+    """
+    tipos = Counter(experiment.experiment_type for experiment in experiments)
+    variacoes = {experiment_type_key(tipo): sinal * total for tipo, total in tipos.items()}
+    variacoes["experiments"] = sinal * sum(tipos.values())
+    add_statistics(variacoes, using)
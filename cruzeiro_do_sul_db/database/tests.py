@@ -1,3 +1,857 @@
-from django.test import TestCase
+import glob
+import hashlib
+import io
+import os
+import pickle
+import tarfile
+import tempfile
+import zipfile
+from unittest import mock
+from datetime import datetime, timezone
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.management import call_command
+from django.db.models import Q
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .content_store import save_content_addressed
+from .composition import save_compositions, contains_elements, stoichiometry_filter
+from .formula import parse_formula, composition_key
+from .edges import GENERIC_EDGES, edge_energy, edges_between
+from .fulltext import fulltext_available, fulltext_search
+from .models import Composition, Experiment, Statistic
+from .norm_cache import cache_dir, cache_key, cached_normalization, read_cached, write_cached
+from .normalization import STRATEGIES, Spectrum, benchmark_strategies, get_strategy, normalize, polynomial_fit, post_edge_window, read_files, xdi_dataframe
+from .pagination import encode_token, paginate
+from .reference_library import add_reference, add_references, library_dir, library_edges, open_library, open_matrix, remove_reference
+from .search import prefix_filter, range_filter, search_experiments
+from .identification import identify_edges, identify_spectrum
+from .ingest import PARSED_FIELDS, experiment_from_xdi, identify_absorber, xdi_metadata
+from .views import comparison_absorber, handle_uploaded_archive, handle_uploaded_file_xdi
+from .stats import read_statistics, rebuild_statistics
+from .spectrum import pack_spectrum, split_label, unpack_spectrum
+from .xdi_parser import TextDecoder, XDIStreamParser, column_labels, decode_text, parse_xdi
 
-# Create your tests here.
+# Reference spectra normalized by the previous (lmfit/curve_fit) implementation:
+NORM_PKL_DIR = os.path.join(settings.BASE_DIR, "norm_pkl_files")
+
+
+class NormalizeTests(SimpleTestCase):
+
+    def test_polynomial_fit_is_exact_for_polynomials(self):
+        x = np.linspace(7000.0, 7500.0, 50)
+        y = 3e-6 * x**2 - 0.04 * x + 120.0
+        np.testing.assert_allclose(polynomial_fit(x, y, 2), y, rtol=1e-9)
+
+    def test_polynomial_fit_needs_enough_points(self):
+        with self.assertRaises(ValueError):
+            polynomial_fit([1.0, 2.0], [1.0, 2.0], 2)
+
+    def test_matches_reference_pickles(self):
+        pickles = sorted(glob.glob(os.path.join(NORM_PKL_DIR, "*", "*_norm.pickle")))
+        if not pickles:
+            self.skipTest("no reference pickles in norm_pkl_files")
+        for caminho in pickles:
+            with self.subTest(pickle=os.path.basename(caminho)):
+                with open(caminho, "rb") as fl:
+                    header, df = pickle.load(fl)
+                norm = normalize(df.drop(columns="norm"))["norm"].to_numpy(dtype=float)
+                np.testing.assert_allclose(norm, df["norm"].to_numpy(dtype=float), rtol=0, atol=1e-5)
+
+
+class StrategyTests(SimpleTestCase):
+
+    def step_spectrum(self, name=""):
+        energia = np.linspace(6900.0, 7600.0, 300)
+        return Spectrum(energia, 0.2 + 1e-5 * (energia - 6900.0) + 1.0 / (1.0 + np.exp(-(energia - 7112.0) / 2.0)), name)
+
+    def test_registry(self):
+        self.assertLessEqual({"polynomial", "edge_jump"}, set(STRATEGIES))
+        estrategia = get_strategy("polynomial")
+        self.assertIs(estrategia, STRATEGIES["polynomial"])
+        self.assertEqual(estrategia.defaults, {"n": 15, "polyfit_start": 0.5, "polyfit_end": 0.01})
+        with self.assertRaises(ValueError):
+            get_strategy("spline")
+
+    def test_params(self):
+        estrategia = get_strategy("polynomial")
+        self.assertEqual(estrategia.params({"n": 10}), {"n": 10, "polyfit_start": 0.5, "polyfit_end": 0.01})
+        with self.assertRaisesMessage(ValueError, "UNKNOWN PARAMETERS FOR THE POLYNOMIAL STRATEGY: degree."):
+            estrategia.params({"n": 10, "degree": 3})
+
+    def test_benchmark(self):
+        spectra = [self.step_spectrum("a"), self.step_spectrum("b"), Spectrum([7000.0, 7001.0], [0.1, 0.2], "curto")]
+        valores = get_strategy("edge_jump").run(spectra[0], get_strategy("edge_jump").params({}))
+        references = [(valores["energy"], valores["norm"]), None, None]
+        resultados = benchmark_strategies(spectra, references=references)
+        self.assertEqual(set(resultados), set(STRATEGIES))
+        for nome, resultado in resultados.items():
+            with self.subTest(strategy=nome):
+                self.assertEqual((resultado["normalized"], resultado["failed"]), (2, 1))
+                self.assertGreaterEqual(resultado["seconds"], 0.0)
+                self.assertIsNotNone(resultado["max_error"])
+        self.assertAlmostEqual(resultados["edge_jump"]["max_error"], 0.0)
+        # Without references there is no error, and unknown strategies or parameters are rejected
+        self.assertIsNone(benchmark_strategies(spectra[:1], {"polynomial": {"n": 10}})["polynomial"]["max_error"])
+        with self.assertRaises(ValueError):
+            benchmark_strategies(spectra[:1], {"polynomial": {"degree": 3}})
+        with self.assertRaises(ValueError):
+            benchmark_strategies(spectra[:1], {"spline": {}})
+
+
+class XDIParserTests(SimpleTestCase):
+
+    XDI = (
+        "# XDI/1.0 GSE/1.0\n"
+        "# Column.1: energy eV\n"
+        "# Column.2: i0\n"
+        "# Element.symbol: Fe\n"
+        "# Scan.edge_energy: 7112.0\n"
+        "# ///\n"
+        "# Sample prepared as pellet: not a field\n"
+        "#----\n"
+        "# energy i0\n"
+        "7100.0 1.5\n"
+        "7101.0 1.6\n"
+        "7102.0 1.7\n"
+    )
+    HEADER = {"Column.1": "energy eV", "Column.2": "i0", "Element.symbol": "Fe", "Scan.edge_energy": "7112.0"}
+    TABELA = [[7100.0, 1.5], [7101.0, 1.6], [7102.0, 1.7]]
+
+    def assert_parsed(self, header, tabela):
+        self.assertEqual(header, self.HEADER)
+        np.testing.assert_array_equal(tabela, self.TABELA)
+
+    def test_header_terminators(self):
+        # "# ///" ends the fields (the free comment after it is not read), "#----" the header
+        self.assert_parsed(*parse_xdi(self.XDI))
+        sem_comentario = self.XDI.replace("# ///\n# Sample prepared as pellet: not a field\n", "")
+        self.assert_parsed(*parse_xdi(sem_comentario))
+        # Without "#----" the first numeric line still starts the data
+        self.assert_parsed(*parse_xdi(self.XDI.replace("#----\n", "")))
+
+    def test_chunk_boundaries_inside_lines(self):
+        for tamanho in (1, 2, 3, 7, 16, 50):
+            with self.subTest(tamanho=tamanho):
+                parser = XDIStreamParser()
+                for inicio in range(0, len(self.XDI), tamanho):
+                    parser.feed(self.XDI[inicio:inicio + tamanho])
+                self.assert_parsed(*parser.close())
+
+    def test_data_start(self):
+        # Column labels without "#", blank lines and no trailing newline
+        texto = self.XDI.replace("# energy i0\n", "energy i0\n\n").rstrip("\n")
+        self.assert_parsed(*parse_xdi(texto))
+        self.assert_parsed(*parse_xdi(io.StringIO(texto)))
+        self.assert_parsed(*parse_xdi(texto.splitlines()))
+        header, tabela = parse_xdi(self.XDI.split("7100.0")[0])
+        self.assertEqual(header, self.HEADER)
+        self.assertIsNone(tabela)
+
+    def test_inconsistent_columns(self):
+        with self.assertRaises(ValueError):
+            parse_xdi(self.XDI + "7103.0 1.8 0.1\n")
+
+    def test_latin1_fallback(self):
+        texto = self.XDI.replace("pellet", "pastilha de alumínio")
+        for encoding in ("utf-8", "latin-1"):
+            conteudo = texto.encode(encoding)
+            self.assertEqual(decode_text(conteudo), texto)
+            for tamanho in (1, 5, len(conteudo)):
+                with self.subTest(encoding=encoding, tamanho=tamanho):
+                    decoder = TextDecoder()
+                    partes = [decoder.decode(conteudo[i:i + tamanho]) for i in range(0, len(conteudo), tamanho)]
+                    partes.append(decoder.decode(b"", final=True))
+                    self.assertEqual("".join(partes), texto)
+
+    def test_latin1_upload(self):
+        with tempfile.TemporaryDirectory() as pasta, override_settings(MEDIA_ROOT=pasta):
+            caminho = os.path.join(settings.BASE_DIR, "XDI_files", "Pb", "Pb_Foil_L1_rt_2016Foils.xdi_normalizado.xdi")
+            with open(caminho, "rb") as fl:
+                conteudo = fl.read()
+            name, digest, existente, header, tabela = save_content_addressed(ContentFile(conteudo, name="Pb.xdi"), "XDIs/")
+            self.assertFalse(existente)
+            self.assertEqual(tabela.shape[1], 2)
+            with open(os.path.join(pasta, name), "rb") as fl:
+                self.assertEqual(fl.read(), conteudo)
+
+
+class PackedSpectrumTests(SimpleTestCase):
+
+    LABELS = ["energy eV", "i0", "itrans counts per second"]
+
+    def setUp(self):
+        self.dados = np.random.default_rng(0).normal(size=(37, 3)) + [7000.0, 0.0, 0.0]
+
+    def test_round_trip(self):
+        for dtype in (np.float64, np.float32):
+            with self.subTest(dtype=dtype):
+                nomes, unidades, blocos = unpack_spectrum(pack_spectrum(self.dados, self.LABELS, dtype))
+                self.assertEqual(nomes, ["energy", "i0", "itrans"])
+                self.assertEqual(unidades, ["eV", "", "counts per second"])
+                self.assertEqual(blocos.dtype, np.dtype(dtype))
+                self.assertEqual(blocos.shape, (3, 37))
+                np.testing.assert_array_equal(blocos, self.dados.T.astype(dtype))
+
+    def test_read_only_view(self):
+        blob = pack_spectrum(self.dados, self.LABELS)
+        _, _, blocos = unpack_spectrum(blob)
+        self.assertFalse(blocos.flags.writeable)
+        with self.assertRaises(ValueError):
+            blocos[0, 0] = 0.0
+        # Rows are contiguous views into the blob, not copies
+        self.assertTrue(np.shares_memory(blocos, np.frombuffer(blob, dtype=np.uint8)))
+        self.assertTrue(blocos[1].flags.c_contiguous)
+        _, _, de_bytearray = unpack_spectrum(memoryview(bytearray(blob)))
+        self.assertFalse(de_bytearray.flags.writeable)
+        np.testing.assert_array_equal(de_bytearray, blocos)
+
+    def test_split_label(self):
+        self.assertEqual(split_label("energy eV"), ("energy", "eV"))
+        self.assertEqual(split_label("i0"), ("i0", ""))
+        self.assertEqual(split_label(""), ("", ""))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            pack_spectrum(self.dados, self.LABELS[:2])
+        with self.assertRaises(ValueError):
+            pack_spectrum(self.dados, self.LABELS, np.int32)
+        blob = pack_spectrum(self.dados, self.LABELS)
+        with self.assertRaises(ValueError):
+            unpack_spectrum(b"XXXX" + blob[4:])
+
+
+class ReferenceLibraryTests(SimpleTestCase):
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = pasta.name
+        energy = np.linspace(7000.0, 7400.0, 50)
+        self.referencias = {
+            f"ref{i}": ({"Element.symbol": "Fe", "Element.edge": "K"}, energy + i, np.tanh((energy - 7112.0) / (10.0 + i)))
+            for i in range(3)
+        }
+
+    def assert_library(self, esperadas):
+        biblioteca = open_library("Fe", self.pasta)
+        self.assertEqual(sorted(biblioteca), sorted(esperadas))
+        for name, (header, energy, norm) in esperadas.items():
+            self.assertEqual(biblioteca.header(name), header)
+            np.testing.assert_array_equal(biblioteca.spectrum(name)[0], energy)
+            np.testing.assert_array_equal(biblioteca.spectrum(name)[1], norm)
+        matriz = open_matrix("Fe", "K", self.pasta)
+        self.assertEqual(sorted(matriz.names), sorted(esperadas))
+        for name, (_, energy, norm) in esperadas.items():
+            np.testing.assert_allclose(matriz.row(name), np.interp(matriz.domain, energy, norm))
+
+    def test_add_and_remove(self):
+        self.assertEqual(add_references("Fe", dict(list(self.referencias.items())[:2]), self.pasta), 2)
+        header, energy, norm = self.referencias["ref2"]
+        add_reference("Fe", "ref2", header, energy, norm, self.pasta)
+        self.assert_library(self.referencias)
+
+        trocada = (header, energy, norm[::-1].copy())
+        self.assertEqual(add_references("Fe", {"ref0": trocada}, self.pasta), 3)
+        self.assertTrue(remove_reference("Fe", "ref1", self.pasta))
+        self.assertFalse(remove_reference("Fe", "ref1", self.pasta))
+        self.assert_library({"ref0": trocada, "ref2": self.referencias["ref2"]})
+
+    def test_default_folder_follows_the_settings(self):
+        with override_settings(NORM_LIBRARY_DIR=self.pasta):
+            self.assertEqual(library_dir(), self.pasta)
+            add_references("Fe", self.referencias)
+            anterior = os.getcwd()
+            os.chdir(tempfile.gettempdir())
+            try:
+                self.assertEqual(library_edges(), {("Fe", "K")})
+                self.assertEqual(len(open_matrix("Fe", "K")), 3)
+            finally:
+                os.chdir(anterior)
+        self.assertEqual(sorted(os.listdir(self.pasta)), ["Fe.lib", "Fe_K.grid"])
+
+    def test_read_files_writes_each_library_once(self):
+        arquivos = sorted(glob.glob(os.path.join(settings.BASE_DIR, "XDI_files", "Fe", "Fe*_rt_01.xdi")))[:3]
+        with mock.patch("database.normalization.add_references") as adicionar, \
+                mock.patch("database.normalization.add_reference") as adicionar_uma, \
+                override_settings(NORM_CACHE_DIR=self.pasta):
+            resultados = read_files(arquivos)
+        self.assertEqual(len(resultados), len(arquivos))
+        adicionar_uma.assert_not_called()
+        adicionar.assert_called_once()
+        element, novas = adicionar.call_args.args
+        self.assertEqual(element, "Fe")
+        self.assertEqual(sorted(novas), sorted(os.path.basename(arquivo)[:-len(".xdi")] for arquivo in arquivos))
+
+
+class NormCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = pasta.name
+        configuracao = override_settings(NORM_CACHE_DIR=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.calculos = 0
+
+    def calcular(self):
+        self.calculos += 1
+        return {"energy": np.arange(10.0), "norm": np.linspace(0.0, 1.0, 10), "e0": 7112.0}
+
+    def test_hit_and_miss(self):
+        primeiro = cached_normalization("abc", "polynomial", 1, {"n": 5}, self.calcular)
+        segundo = cached_normalization("abc", "polynomial", 1, {"n": 5}, self.calcular)
+        self.assertEqual(self.calculos, 1)
+        np.testing.assert_array_equal(segundo["norm"], primeiro["norm"])
+        self.assertEqual(segundo["e0"], 7112.0)
+        # Other content or parameters are other results
+        cached_normalization("abd", "polynomial", 1, {"n": 5}, self.calcular)
+        cached_normalization("abc", "polynomial", 1, {"n": 6}, self.calcular)
+        self.assertEqual(self.calculos, 3)
+        self.assertEqual(len(os.listdir(self.pasta)), 3)
+
+    def test_version_bump_invalidates(self):
+        cached_normalization("abc", "polynomial", 1, {}, self.calcular)
+        cached_normalization("abc", "polynomial", 2, {}, self.calcular)
+        cached_normalization("abc", "polynomial", 2, {}, self.calcular)
+        self.assertEqual(self.calculos, 2)
+        self.assertNotEqual(cache_key("abc", "polynomial", 1, {}), cache_key("abc", "polynomial", 2, {}))
+
+    def test_least_recently_used_are_evicted(self):
+        chaves = [cache_key(f"arquivo{i}", "polynomial", 1, {}) for i in range(3)]
+        for i, chave in enumerate(chaves[:2]):
+            write_cached(chave, self.calcular())
+            # Distinct, old modification times: the first one written is the oldest
+            os.utime(os.path.join(self.pasta, f"{chave}.npz"), ns=(i * 10**9, i * 10**9))
+        tamanho = os.path.getsize(os.path.join(self.pasta, f"{chaves[0]}.npz"))
+
+        # Reading the oldest marks it as used, so the other one is evicted to make room for the third
+        self.assertIsNotNone(read_cached(chaves[0]))
+        write_cached(chaves[2], self.calcular(), max_bytes=2 * tamanho)
+        self.assertIsNotNone(read_cached(chaves[0]))
+        self.assertIsNone(read_cached(chaves[1]))
+        self.assertIsNotNone(read_cached(chaves[2]))
+
+    def test_cache_dir_follows_the_settings(self):
+        self.assertEqual(cache_dir(), self.pasta)
+        with override_settings(NORM_CACHE_DIR=settings.BASE_DIR / "norm_cache"):
+            self.assertEqual(cache_dir(), os.path.join(settings.BASE_DIR, "norm_cache"))
+
+
+def read_xdi(*partes):
+    """Header and data block of a file of XDI_files."""
+    with open(os.path.join(settings.BASE_DIR, "XDI_files", *partes), "rb") as fl:
+        return parse_xdi(decode_text(fl.read()))
+
+
+class EdgeTableTests(SimpleTestCase):
+
+    def test_edge_energy(self):
+        self.assertEqual(edge_energy("Fe", "K"), 7112.0)
+        self.assertEqual(edge_energy("Cr", "K"), 5989.0)
+        self.assertEqual(edge_energy("Pb", "L2"), 15200.0)
+        # Generic edges have the range of their sub-edges
+        self.assertEqual(edge_energy("Pb", "L"), (13035.0, 15861.0))
+        self.assertIsNone(edge_energy("Fe", "N1"))
+        self.assertIsNone(edge_energy("Xx", "K"))
+
+    def test_edges_between(self):
+        self.assertEqual(edges_between(7100.0, 7120.0), [(7112.0, "Fe", "K")])
+        # Both bounds are inclusive
+        self.assertEqual(edges_between(7112.0, 7112.0), [(7112.0, "Fe", "K")])
+        self.assertEqual(edges_between(7000.0, 7112.0)[-1], (7112.0, "Fe", "K"))
+        self.assertEqual(edges_between(7112.0, 7120.0)[0], (7112.0, "Fe", "K"))
+        self.assertNotIn((7112.0, "Fe", "K"), edges_between(7112.5, 7200.0))
+        self.assertEqual(edges_between(15190.0, 15210.0), [(15200.0, "Pb", "L2"), (15200.0, "Rb", "K")])
+        self.assertEqual(edges_between(7120.0, 7100.0), [])
+        # Generic edges are not single edges
+        self.assertFalse([edge for edge in edges_between(0.0, 1e6) if edge[2] in GENERIC_EDGES])
+
+
+class IdentificationTests(SimpleTestCase):
+
+    def identify(self, element, nome, **kwargs):
+        header, tabela = read_xdi(element, nome)
+        resultado = identify_spectrum(column_labels(header), tabela, **kwargs)
+        return resultado and resultado[:2]
+
+    def test_spectra_without_hints(self):
+        for element, nome, esperado in (
+            ("Fe", "Fe2O3_rt_01.xdi", ("Fe", "K")),
+            ("Cr", "cr2o3_15K_001.xdi", ("Cr", "K")),
+            ("Cr", "cro2_rt_001.xdi", ("Cr", "K")),
+            ("W", "W_metal_rt_01.xdi", ("W", "L3")),
+            ("Au", "Au_Foil_L2_rt_2016Foils.xdi", ("Au", "L2")),
+        ):
+            with self.subTest(nome=nome):
+                self.assertEqual(self.identify(element, nome), esperado)
+
+    def test_weak_edge_on_steep_background(self):
+        energia = np.linspace(5800.0, 6400.0, 601)
+        mu = 2.4 - 0.0015 * (energia - 5800.0) + 0.15 * (np.arctan((energia - 5995.0) / 3.0) / np.pi + 0.5)
+        simbolo, edge, e0 = identify_spectrum(["energy eV", "mutrans"], np.column_stack((energia, mu)))
+        self.assertEqual((simbolo, edge), ("Cr", "K"))
+        self.assertAlmostEqual(e0, 5995.0, delta=2.0)
+
+    def test_coincident_edges_need_the_sample_elements(self):
+        # Pb L2 and Rb K are both tabulated at 15200 eV: the spectrum alone cannot tell them apart
+        self.assertEqual(self.identify("Pb", "Pb_Foil_L2_rt_2016Foils.xdi", elements=["Pb"]), ("Pb", "L2"))
+        header, tabela = read_xdi("Pb", "Pb_Foil_L2_rt_2016Foils.xdi")
+        del header["Element.symbol"], header["Element.edge"]
+        self.assertEqual(identify_absorber(xdi_metadata(header), column_labels(header), tabela)[:2], ("Pb", "L2"))
+
+    def test_e0_prefers_the_most_measured_edge(self):
+        energia = np.linspace(5800.0, 6400.0, 601)
+        self.assertEqual(identify_edges(energia, e0=5995.0)[0][:2], ("Cr", "K"))
+        self.assertEqual([candidato[:2] for candidato in identify_edges(energia, e0=5995.0, elements=["Ba"])], [("Ba", "L1")])
+
+    def test_candidates(self):
+        self.assertEqual(self.identify("Cr", "cro2_rt_001.xdi", candidates={("Cr", "K"), ("Fe", "K")}), ("Cr", "K"))
+        self.assertIsNone(self.identify("Cr", "cro2_rt_001.xdi", candidates={("Fe", "K")}))
+
+    def test_comparison_keeps_the_chosen_element(self):
+        header, tabela = read_xdi("Fe", "Fe2O3_rt_01.xdi")
+        del header["Element.symbol"], header["Element.edge"]
+        df = xdi_dataframe(header, tabela)
+        with mock.patch("database.views.library_edges", return_value={("Fe", "K"), ("Nd", "L1"), ("As", "K")}):
+            self.assertEqual(comparison_absorber(header, df, "auto", "auto"), ("Fe", "K"))
+            self.assertEqual(comparison_absorber(header, df, "Nd", "auto"), ("Nd", "L1"))
+            self.assertEqual(comparison_absorber(header, df, "auto", "L1"), ("Nd", "L1"))
+            self.assertIsNone(comparison_absorber(header, df, "As", "auto"))
+
+
+class XDIFileTests(SimpleTestCase):
+
+    def test_read(self):
+        from xdi import XDIFile, read_xdi as read_xdi_group
+        caminho = os.path.join(settings.BASE_DIR, "XDI_files", "Fe", "Fe2O3_rt_01.xdi")
+        arquivo = XDIFile(caminho)
+        header, tabela = read_xdi("Fe", "Fe2O3_rt_01.xdi")
+        self.assertEqual(arquivo.array_labels, [rotulo.split()[0] for rotulo in column_labels(header)])
+        self.assertEqual((arquivo.element, arquivo.edge), ("Fe", "K"))
+        self.assertEqual(arquivo.attrs["element"], {"symbol": "Fe", "edge": "K"})
+        self.assertIn("mono", arquivo.attrs)
+        self.assertIn("column", arquivo.attrs)
+        np.testing.assert_array_equal(arquivo.data, tabela.T)
+        # Columns are row views of the data block, and mu is derived from the intensities
+        self.assertIs(arquivo.energy.base, arquivo.data)
+        np.testing.assert_allclose(arquivo.mutrans, -np.log(arquivo.itrans / (arquivo.i0 + 1.e-12)))
+        self.assertEqual(read_xdi_group(caminho).array_labels, arquivo.array_labels)
+
+    def test_latin1_file(self):
+        from xdi import XDIFile
+        arquivo = XDIFile(os.path.join(settings.BASE_DIR, "XDI_files", "Pb", "Pb_Foil_L1_rt_2016Foils.xdi_normalizado.xdi"))
+        self.assertEqual(arquivo.array_labels, ["Energia", "Absorção"])
+        self.assertEqual(arquivo.narrays, 2)
+
+
+class ParseFormulaTests(SimpleTestCase):
+
+    def test_decimal_counts(self):
+        self.assertEqual(parse_formula("Fe2.95O4"), {"Fe": 2.95, "O": 4.0})
+        self.assertEqual(parse_formula("Li1.2Mn0.8O2"), {"Li": 1.2, "Mn": 0.8, "O": 2.0})
+        self.assertEqual(parse_formula("Fe1.5O"), {"Fe": 1.5, "O": 1.0})
+        self.assertEqual(parse_formula("Fe0.5Ni0.5"), {"Fe": 0.5, "Ni": 0.5})
+
+    def test_hydrates(self):
+        self.assertEqual(parse_formula("CuSO4.5H2O"), {"Cu": 1.0, "S": 1.0, "O": 9.0, "H": 10.0})
+        self.assertEqual(parse_formula("CaSO4.2(H2O)"), {"Ca": 1.0, "S": 1.0, "O": 6.0, "H": 4.0})
+        self.assertEqual(parse_formula("Fe2O3 0.5(H2O)"), {"Fe": 2.0, "O": 3.5, "H": 1.0})
+        self.assertEqual(parse_formula("Fe2O3·H2O"), {"Fe": 2.0, "O": 4.0, "H": 2.0})
+
+    def test_groups_and_unknown_counts(self):
+        self.assertEqual(parse_formula("Zn3(PO4)2"), {"Zn": 3.0, "P": 2.0, "O": 8.0})
+        self.assertEqual(parse_formula("FexSx"), {"Fe": None, "S": None})
+        self.assertEqual(parse_formula("(Fe,Ni)9S8"), {"Fe": None, "Ni": None, "S": 8.0})
+        self.assertEqual(parse_formula("scotch tape"), {})
+
+    def test_composition_key(self):
+        self.assertEqual(composition_key(["o", "Fe", "O"]), "Fe O")
+
+
+def create_experiment(formula, **campos):
+    """Experiment with a sample formula, its element set parsed like at ingestion."""
+    campos = {"experiment_type": "1", "experiment_title": formula or "no formula", "element_symbol": "Fe", "element_edge": "K", **campos}
+    return Experiment.objects.create(sample_formula=formula, sample_elements=composition_key(parse_formula(formula)), **campos)
+
+
+class CompositionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hematita = create_experiment("Fe2O3")
+        cls.magnetita = create_experiment("Fe2.95O4")
+        cls.goethita = create_experiment("FeOOH")
+        cls.pirita = create_experiment("FeS2")
+        cls.espinelio = create_experiment("Li1.2Mn0.8O2")
+
+    def ids(self, filtro):
+        return set(Experiment.objects.filter(filtro).values_list("id", flat=True))
+
+    def test_saved_compositions(self):
+        contagens = dict(Composition.objects.filter(experiment=self.magnetita).values_list("element", "count"))
+        self.assertEqual(contagens, {"Fe": 2.95, "O": 4.0})
+
+    def test_save_compositions_replaces_rows(self):
+        self.pirita.sample_formula = "FeS"
+        save_compositions([self.pirita])
+        contagens = dict(Composition.objects.filter(experiment=self.pirita).values_list("element", "count"))
+        self.assertEqual(contagens, {"Fe": 1.0, "S": 1.0})
+
+    def test_contains_elements(self):
+        self.assertEqual(self.ids(contains_elements(["fe", "O"])), {self.hematita.id, self.magnetita.id, self.goethita.id})
+        self.assertEqual(self.ids(contains_elements(["S"])), {self.pirita.id})
+
+    def test_stoichiometry(self):
+        self.assertEqual(self.ids(stoichiometry_filter("O3Fe2")), {self.hematita.id})
+        self.assertEqual(self.ids(stoichiometry_filter("Fe2.95O4")), {self.magnetita.id})
+        self.assertEqual(self.ids(stoichiometry_filter("Li1.2Mn0.8O2")), {self.espinelio.id})
+        self.assertEqual(self.ids(stoichiometry_filter("Fe3O4")), set())
+
+    def test_invalid_stoichiometry(self):
+        with self.assertRaises(ValueError):
+            stoichiometry_filter("FexO")
+
+    def test_rebuild_regenerates_compositions(self):
+        # Rows and element sets left by an older parser ("Fe2.95O4" read as Fe2 and O380)
+        Composition.objects.filter(experiment=self.magnetita).delete()
+        Composition.objects.create(experiment=self.magnetita, element="O", count=380)
+        Experiment.objects.filter(id=self.magnetita.id).update(sample_elements="O")
+        call_command("rebuild_search_index", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Experiment.objects.get(id=self.magnetita.id).sample_elements, "Fe O")
+        self.assertEqual(self.ids(stoichiometry_filter("Fe2.95O4")), {self.magnetita.id})
+
+
+class IngestXDITests(TestCase):
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.media = os.path.join(pasta.name, "media")
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.raiz = os.path.join(pasta.name, "XDI_files")
+        os.makedirs(os.path.join(self.raiz, "Fe"))
+        os.makedirs(os.path.join(self.raiz, "Pb"))
+        for element, nome in (("Fe", "Fe2O3_rt_01.xdi"), ("Fe", "FeO_rt_01.xdi"), ("Pb", "Pb_Foil_L1_rt_2016Foils.xdi")):
+            with open(os.path.join(settings.BASE_DIR, "XDI_files", element, nome), "rb") as origem, \
+                    open(os.path.join(self.raiz, element, nome), "wb") as destino:
+                destino.write(origem.read())
+        with open(os.path.join(self.raiz, "Pb", "quebrado.xdi"), "w") as fl:
+            fl.write("# Column.1: energy eV\n1.0 2.0\n3.0\n")
+        # Identical content in another folder, and a file without data
+        os.makedirs(os.path.join(self.raiz, "copias"))
+        with open(os.path.join(self.raiz, "Fe", "FeO_rt_01.xdi"), "rb") as origem, \
+                open(os.path.join(self.raiz, "copias", "FeO.xdi"), "wb") as destino:
+            destino.write(origem.read())
+        open(os.path.join(self.raiz, "copias", "vazio.xdi"), "w").close()
+
+    def ingest(self):
+        saida, erros = io.StringIO(), io.StringIO()
+        call_command("ingest_xdi", self.raiz, workers=2, stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+
+    def test_files_are_stored_by_content_hash(self):
+        saida, erros = self.ingest()
+        self.assertIn("3 experiments created, 1 already ingested, 2 failed", saida)
+        self.assertIn("quebrado.xdi", erros)
+        self.assertIn("vazio.xdi: ValueError: FILE HAS NO DATA.", erros)
+        self.assertEqual(Experiment.objects.values("xdi_hash").distinct().count(), 3)
+        for experiment in Experiment.objects.all():
+            self.assertEqual(experiment.xdi_file.name, f"XDIs/{experiment.xdi_hash}.xdi")
+            with open(os.path.join(self.media, experiment.xdi_file.name), "rb") as fl:
+                self.assertEqual(hashlib.sha256(fl.read()).hexdigest(), experiment.xdi_hash)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media, "XDIs"))),
+                         sorted(f"{digest}.xdi" for digest in Experiment.objects.values_list("xdi_hash", flat=True)))
+        self.assertEqual(Experiment.objects.get(element_symbol="Pb").experiment_title, "Pb")
+
+    def test_second_run_skips_ingested_contents(self):
+        self.ingest()
+        armazenados = os.path.join(self.media, "XDIs")
+        for nome in os.listdir(armazenados):
+            os.remove(os.path.join(armazenados, nome))
+        saida, _ = self.ingest()
+        self.assertIn("0 experiments created, 4 already ingested, 2 failed", saida)
+        # Known contents are only hashed: neither stored again nor parsed
+        self.assertEqual(os.listdir(armazenados), [])
+        self.assertEqual(Experiment.objects.count(), 3)
+
+
+class RangeFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manha = create_experiment("Fe2O3", scan_start_time=datetime(2016, 7, 5, 0, 0, tzinfo=timezone.utc))
+        cls.noite = create_experiment("Fe3O4", scan_start_time=datetime(2016, 7, 5, 23, 59, 30, tzinfo=timezone.utc))
+        cls.seguinte = create_experiment("FeO", scan_start_time=datetime(2016, 7, 6, 0, 0, tzinfo=timezone.utc))
+        cls.temperatura = create_experiment("FeS2", sample_temperature=120.0)
+
+    def search(self, **params):
+        return set(Experiment.objects.filter(range_filter(params)))
+
+    def test_date_only_max_includes_the_whole_day(self):
+        self.assertEqual(self.search(start_time_max="2016-07-05"), {self.manha, self.noite})
+        self.assertEqual(self.search(start_time_min="2016-07-05", start_time_max="2016-07-05"), {self.manha, self.noite})
+        self.assertEqual(self.search(start_time_min="2016-07-06"), {self.seguinte})
+
+    def test_date_time_max_is_inclusive(self):
+        self.assertEqual(self.search(start_time_max="2016-07-05T23:59:30"), {self.manha, self.noite})
+        self.assertEqual(self.search(start_time_max="2016-07-05T12:00"), {self.manha})
+        self.assertEqual(self.search(start_time_max="2016-07-06T00:00+00:00"), {self.manha, self.noite, self.seguinte})
+
+    def test_numeric_bounds(self):
+        self.assertEqual(self.search(temperature_min="120", temperature_max="120"), {self.temperatura})
+        self.assertEqual(self.search(temperature_min=" "), set(Experiment.objects.all()))
+
+    def test_invalid_bound(self):
+        for params in ({"start_time_max": "05/07/2016"}, {"temperature_min": "hot"}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                range_filter(params)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hematita = create_experiment("Fe2O3")
+        cls.magnetita = create_experiment("Fe3O4", experiment_type="2")
+        cls.chumbo_l1 = create_experiment("Pb", element_symbol="Pb", element_edge="L1")
+        cls.chumbo_l3 = create_experiment("PbO", element_symbol="Pb", element_edge="L3")
+        cls.chumbo_m = create_experiment("PbS", element_symbol="Pb", element_edge="M5")
+
+    def search(self, **params):
+        return set(Experiment.objects.filter(search_experiments(params)))
+
+    def test_prefix_filter(self):
+        self.assertEqual(set(Experiment.objects.filter(prefix_filter("element_edge", "L"))), {self.chumbo_l1, self.chumbo_l3})
+        self.assertEqual(set(Experiment.objects.filter(prefix_filter("sample_formula", "Pb"))), {self.chumbo_l1, self.chumbo_l3, self.chumbo_m})
+        self.assertEqual(set(Experiment.objects.filter(prefix_filter("sample_formula", "Fe2"))), {self.hematita})
+        self.assertEqual(prefix_filter("sample_formula", ""), Q())
+
+    def test_exact_and_prefix_search(self):
+        self.assertEqual(self.search(absorbing_element="fe"), {self.hematita, self.magnetita})
+        self.assertEqual(self.search(absorbing_element="Pb", edge="l"), {self.chumbo_l1, self.chumbo_l3})
+        self.assertEqual(self.search(edge="L3"), {self.chumbo_l3})
+        self.assertEqual(self.search(edge="Any", data_type="2"), {self.magnetita})
+        self.assertEqual(self.search(data_type="Any"), set(Experiment.objects.all()))
+        # The formula prefix is case-sensitive
+        self.assertEqual(self.search(formula="PbO"), {self.chumbo_l3})
+        self.assertEqual(self.search(formula="pb"), set())
+
+    def test_search_view(self):
+        resposta = self.client.get(reverse("result"), {"absorbing_element": "Pb", "edge": "L"})
+        self.assertTemplateUsed(resposta, "experiment_list.html")
+        self.assertEqual({experimento.pk for experimento in resposta.context["experiments"]}, {self.chumbo_l1.pk, self.chumbo_l3.pk})
+
+    def test_invalid_bound_renders_error(self):
+        resposta = self.client.get(reverse("result"), {"absorbing_element": "Fe", "temperature_min": "hot"})
+        self.assertTemplateUsed(resposta, "error.html")
+        self.assertEqual(resposta.context["error_message"], "INVALID VALUE FOR TEMPERATURE_MIN: hot")
+
+
+class ArchiveUploadTests(TestCase):
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=pasta.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        with open(os.path.join(settings.BASE_DIR, "XDI_files", "Pb", "Pb_Foil_L1_rt_2016Foils.xdi"), "rb") as fl:
+            self.xdi = fl.read()
+        self.membros = [
+            ("Pb/foil.xdi", self.xdi),
+            ("leia-me.txt", b"not a spectrum"),
+            ("Pb/quebrado.xdi", self.xdi.replace(b"\n", b" 1.0 2.0\n", 60)),
+        ]
+
+    def zip_archive(self):
+        conteudo = io.BytesIO()
+        with zipfile.ZipFile(conteudo, "w") as zf:
+            for nome, dados in self.membros:
+                zf.writestr(nome, dados)
+        return File(io.BytesIO(conteudo.getvalue()), name="lote.zip")
+
+    def tar_archive(self):
+        conteudo = io.BytesIO()
+        with tarfile.open(fileobj=conteudo, mode="w:gz") as tf:
+            for nome, dados in self.membros:
+                info = tarfile.TarInfo(nome)
+                info.size = len(dados)
+                tf.addfile(info, io.BytesIO(dados))
+        return File(io.BytesIO(conteudo.getvalue()), name="lote.tar.gz")
+
+    def test_members_are_reported(self):
+        for arquivo in (self.zip_archive, self.tar_archive):
+            with self.subTest(arquivo=arquivo.__name__):
+                Experiment.objects.all().delete()
+                relatorio = handle_uploaded_archive(None, QueryDict(), arquivo())
+                self.assertEqual([(item["file"], item["status"]) for item in relatorio],
+                                 [("Pb/foil.xdi", "created"), ("leia-me.txt", "skipped"), ("Pb/quebrado.xdi", "failed")])
+                self.assertIn("columns", relatorio[2]["message"].lower())
+                experiment = Experiment.objects.get()
+                self.assertEqual(experiment.experiment_title, "foil")
+                self.assertEqual(experiment.element_symbol, "Pb")
+                with open(os.path.join(settings.MEDIA_ROOT, experiment.xdi_file.name), "rb") as fl:
+                    self.assertEqual(fl.read(), self.xdi)
+
+    def test_identical_upload_reuses_parsed_fields(self):
+        with mock.patch("database.views.experiment_from_xdi", wraps=experiment_from_xdi) as analisar:
+            for titulo in ("primeiro", "segundo"):
+                handle_uploaded_file_xdi(None, {"experiment_title": titulo}, File(io.BytesIO(self.xdi), name="Pb.xdi"))
+        self.assertEqual(analisar.call_count, 1)
+        primeiro, segundo = Experiment.objects.order_by("id")
+        self.assertEqual(segundo.experiment_title, "segundo")
+        self.assertEqual(segundo.xdi_file.name, primeiro.xdi_file.name)
+        campos = list(Experiment.objects.order_by("id").values(*PARSED_FIELDS))
+        self.assertEqual(campos[1], campos[0])
+        self.assertEqual(campos[0]["element_symbol"], "Pb")
+
+    def test_invalid_archive(self):
+        relatorio = handle_uploaded_archive(None, QueryDict(), File(io.BytesIO(b"not a zip"), name="lote.zip"))
+        self.assertEqual([(item["file"], item["status"]) for item in relatorio], [("lote.zip", "failed")])
+        self.assertFalse(Experiment.objects.exists())
+
+
+class StatisticsTests(TestCase):
+
+    def setUp(self):
+        create_experiment("Fe2O3")
+        create_experiment("FeO", experiment_type="2")
+
+    def test_first_read_counts(self):
+        Statistic.objects.all().delete()
+        valores = read_statistics()
+        self.assertEqual((valores["experiments"], valores["experiments_1"], valores["experiments_2"]), (2, 1, 1))
+        self.assertEqual(dict(Statistic.objects.values_list("name", "value")), valores)
+
+    def test_rebuild_upserts(self):
+        rebuild_statistics()
+        Statistic.objects.filter(name="experiments").update(value=99)
+        Statistic.objects.create(name="removida", value=1)
+        create_experiment("FeS2")
+        # A second rebuild over existing rows (as two racing first visits) updates them in place
+        valores = rebuild_statistics()
+        self.assertEqual((valores["experiments"], valores["experiments_1"]), (3, 2))
+        self.assertEqual(dict(Statistic.objects.values_list("name", "value")), valores)
+
+    def test_signals_keep_counts(self):
+        read_statistics()
+        Experiment.objects.filter(experiment_type="2").get().delete()
+        create_experiment("FeS2", experiment_type="3")
+        self.assertEqual(read_statistics(), rebuild_statistics())
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Types repeat, so ordering by type has ties broken by id
+        cls.experiments = [create_experiment("Fe2O3", experiment_type=str(1 + i % 3)) for i in range(25)]
+
+    def page(self, queryset, ordering=("id",), query=None, per_page=10):
+        return paginate(RequestFactory().get("/", query or {}), queryset, ordering, per_page)
+
+    def follow(self, url, queryset, ordering):
+        return self.page(queryset, ordering, QueryDict(url[1:]).dict())
+
+    def walk(self, queryset, ordering):
+        pagina = self.page(queryset, ordering)
+        paginas = [pagina]
+        while pagina.has_next() and len(paginas) < 10:
+            pagina = self.follow(pagina.next_url, queryset, ordering)
+            paginas.append(pagina)
+        return paginas
+
+    def test_next_pages_cover_every_row_once(self):
+        paginas = self.walk(Experiment.objects.all(), ("id",))
+        self.assertEqual([len(pagina) for pagina in paginas], [10, 10, 5])
+        self.assertEqual([e.id for pagina in paginas for e in pagina], sorted(e.id for e in self.experiments))
+        self.assertFalse(paginas[0].has_previous())
+
+    def test_previous_token_round_trip(self):
+        paginas = self.walk(Experiment.objects.all(), ("id",))
+        anterior = self.follow(paginas[2].previous_url, Experiment.objects.all(), ("id",))
+        self.assertEqual([e.id for e in anterior], [e.id for e in paginas[1]])
+        self.assertTrue(anterior.has_next() and anterior.has_previous())
+
+    def test_ties_on_the_ordering_key(self):
+        ordering = ("-experiment_type", "id")
+        paginas = self.walk(Experiment.objects.all(), ordering)
+        vistos = [e.id for pagina in paginas for e in pagina]
+        esperados = list(Experiment.objects.order_by(*ordering).values_list("id", flat=True))
+        self.assertEqual(vistos, esperados)
+
+    def test_ranked_fulltext_ordering(self):
+        if not fulltext_available():
+            self.skipTest("no full-text index on this backend")
+        create_experiment("FeS2", experiment_title="pyrite pyrite")
+        resultados = fulltext_search(Experiment.objects.all(), "fe2o3")
+        paginas = self.walk(resultados, ("rank", "id"))
+        vistos = [e.id for pagina in paginas for e in pagina]
+        self.assertEqual(vistos, list(resultados.order_by("rank", "id").values_list("id", flat=True)))
+        self.assertEqual(len(vistos), 25)
+
+    def test_tampered_token_gives_the_first_page(self):
+        primeira = self.page(Experiment.objects.all())
+        token = encode_token("n", [self.experiments[9].id])
+        pagina = self.page(Experiment.objects.all(), query={"page": token[:-2] + "xx"})
+        self.assertEqual([e.id for e in pagina], [e.id for e in primeira])
+        pagina = self.page(Experiment.objects.all(), query={"page": "3"})
+        self.assertEqual([e.id for e in pagina], [e.id for e in primeira])
+
+    def test_stale_token_gives_the_first_page(self):
+        token = encode_token("n", [self.experiments[-1].id + 100])
+        pagina = self.page(Experiment.objects.all(), query={"page": token})
+        self.assertEqual(len(pagina), 10)
+        self.assertTrue(pagina.has_next())
+        self.assertFalse(pagina.has_previous())
+
+
+class PostEdgeWindowTests(SimpleTestCase):
+
+    def brute_force(self, x, y, min_points, max_points):
+        """The former loop: one least-squares line per window [npt:-1], the first smallest |slope| kept."""
+        melhor = None
+        for npt in range(-min_points, -max_points, -1):
+            slope = np.polyfit(x[npt:-1], y[npt:-1], 1)[0]
+            if melhor is None or abs(slope) < abs(melhor[1]):
+                melhor = (npt, slope)
+        return melhor
+
+    def spectrum(self, pontos, semente):
+        gerador = np.random.default_rng(semente)
+        x = np.linspace(7000.0, 7600.0, pontos)
+        y = 1.0 - np.exp(-(x - 7000.0) / 150.0) + gerador.normal(0, 0.01, pontos)
+        return x, y
+
+    def test_matches_brute_force(self):
+        for semente in range(5):
+            x, y = self.spectrum(300, semente)
+            for min_points, max_points in ((20, 100), (20, 250), (5, 30)):
+                with self.subTest(semente=semente, janela=(min_points, max_points)):
+                    npt, slope = post_edge_window(x, y, min_points, max_points)
+                    esperado = self.brute_force(x, y, min_points, max_points)
+                    self.assertEqual(npt, esperado[0])
+                    self.assertAlmostEqual(slope, esperado[1], places=9)
+
+    def test_spectrum_shorter_than_max_points(self):
+        # Windows starting before the first point are clamped to it, as iloc slices are
+        x, y = self.spectrum(60, 7)
+        npt, slope = post_edge_window(x, y, 20, 100)
+        esperado = self.brute_force(x, y, 20, 100)
+        self.assertEqual(npt, esperado[0])
+        self.assertAlmostEqual(slope, esperado[1], places=9)
+        self.assertGreaterEqual(-npt, 20)
+
+    def test_invalid_ranges(self):
+        x, y = self.spectrum(60, 0)
+        with self.assertRaises(ValueError):
+            post_edge_window(x, y, 20, 20)
+        with self.assertRaises(ValueError):
+            post_edge_window(x[:15], y[:15], 20, 100)
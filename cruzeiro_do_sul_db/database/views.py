@@ -6,29 +6,32 @@ from .forms import UserCreationForm, UserChangeForm, AddExperiment, UploadFileFo
 from .forms import RegisterForm
 
 from .models import Experiment, Beamline, Facility, User, Element, Normalization, Comparison, XDIFile
-from .normalization import read_file
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from .normalization import normalize_cached, xdi_dataframe, normalize_content, text_spectrum, get_strategy, POST_EDGE_POINTS
+from .xdi_parser import decode_text, parse_xdi
+from .ingest import PARSED_FIELDS, experiment_from_xdi, xdi_metadata, identify_absorber, archive_members, is_archive
+from .reference_library import library_edges
+from .content_store import save_content_addressed
+from .search import search_experiments
+from .fulltext import fulltext_search
+from .signals import experiments_saved
+from .stats import read_statistics, experiments_added
+from .pagination import paginate
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic import TemplateView, ListView
 from django.db.models import Q 
+from django.db import transaction
 from functools import reduce
 import operator
 import plotly.offline as opy
 import plotly.graph_objs as go
 import tempfile
 import os
-import re
-from io import StringIO
-from chardet import detect
 from .ga_combinator import ga
 import pandas as pd
 import numpy as np
-from lmfit.models import LinearModel
 from .forms import UploadFileForm
-from numpy import diff
-from scipy.interpolate import interp1d
 from django.http import HttpResponse
 import mimetypes
 
@@ -37,103 +40,49 @@ from datetime import datetime
 
 def index(request):
     """View function for home page of site."""
-    # Generate counts of some of the main objects
-    num_experiments = Experiment.objects.all().count()
-    num_beamlines = Beamline.objects.all().count()
-    num_facilities = Facility.objects.all().count()
-    num_users = User.objects.all().count()
-    # Available experiments (type = XAS):
-    num_experimets_xas = Experiment.objects.filter(experiment_type__exact='1').count()
-    # Available experiments (type = XANES):
-    num_experiments_xanes = Experiment.objects.filter(experiment_type__exact='2').count()
-    # Available experiments (type = EXAFS):
-    num_experiments_exafs = Experiment.objects.filter(experiment_type__exact='3').count()
-    # Available experiments (type = XRD):
-    num_experiments_xrd = Experiment.objects.filter(experiment_type__exact='4').count()
-    # Available experiments (type = XAS + XRD):
-    num_experiments_xas_xrd = Experiment.objects.filter(experiment_type__exact='5').count()
-    # Available experiments (type = XANES + XRD):
-    num_experiments_xanes_xrd = Experiment.objects.filter(experiment_type__exact='6').count()
-    # Available experiments (type = EXAFS + XRD):
-    num_experiments_exafs_xrd = Experiment.objects.filter(experiment_type__exact='7').count()
+    # Counts of the main objects, precomputed and kept up to date by signals (one query):
+    contagens = read_statistics()
     context = {
-        'num_experiments'          : num_experiments,
-        'num_experiments_xas'      : num_experimets_xas,
-        'num_experiments_xanes'    : num_experiments_xanes,
-        'num_experiments_exafs'    : num_experiments_exafs,
-        'num_experiments_xrd'      : num_experiments_xrd,
-        'num_experiments_xas_xrd'  : num_experiments_xas_xrd,
-        'num_experiments_xanes_xrd': num_experiments_xanes_xrd,
-        'num_experiments_exafs_xrd': num_experiments_exafs_xrd,
-        'num_beamlines'            : num_beamlines,
-        'num_facilities'           : num_facilities,
-        'num_users'                : num_users,
+        'num_experiments'          : contagens.get('experiments', 0),
+        # Available experiments by type (XAS, XANES, EXAFS, XRD, XAS + XRD, XANES + XRD, EXAFS + XRD):
+        'num_experiments_xas'      : contagens.get('experiments_1', 0),
+        'num_experiments_xanes'    : contagens.get('experiments_2', 0),
+        'num_experiments_exafs'    : contagens.get('experiments_3', 0),
+        'num_experiments_xrd'      : contagens.get('experiments_4', 0),
+        'num_experiments_xas_xrd'  : contagens.get('experiments_5', 0),
+        'num_experiments_xanes_xrd': contagens.get('experiments_6', 0),
+        'num_experiments_exafs_xrd': contagens.get('experiments_7', 0),
+        'num_beamlines'            : contagens.get('beamlines', 0),
+        'num_facilities'           : contagens.get('facilities', 0),
+        'num_users'                : contagens.get('users', 0),
     }
     # Render the HTML template index.html with the data in the context variable
     return render(request, 'index.html', context=context)
 
 def experiment_list(request):
-    list = Experiment.objects.all()
-    page = request.GET.get('page', 1)
-    # Number of paginations:
-    paginator = Paginator(list, 20)
-    try:
-        experiments = paginator.page(page)
-    except PageNotAnInteger:
-        experiments = paginator.page(1)
-    except EmptyPage:
-        experiments.paginator.page(paginator.num_pages)
+    # Only the displayed columns are read (not the spectrum, header or legacy table):
+    list = Experiment.objects.listing()
+    # Keyset pages on the primary key (upload order), with next/previous tokens:
+    experiments = paginate(request, list)
     return render(request, 'experiment_list.html', {'experiments': experiments})
 
 def user_data_list(request):
-    list = Experiment.objects.filter(user__id__exact=request.user.id)
-    page = request.GET.get('page', 1)
-    # Number of paginations:
-    paginator = Paginator(list, 20)
-    try:
-        experiments = paginator.page(page)
-    except PageNotAnInteger:
-        experiments = paginator.page(1)
-    except EmptyPage:
-        experiments.paginator.page(paginator.num_pages)
+    list = Experiment.objects.listing().filter(user__id__exact=request.user.id)
+    experiments = paginate(request, list)
     return render(request, 'user_data.html', {'experiments': experiments})
 
 def search_result(request):
-    absorbing_element = str(request.GET.get("absorbing_element"))
-    composition = request.GET.get("composition").split()
-
-    if request.GET.get("edge") == 'Any':
-        edge = ''
-    else:
-        edge = str(request.GET.get("edge"))
-
-    if request.GET.get("data_type") == 'Any':
-        data_type = ''
-    else:
-        data_type = str(request.GET.get("data_type"))
-    
-    if request.GET.get("measurement") == 'Any':
-        measurement = ''
-    else:
-        measurement = str(request.GET.get("measurement"))
-
-    page = request.GET.get('page', 1)
-    
-    list = Experiment.objects.filter(
-        Q(element__symbol__icontains=absorbing_element) &
-        Q(element__edge__icontains=edge) &
-        Q(experiment_type__icontains=data_type) &
-        Q(spectrum_measurement_mode__icontains=measurement) &
-        Q(sample_stoichiometry_iupac__icontains=composition) | reduce(operator.and_, (Q(sample_stoichiometry_iupac__icontains=x) for x in composition))
-    )
-    # Number of paginations:
-    paginator = Paginator(list, 20)
+    # Exact and prefix matches on indexed columns (element, edge, type, composition) and numeric ranges
     try:
-        experiments = paginator.page(page)
-    except PageNotAnInteger:
-        experiments = paginator.page(1)
-    except EmptyPage:
-        experiments.paginator.page(paginator.num_pages)
+        filtro = search_experiments(request.GET)
+    except ValueError as e:
+        return render(request, 'error.html', {'error_message': str(e)})
+
+    # Free-text words (titles, sample names, formulas, preparation and notes), best matches first
+    list = fulltext_search(Experiment.objects.listing().filter(filtro), request.GET.get("q", ""))
+    # Ranked searches are paged on (rank, id), the others on the primary key
+    ordering = ('rank', 'id') if 'rank' in list.query.annotations else ('id',)
+    experiments = paginate(request, list, ordering)
     return render(request, 'experiment_list.html', {'experiments': experiments})
     
 
@@ -150,66 +99,22 @@ def signup(request):
     return render(request, 'signup.html')
 
 def experiment_detail(request, pk):
-    experiment = Experiment.objects.get(pk=int(pk))
-    caminho_arquivo = os.path.join(settings.MEDIA_ROOT, experiment.xdi_file.name)
-    secoes = [
-        "Element.symbol",
-        "Element.edge",
-        "Mono.d_spacing",
-        "Mono.name",
-        "Sample.formula",
-        "Sample.name",
-        "Sample.prep",
-        "Sample.temperature",
-        "Sample.reference",
-        "Detector.I0",
-        "Detector.I1",
-        "Detector.I2",
-        "Facility.Name",
-        "Beamline.Name",
-        "Beamline.name",
-        "Facility.name",
-        "Beamline.xray_source",
-        "Beamline.Storage_Ring_Current",
-        "Beamline.I0",
-        "Beamline.I1",
-        "Scan.start_time",
-        "Scan.end_time",
-        "ScanParameters.Start",
-        "ScanParameters.ScanType",
-        "ScanParameters.E0",
-        "ScanParameters.Legend",
-        "ScanParameters.Region1",
-        "ScanParameters.Region2",
-        "ScanParameters.Region3",
-        "ScanParameters.End"
-    ]
-    regex = '|'.join(map(re.escape, secoes))
-    with open(caminho_arquivo, 'r') as texto:
-        linhas = texto.read()
-        matches = re.findall(f'({regex}):\\s*(.*)', linhas)
-
-    valores = {}
-    for match in matches:
-        secao, valor = match[0], match[1]
-        secao_primaria, secao_secundaria = secao.split('.')
-        if secao_primaria not in valores:
-            valores[secao_primaria] = {}
-        valores[secao_primaria][secao_secundaria] = valor
-    match = re.search(r'#---+', linhas, re.MULTILINE)
-    if match:
-        tabela_inicio = match.end()
-        tabela_linhas = linhas[tabela_inicio:].strip().split('\n')
-
-        valores_tabela = []
-        for linha in tabela_linhas:
-            if re.match(r'(\s+\d+\.\d+\s+){2,4}', linha):
-                valores_tabela.append([float(valor) for valor in linha.split()])
-    else:
-        # Se não encontrar o início da tabela, definir valores_tabela como None
-        valores_tabela = None
-
-    return render(request, 'experiment_detail.html', {'experiment': experiment, 'valores': valores, 'valores_tabela': valores_tabela})
+    experiment = Experiment.objects.detail().get(pk=int(pk))
+    valores = experiment.metadata
+    valores_tabela = None
+    colunas = ['energy', 'itrans', 'i0']
+    spectrum = experiment.get_spectrum()
+    # The XDI file is only read for experiments whose metadata or spectrum was not stored yet
+    if not valores or spectrum is None:
+        caminho_arquivo = os.path.join(settings.MEDIA_ROOT, experiment.xdi_file.name)
+        with open(caminho_arquivo, 'rb') as fl:
+            valores, valores_tabela = parse_xdi_content(decode_text(fl.read()))
+    if spectrum is not None:
+        # Table rows are views of the packed column blocks (no copy)
+        colunas, unidades, dados = spectrum
+        valores_tabela = dados.T
+
+    return render(request, 'experiment_detail.html', {'experiment': experiment, 'valores': valores, 'valores_tabela': valores_tabela, 'colunas': colunas})
 
 def file_response(request, pk, string):
     experiment = Experiment.objects.get(pk=int(pk))
@@ -328,133 +233,27 @@ def normalize_file(request):
             file = request.FILES['file']
             # Verifique o tipo de arquivo, se necessário
             if file.name.endswith('.txt') or file.name.endswith('.csv'):
-                # Lê o arquivo com pandas
                 try:
-                    with open(os.path.join('db_xanes', str(file)), "rb") as fl:
-                        result = detect(fl.read())
-                        encoding = result["encoding"]
-
-                    with open(os.path.join('db_xanes', str(file)), "r", encoding=encoding) as f:
-                        data = f.read()
-                    data_io = StringIO(data)
-                    df = pd.read_csv(data_io, sep="\t", header=0)
-
-                except:
-                    with open(os.path.join('db_xanes', str(file)), "rb") as fl:
-                        result = detect(fl.read())
-                        encoding = result["encoding"]
-
-                    with open(os.path.join('db_xanes', str(file)), "r", encoding=encoding) as f:
-                        data = f.read()
-                    data = re.sub(r"\s{2,}", " ", data)
-                    data_io = StringIO(data)
-                    df = pd.read_csv(data_io, sep=" ", header=0)
-
-                # Exclue as colunas vazias
-                df = df.dropna(axis=1)        
-
-                # Definição do intervalo da faixa inicial (restrição)
-
-                background = df[0:20]
-
-                # Tratamento dos dados usando um fit de modelo linear
-
-                modelo_linear = LinearModel()
-                dados_x = background.iloc[:, 0].values
-                dados_y = background.iloc[:, 1].values
-
-                params_linear = modelo_linear.guess(dados_y, x=dados_x)
-
-                resultado_fit = modelo_linear.fit(dados_y, params_linear, x=dados_x)
-
-                # Extrapolação para todo o intervalo do espectro
-
-                xwide = df.iloc[:, 0]
-                predicted_faixa_inicial = modelo_linear.eval(resultado_fit.params, x=xwide)
-
-                # Ajuste da faixa final XANES utilizando fit linear
-
-                resultados = []
-                slope_min = 1000
-
-                # Loop para definir o intervalo de pontos na faixa final
-
-                for npt in range(-20, -100, -1):
-                    np_init = npt
-                    np_end = -1
-                    final_medida = df.iloc[np_init:np_end]
-                    faixa_final = df[np_init:np_end]
-                    modelo_linear = LinearModel()
-                    dados_x = faixa_final.iloc[:, 0].values
-                    dados_y = faixa_final.iloc[:, 1].values
-
-                    params_linear = modelo_linear.guess(dados_y, x=dados_x)
-                    resultado_fit = modelo_linear.fit(dados_y, params_linear, x=dados_x)
-
-                    resultados.append([npt, resultado_fit.best_values['slope']])
-
-                    # Identificação do menor valor dentro do intervalo de fit
-
-                    if abs(resultado_fit.best_values['slope']) < slope_min:
-                        slope_min = abs(resultado_fit.best_values['slope'])
-                        npt_min = npt
-
-                # Aplicação do fit linear
+                    max_pontos = max(int(request.POST.get('post_edge_points', POST_EDGE_POINTS)), 21)
+                except ValueError:
+                    max_pontos = POST_EDGE_POINTS
 
-                final_medida = df.iloc[npt_min:np_end]
-                faixa_final = df[npt_min:np_end]
-                modelo_linear = LinearModel()
-                dados_x = faixa_final.iloc[:, 0].values
-                dados_y = faixa_final.iloc[:, 1].values
-
-                params_linear = modelo_linear.guess(dados_y, x=dados_x)
-                resultado_fit_final = modelo_linear.fit(dados_y, params_linear, x=dados_x)
-
-                # Extrapolação do fit no intervalo da faixa final para todo o intervalo do espectro
-
-                xwide = df.iloc[:, 0]
-                predicted_faixa_final = modelo_linear.eval(resultado_fit_final.params, x=xwide)
-
-                absorcao = df.iloc[:, 1]
-                nova_curva = absorcao - predicted_faixa_inicial
-
-                # Ajuste final para todos os dados de absorção do espectro
-
-                fit_final = absorcao/predicted_faixa_final
-
-                # Derivada para encontrar o ponto E0
-
-                x = [df.iloc[:, 0]]
-                y =  [df.iloc[:, 1]]
-                dydx = diff(y)/diff(x)
-
-                E0 = np.amax(dydx[0])
-                local = np.argmax(dydx[0])
-                E0x = x[0][local]
-
-                dydx = diff(fit_final)/diff(xwide)
-
-                E0 = np.amax(dydx)
-                local = np.argmax(dydx)
-                E0x = xwide[local]
-
-                # Interpolação para obter o ponto na extrapolação da pré-borda e pós-borda referente ao E0
-
-                f = interp1d(xwide, predicted_faixa_inicial)
-                ponto_borda_inicial = f(E0x)
-                g = interp1d(xwide, predicted_faixa_final)
-                ponto_borda_final = g(E0x)
+                # Estratégia de normalização (ver normalization.STRATEGIES); por padrão, edge jump no E0
+                try:
+                    estrategia = get_strategy(request.POST.get('strategy', 'edge_jump'))
+                except ValueError as e:
+                    return render(request, 'error.html', {'error_message': str(e)})
+                params = {'max_points': max_pontos} if 'max_points' in estrategia.defaults else {}
 
-                # Normalização dos dados de absorção de raio x pela diferença do edge jump
+                with open(os.path.join('db_xanes', str(file)), "rb") as fl:
+                    conteudo = fl.read()
 
-                edge_jump = abs(ponto_borda_final - ponto_borda_inicial)
-                
-                absorcao_normalizada = []
+                # Um arquivo já normalizado com os mesmos parâmetros (ex: só a cor do gráfico mudou) vem do cache,
+                # sem ser lido de novo
+                resultado = normalize_content(conteudo, text_spectrum, estrategia.name, **params)
+                xwide = pd.Series(resultado.energy)
+                normalizado = resultado.norm
 
-                normalizado = absorcao/edge_jump
-                
-                absorcao_normalizada.append(normalizado)
-                
                 pasta_destino = "./normalization"
                 os.makedirs(pasta_destino, exist_ok=True)
                 
@@ -538,19 +337,27 @@ def normalize_file(request):
     return render(request, 'normalization_data.html')
 
 
-def handle_uploaded_file(uploaded_file): # Para poder ler o arquivo na função read_file
-    path = default_storage.save('temp/' + uploaded_file.name, ContentFile(uploaded_file.read()))
-    temp_file_path = os.path.join(default_storage.location, path)
-    df, header = read_file(temp_file_path)
-    os.remove(temp_file_path)
-    return (df, header)
+def handle_uploaded_file(uploaded_file): # Lê, armazena e normaliza o arquivo de comparação
+    path, digest, existente, header, tabela = save_content_addressed(uploaded_file, 'temp/')
+    # Normalized data of an identical upload is reused instead of normalized again (see norm_cache)
+    df_norm = normalize_cached(xdi_dataframe(header, tabela), digest)
+    return (header, df_norm)
 
 # element_s = dicio["Element"]["symbol"], element_e = dicio["Element"]["edge"]
 
+def uploaded_fields(digest, existente, header, tabela):
+    """Experiment fields of a stored upload: copied from an experiment of identical content, or built from the parsed file."""
+    campos = Experiment.objects.filter(xdi_hash=digest).values(*PARSED_FIELDS).first() if existente else None
+    if campos is None:
+        campos = experiment_from_xdi(header, tabela)
+    return campos
+
 def handle_uploaded_file_xdi(user_id, PostedDataForm, xdi_file):
 
-    lines = xdi_file.read().decode('utf-8')
-    dicio, tabela = parse_xdi_content(lines)
+    # Single pass over the upload: hashed, stored and parsed chunk by chunk
+    path, digest, existente, header, tabela = save_content_addressed(xdi_file, 'XDIs/')
+    # An identical file was already uploaded: its metadata, packed spectrum and identified absorber are reused
+    campos = uploaded_fields(digest, existente, header, tabela)
     
     try:
         experiment_title = PostedDataForm['experiment_title']
@@ -571,141 +378,6 @@ def handle_uploaded_file_xdi(user_id, PostedDataForm, xdi_file):
     except KeyError:
         additional_info = "Not Informed"
 
-    try:
-        element_symbol = dicio["Element"]["symbol"]
-    except KeyError:
-        element_symbol = "Not Informed"
-
-    try:
-        element_edge = dicio["Element"]["edge"]
-    except KeyError:
-        element_edge = "Not Informed"
-
-    try:
-        mono_d_spacing = dicio["Mono"]["d_spacing"]
-    except KeyError:
-        mono_d_spacing = "Not Informed"
-
-    try:
-        mono_name = dicio["Mono"]["name"]
-    except KeyError:
-        mono_name = "Not Informed"
-
-    try:
-        sample_formula = dicio["Sample"]["formula"]
-    except KeyError:
-        sample_formula = "Not Informed"
-
-    try:
-        sample_name = dicio["Sample"]["name"]
-    except KeyError:
-        sample_name = "Not Informed"
-
-    try:
-        sample_prep = dicio["Sample"]["prep"]
-    except KeyError:
-        sample_prep = "Not Informed"
-
-    try:
-        sample_temperature = dicio["Sample"]["temperature"]
-    except KeyError:
-        sample_temperature = "Not Informed"
-
-    try:
-        sample_reference = dicio["Sample"]["reference"]
-    except KeyError:
-        sample_reference = "Not Informed"
-
-    try:
-        detector_I0 = dicio["Detector"]["I0"]
-    except KeyError:
-        detector_I0 = "Not Informed"
-
-    try:
-        detector_I1 = dicio["Detector"]["I1"]
-    except KeyError:
-        detector_I1 = "Not Informed"
-
-    try:
-        detector_I2 = dicio["Detector"]["I2"]
-    except KeyError:
-        detector_I2 = "Not Informed"
-    try:
-        facility_Name = dicio["Facility"]["name"]
-    except KeyError:
-        facility_Name = "Not Informed"
-
-    try:
-        beamline_xray_source = dicio["Beamline"]["xray_source"]
-    except KeyError:
-        beamline_xray_source = "Not Informed"
-
-    try:
-        beamline_Storage_Ring_Current = dicio["Beamline"]["Storage_Ring_Current"]
-    except KeyError:
-        beamline_Storage_Ring_Current = "Not Informed"
-
-    try:
-        beamline_I0 = dicio["Beamline"]["I0"]
-    except KeyError:
-        beamline_I0 = "Not Informed"
-
-    try:
-        beamline_I1 = dicio["Beamline"]["I1"]
-    except KeyError:
-        beamline_I1 = "Not Informed"
-
-    try:
-        scan_start_time = dicio["Scan"]["start_time"]
-    except KeyError:
-        scan_start_time = "Not Informed"
-
-    try:
-        scan_end_time = dicio["Scan"]["end_time"]
-    except KeyError:
-        scan_end_time = "Not Informed"
-
-    try:
-        scanParameters_Start = dicio["ScanParameters"]["Start"]
-    except KeyError:
-        scanParameters_Start = "Not Informed"
-
-    try:
-        scanParameters_ScanType = dicio["ScanParameters"]["ScanType"]
-    except KeyError:
-        scanParameters_ScanType = "Not Informed"
-
-    try:
-        scanParameters_E0 = dicio["ScanParameters"]["E0"]
-    except KeyError:
-        scanParameters_E0 = "Not Informed"
-
-    try:
-        scanParameters_Legend = dicio["ScanParameters"]["Legend"]
-    except KeyError:
-        scanParameters_Legend = "Not Informed"
-
-    try:
-        scanParameters_Region1 = dicio["ScanParameters"]["Region1"]
-    except KeyError:
-        scanParameters_Region1 = "Not Informed"
-
-    try:
-        scanParameters_Region2 = dicio["ScanParameters"]["Region2"]
-    except KeyError:
-        scanParameters_Region2 = "Not Informed"
-
-    try:
-        scanParameters_Region3 = dicio["ScanParameters"]["Region3"]
-    except KeyError:
-        scanParameters_Region3 = "Not Informed"
-
-    try:
-        scanParameters_End = dicio["ScanParameters"]["End"]
-    except KeyError:
-        scanParameters_End = "Not Informed"
-
-    path = default_storage.save('XDIs/' + xdi_file.name, ContentFile(xdi_file.read()))
     xdi_filePath = path
     
     Experiment.objects.create(
@@ -715,39 +387,61 @@ def handle_uploaded_file_xdi(user_id, PostedDataForm, xdi_file):
         experiment_type               = experiment_type,
         doi                           = doi,
         additional_info               = additional_info,
-        element_symbol                = element_symbol,
-        element_edge                  = element_edge,
-        mono_d_spacing                = mono_d_spacing,
-        mono_name                     = mono_name,
-        sample_formula                = sample_formula,
-        sample_name                   = sample_name,
-        sample_prep                   = sample_prep,
-        sample_temperature            = sample_temperature,
-        sample_reference              = sample_reference,
-        detector_I0                   = detector_I0,
-        detector_I1                   = detector_I0,
-        detector_I2                   = detector_I0,
-        facility_Name                 = facility_Name,
-        beamline_xray_source          = beamline_xray_source,
-        beamline_Storage_Ring_Current = beamline_Storage_Ring_Current,
-        beamline_I0                   = beamline_I0,
-        beamline_I1                   = beamline_I0,
-        scan_start_time               = scan_start_time,
-        scan_end_time                 = scan_end_time,
-        scanParameters_Start          = scanParameters_Start,
-        scanParameters_ScanType       = scanParameters_ScanType,
-        scanParameters_E0             = scanParameters_E0,
-        scanParameters_Legend         = scanParameters_Legend,
-        scanParameters_Region1        = scanParameters_Region1,
-        scanParameters_Region2        = scanParameters_Region1,
-        scanParameters_Region3        = scanParameters_Region1,
-        scanParameters_End            = scanParameters_End,
-        tabela                        = tabela
+        xdi_hash                      = digest,
+        **campos
         )
 
+def handle_uploaded_archive(user_id, PostedDataForm, archive):
+    """Creates one experiment per .xdi member of a zip/tar upload, all in one transaction. Returns a per-file report."""
+    experiment_title = PostedDataForm.get('experiment_title', '')
+    experiment_type = PostedDataForm.get('experiment_type', "Not Informed")
+    doi = PostedDataForm.get('doi', "Not Informed")
+    additional_info = PostedDataForm.get('additional_info', "Not Informed")
+
+    relatorio = []
+    experiments = []
+    # Members are streamed out of the archive one by one and hashed/stored/parsed chunk by chunk,
+    # so memory stays bounded by one chunk whatever the member sizes
+    try:
+        for nome, membro in archive_members(archive, archive.name):
+            if not nome.lower().endswith('.xdi'):
+                relatorio.append({'file': nome, 'status': 'skipped', 'message': 'Not a .xdi file.'})
+                continue
+            try:
+                path, digest, existente, header, tabela = save_content_addressed(File(membro, name=os.path.basename(nome)), 'XDIs/')
+                campos = uploaded_fields(digest, existente, header, tabela)
+            except Exception as e:
+                # A broken member is reported and the others are still created
+                relatorio.append({'file': nome, 'status': 'failed', 'message': str(e) or type(e).__name__})
+                continue
+            stem = os.path.splitext(os.path.basename(nome))[0]
+            experiments.append(Experiment(
+                user_id          = user_id,
+                xdi_file         = path,
+                experiment_title = (f'{experiment_title} - {stem}' if experiment_title else stem)[:150],
+                experiment_type  = experiment_type,
+                doi              = doi,
+                additional_info  = additional_info,
+                xdi_hash         = digest,
+                **campos
+            ))
+            relatorio.append({'file': nome, 'status': 'created', 'message': 'Already stored, file reused.' if existente else ''})
+    except ValueError as e:
+        relatorio.append({'file': archive.name, 'status': 'failed', 'message': str(e)})
+
+    with transaction.atomic():
+        Experiment.objects.bulk_create(experiments)
+        # bulk_create does not send post_save (search indexes and home-page counts)
+        experiments_saved(experiments)
+        experiments_added(experiments)
+    return relatorio
+
 def AddExperiment(request):
     if request.method == 'POST':
         form = UploadXDIForm(request.POST, request.FILES)
+        if is_archive(request.FILES['xdi_file'].name):
+            relatorio = handle_uploaded_archive(request.user.id, request.POST, request.FILES['xdi_file'])
+            return render(request, 'upload_report.html', {'relatorio': relatorio})
         handle_uploaded_file_xdi(request.user.id, request.POST, request.FILES['xdi_file'])
         return redirect('user-data')
     else:
@@ -755,70 +449,26 @@ def AddExperiment(request):
     return render(request, 'upload_xdi.html', {'form': form})
 
 def parse_xdi_content(lines):
-    secoes = [
-    "Element.symbol",
-    "Element.edge",
-    "Mono.d_spacing",
-    "Mono.name",
-    "Sample.formula",
-    "Sample.name",
-    "Sample.prep",
-    "Sample.temperature",
-    "Sample.reference",
-    "Detector.I0",
-    "Detector.I1",
-    "Detector.I2",
-    "Facility.Name",
-    "Beamline.Name",
-    "Beamline.name",
-    "Facility.name",
-    "Beamline.xray_source",
-    "Beamline.Storage_Ring_Current",
-    "Beamline.I0",
-    "Beamline.I1",
-    "Scan.start_time",
-    "Scan.end_time",
-    "ScanParameters.Start",
-    "ScanParameters.ScanType",
-    "ScanParameters.E0",
-    "ScanParameters.Legend",
-    "ScanParameters.Region1",
-    "ScanParameters.Region2",
-    "ScanParameters.Region3",
-    "ScanParameters.End"
-    ]
-    regex = '|'.join(map(re.escape, secoes))
-
-    matches = re.findall(f'({regex}):\\s*(.*)', lines)
-
-    valores = {}
-    for match in matches:
-        secao, valor = match[0], match[1]
-        secao_primaria, secao_secundaria = secao.split('.')
-        if secao_primaria not in valores:
-            valores[secao_primaria] = {}
-        valores[secao_primaria][secao_secundaria] = valor
-
-    # for secao in secoes:
-    #     secao_primaria, secao_secundaria = secao.split('.')
-    #     if secao_primaria not in valores:
-    #         valores[secao_primaria] = {secao_secundaria: None}
-    #     elif secao_secundaria not in valores[secao_primaria]:
-    #         valores[secao_primaria][secao_secundaria] = "Not informed"
-
-    match = re.search(r'#---+', lines, re.MULTILINE)
-    if match:
-        tabela_inicio = match.end()
-        tabela_linhas = lines[tabela_inicio:].strip().split('\n')
-
-        valores_tabela = []
-        for linha in tabela_linhas:
-            if re.match(r'(\s+\d+\.\d+\s+){2,4}', linha):
-                valores_tabela.append([float(valor) for valor in linha.split()])
-    else:
-        # Se não encontrar o início da tabela, definir valores_tabela como None
-        valores_tabela = None
-    return valores, valores_tabela
+    """Return the XDI header grouped by family (as stored in Experiment.metadata) and the data block as a NumPy array."""
+    header, valores_tabela = parse_xdi(lines)
+    return xdi_metadata(header), valores_tabela
+
+def comparison_absorber(header, df, abs_element, edge):
+    """
+    Element and edge of a comparison target, among those with references: from the file header or, if
+    missing, from the spectrum. An element or edge chosen by the user ('auto' otherwise) is kept and only
+    the other one is searched. Returns (element, edge), or None when they cannot be identified.
+    """
+    metadata = xdi_metadata(header)
+    candidatos = library_edges()
+    if abs_element != 'auto':
+        metadata.setdefault('element', {})['symbol'] = abs_element
+        candidatos = {par for par in candidatos if par[0] == abs_element}
+    if edge != 'auto':
+        metadata.setdefault('element', {})['edge'] = edge
+        candidatos = {par for par in candidatos if par[1] == edge}
+    encontrado = identify_absorber(metadata, list(df.columns), df.to_numpy(), candidates=candidatos)
+    return None if encontrado is None else encontrado[:2]
 
 def spectra_comparison(request):
     if request.method == 'POST':
@@ -829,11 +479,17 @@ def spectra_comparison(request):
             if not (file.name.endswith('.xdi')): # Verificando o tipo de arquivo
                 raise TypeError('File must be .xdi')
             
-            abs_element = 'Fe'#str(request.POST.get('abs_element')) #Por que está dando errado?
-            edge = str(request.POST.get('edge'))
+            abs_element = request.POST.get('abs_element', 'auto')
+            edge = request.POST.get('edge', 'auto')
 
             header, df = handle_uploaded_file(file)
 
+            if abs_element == 'auto' or edge == 'auto':
+                encontrado = comparison_absorber(header, df, abs_element, edge)
+                if encontrado is None:
+                    return render(request, 'error.html', {'error_message': 'COULD NOT IDENTIFY THE ABSORBING ELEMENT AND EDGE OF THE SPECTRUM AMONG THE REFERENCE LIBRARIES. SELECT THEM.'})
+                abs_element, edge = encontrado
+
             try:
                 n_materials = int(request.POST.get('num_materials'))
                 ga_combinator_dic = ga(n_materials, abs_element, edge, df)
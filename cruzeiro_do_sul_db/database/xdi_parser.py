@@ -0,0 +1,228 @@
+import codecs
+import io
+import warnings
+import numpy as np
+
+
+# Amount of data text decoded at once by XDIStreamParser (and read at once from files by parse_xdi)
+CHUNK_SIZE = 1 << 20
+
+
+def decode_text(conteudo):
+    """
+    Decode the content of a XDI file: UTF-8, or Latin-1 for files that are not valid UTF-8
+    (older beamline exports, e.g. with "Absorção" column labels).
+
+    Parameters:
+    conteudo (bytes): Content of the file.
+
+    Returns:
+    str: The text.
+    """
+    try:
+        return conteudo.decode("utf-8")
+    except UnicodeDecodeError:
+        return conteudo.decode("latin-1")
+
+
+class TextDecoder:
+    """
+    Incremental counterpart of decode_text, fed with the byte chunks of an upload.
+
+    Chunks are decoded as UTF-8 until the first invalid byte; from the chunk holding it on,
+    the content is decoded as Latin-1, which accepts any byte.
+    """
+
+    def __init__(self):
+        self.encoding = "utf-8"
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def decode(self, chunk, final=False):
+        if self.encoding == "utf-8":
+            try:
+                return self.utf8.decode(chunk, final)
+            except UnicodeDecodeError:
+                # The bytes of an incomplete character kept from the previous chunk are not lost
+                pendente, _ = self.utf8.getstate()
+                self.encoding = "latin-1"
+                chunk = pendente + chunk
+        return chunk.decode("latin-1")
+
+
+class XDIStreamParser:
+    """
+    Incremental XDI parser fed with text chunks of any size (e.g. the chunks of an upload).
+
+    Header lines are tokenized as they arrive; the data lines are buffered up to CHUNK_SIZE
+    characters and then decoded by decode_data_block, so memory stays bounded by the
+    decoded array plus one chunk of text.
+    """
+
+    def __init__(self):
+        self.header = {}
+        self.reading_fields = True
+        self.reading_data = False
+        self.resto = ""
+        self.pendentes = []
+        self.tamanho_pendente = 0
+        self.blocos = []
+
+    def feed(self, texto):
+        """Process a chunk of text; an incomplete last line is kept for the next chunk."""
+        texto = self.resto + texto
+        corte = texto.rfind("\n") + 1
+        self.resto = texto[corte:]
+        if corte:
+            self._process(texto[:corte])
+
+    def close(self):
+        """
+        Finish the parsing.
+
+        Returns:
+        tuple: A tuple containing the header as a dictionary ({"Family.key": value}, in file order)
+        and the data block as a 2-D float64 NumPy array (one column per XDI column), or None
+        when the file has no data lines.
+        """
+        if self.resto:
+            self._process(self.resto + "\n")
+            self.resto = ""
+        self._decode()
+
+        if not self.blocos:
+            return self.header, None
+        if len(self.blocos) == 1:
+            return self.header, self.blocos[0]
+        try:
+            return self.header, np.concatenate(self.blocos)
+        except ValueError:
+            raise ValueError("ALL DATA LINES MUST HAVE THE SAME NUMBER OF COLUMNS.")
+
+    def _process(self, texto):
+        if not self.reading_data:
+            inicio = self._read_header(texto)
+            if inicio is None:
+                return
+            texto = texto[inicio:]
+
+        self.pendentes.append(texto)
+        self.tamanho_pendente += len(texto)
+        if self.tamanho_pendente >= CHUNK_SIZE:
+            self._decode()
+
+    def _read_header(self, texto):
+        """Tokenize header lines; returns the offset of the first data line in texto, or None."""
+        posicao = 0
+        for line in texto.splitlines(keepends=True):
+            inicio = posicao
+            posicao += len(line)
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            if stripped.startswith("#"):
+                content = stripped[1:].strip()
+                # "# ///" closes the field section and "#----" closes the whole header
+                if content.startswith("///") or content.startswith("---"):
+                    self.reading_fields = False
+                    continue
+                if self.reading_fields:
+                    partes = content.split(":", 1)
+                    if len(partes) == 2 and "." in partes[0]:
+                        self.header[partes[0].strip()] = partes[1].strip()
+                continue
+
+            # Some files carry the column labels line without the leading "#"
+            try:
+                float(stripped.split(None, 1)[0])
+            except ValueError:
+                continue
+
+            self.reading_data = True
+            return inicio
+        return None
+
+    def _decode(self):
+        if not self.pendentes:
+            return
+        texto = "".join(self.pendentes)
+        self.pendentes = []
+        self.tamanho_pendente = 0
+        with warnings.catch_warnings():
+            # Chunks holding only comment lines decode to an empty array
+            warnings.simplefilter("ignore", UserWarning)
+            bloco = decode_data_block(texto)
+        if bloco.size:
+            self.blocos.append(bloco)
+
+
+def parse_xdi(source):
+    """
+    Read the header and the numeric block of a XDI file in a single pass.
+
+    Parameters:
+    source (str or iterable): XDI content as a string, a text file object, or any iterable of lines.
+
+    Returns:
+    tuple: A tuple containing the header as a dictionary ({"Family.key": value}, in file order)
+    and the data block as a 2-D float64 NumPy array (one column per XDI column), or None
+    when the file has no data lines.
+    """
+    parser = XDIStreamParser()
+    if isinstance(source, str):
+        parser.feed(source)
+    elif hasattr(source, "read"):
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), ""):
+            parser.feed(chunk)
+    else:
+        for line in source:
+            parser.feed(line if line.endswith("\n") else line + "\n")
+    return parser.close()
+
+
+def decode_data_block(text):
+    """
+    Decode the numeric block of a XDI file with NumPy's C reader.
+
+    Parameters:
+    text (str): Data lines, whitespace separated. Lines starting with "#" are ignored.
+
+    Returns:
+    ndarray: C-contiguous 2-D float64 array with one column per XDI column.
+    """
+    return np.loadtxt(io.StringIO(text), dtype=np.float64, comments="#", ndmin=2)
+
+
+def nest_header(header):
+    """
+    Group a flat XDI header into families.
+
+    Parameters:
+    header (dict): Header as returned by parse_xdi ({"Family.key": value}).
+
+    Returns:
+    dict: Nested dictionary ({"Family": {"key": value}}).
+    """
+    valores = {}
+    for chave, valor in header.items():
+        familia, campo = chave.split(".", 1)
+        valores.setdefault(familia, {})[campo] = valor
+    return valores
+
+
+def column_labels(header):
+    """
+    Return the XDI column labels ("Column.1", "Column.2", ...) in column order.
+
+    Parameters:
+    header (dict): Header as returned by parse_xdi.
+
+    Returns:
+    list: Labels of the data columns.
+    """
+    colunas = []
+    i = 1
+    while f"Column.{i}" in header:
+        colunas.append(header[f"Column.{i}"])
+        i += 1
+    return colunas
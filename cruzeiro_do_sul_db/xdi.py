@@ -1,46 +1,18 @@
 #!/usr/bin/env python
 """
 Read/Write XAS Data Interchange Format for Python
+
+Pure Python/NumPy reader compatible with Larch's XDIFile (no xdifile shared library needed).
 """
+import io
 import os
-from ctypes import c_long, c_double, c_char_p, c_void_p, pointer, Structure
-
-__version__ = '1.2.0larch'
-
-from numpy import array, exp, log, sin, arcsin
-
-from .. import Group
-from ..larchlib import get_dll
-from ..utils.strutils import bytes2str, str2bytes
-from ..utils.physical_constants import RAD2DEG, PLANCK_HC
-
-class XDIFileStruct(Structure):
-    "emulate XDI File"
-    _fields_ = [('nmetadata',     c_long),
-                ('narrays',       c_long),
-                ('npts',          c_long),
-                ('narray_labels', c_long),
-                ('nouter',        c_long),
-                ('error_lineno',  c_long),
-                ('dspacing',      c_double),
-                ('xdi_libversion',c_char_p),
-                ('xdi_version',   c_char_p),
-                ('extra_version', c_char_p),
-                ('filename',      c_char_p),
-                ('element',       c_char_p),
-                ('edge',          c_char_p),
-                ('comments',      c_char_p),
-                ('error_line',    c_char_p),
-                ('error_message', c_char_p),
-                ('array_labels',  c_void_p),
-                ('outer_label',   c_char_p),
-                ('array_units',   c_void_p),
-                ('meta_families', c_void_p),
-                ('meta_keywords', c_void_p),
-                ('meta_values',   c_void_p),
-                ('array',         c_void_p),
-                ('outer_array',   c_void_p),
-                ('outer_breakpts', c_void_p)]
+
+__version__ = '1.2.0numpy'
+
+from numpy import empty, exp, log, sin, arcsin, loadtxt, pi, float64
+
+PLANCK_HC = 12398.419843320026   # eV * Angstrom
+RAD2DEG = 180.0 / pi
 
 string_attrs = ('comments', 'edge', 'element', 'error_line',
                 'error_message', 'extra_version', 'filename',
@@ -55,26 +27,25 @@ def tostr(val):
         return val.decode()
     return str(val)
 
-def tostrlist(address, nitems):
-    return [str(i, 'utf-8') for i in (nitems*c_char_p).from_address(address)]
 
-def add_dot2path():
-    """add this folder to begninng of PATH environmental variable"""
-    sep = ':'
-    if os.name == 'nt': sep = ';'
-    paths = os.environ.get('PATH','').split(sep)
-    paths.insert(0, os.path.abspath(os.curdir))
-    os.environ['PATH'] = sep.join(paths)
+def decode_text(content):
+    """decode XDI file content: UTF-8, or Latin-1 for files that are not valid UTF-8
+    (as database.xdi_parser.decode_text)"""
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return content.decode('latin-1')
+
 
+class Group(object):
+    """simple container for the attributes of a XDI file (replaces larch.Group)"""
+    def __init__(self, **kws):
+        for key, val in kws.items():
+            setattr(self, key, val)
+
+    def __repr__(self):
+        return '<Group %s>' % getattr(self, '__name__', '')
 
-XDILIB = None
-def get_xdilib():
-    """make initial connection to XDI dll"""
-    global XDILIB
-    if XDILIB is None:
-        XDILIB = get_dll('xdifile')
-        XDILIB.XDI_errorstring.restype   = c_char_p
-    return XDILIB
 
 class XDIFileException(Exception):
     """XDI File Exception: General Errors"""
@@ -96,13 +67,16 @@ class XDIFile(object):
     Principle methods:
       read():     read XDI data file, set column data and attributes
       write(filename):  write xdi_file data to an XDI file.
+
+    The column data are stored in one (narrays, npts) float64 array, `data`;
+    the per-column attributes (energy, i0, itrans, ...) are views of its rows.
     """
     _invalid_msg = "invalid data for '%s':  was expecting %s, got '%s'"
 
     def __init__(self, filename=None, labels=None):
         self.filename = filename
         self.xdi_pyversion =  __version__
-        # self.xdilib = get_xdilib()
+        self.xdi_libversion = __version__
         self.comments = []
         self.data = []
         self.attrs = {}
@@ -120,68 +94,137 @@ class XDIFile(object):
         """
         if filename is None and self.filename is not None:
             filename = self.filename
-        pxdi = pointer(XDIFileStruct())
-
-        xdilib = get_xdilib()
-        self.status = xdilib.XDI_readfile(filename.encode(), pxdi)
-        if self.status < 0:
-            msg =  bytes2str(xdilib.XDI_errorstring(self.status))
-            xdilib.XDI_cleanup(pxdi, self.status)
-            msg = 'Error reading XDIFile %s\n%s' % (filename, msg)
-            raise ValueError(msg)
-
-        xdi = pxdi.contents
-        for attr in dict(xdi._fields_):
-            setattr(self, attr, getattr(xdi, attr))
+        try:
+            with open(filename, 'rb') as fh:
+                text = decode_text(fh.read())
+        except OSError as exc:
+            self.status = -1
+            raise ValueError('Error reading XDIFile %s\n%s' % (filename, exc))
+
+        self.status = 0
+        self.error_lineno = 0
+        self.error_line = ''
+        self.error_message = ''
+        self.xdi_version = ''
+        self.extra_version = ''
+        self.element = ''
+        self.edge = ''
+        self.dspacing = -1.0
+        self.outer_label = ''
+
+        lines = text.splitlines(keepends=True)
+        meta = []            # (family, keyword, value), in file order
+        comments = []
+        label_line = None
+        in_comments = False
+        offset = 0
+        data_start = None
+        for lineno, line in enumerate(lines):
+            stripped = line.strip()
+            if not stripped:
+                offset += len(line)
+                continue
+            if not stripped.startswith('#'):
+                try:
+                    float(stripped.split(None, 1)[0])
+                except ValueError:
+                    # column labels written without the leading "#"
+                    label_line = stripped
+                    offset += len(line)
+                    continue
+                data_start = offset
+                break
+            content = stripped[1:].strip()
+            if lineno == 0 and content.upper().startswith('XDI/'):
+                words = content.split(None, 1)
+                self.xdi_version = words[0][4:]
+                if len(words) > 1:
+                    self.extra_version = words[1]
+            elif content.startswith('///'):
+                in_comments = True
+            elif content.startswith('---'):
+                in_comments = False
+                label_line = ''
+            elif label_line == '':
+                label_line = content
+            elif in_comments:
+                comments.append(content)
+            else:
+                key, sep, val = content.partition(':')
+                if sep and '.' in key:
+                    fam, keyword = key.strip().split('.', 1)
+                    meta.append((fam, keyword, val.strip()))
+                else:
+                    comments.append(content)
+            offset += len(line)
+
+        if data_start is None:
+            self.status = -1
+            self.error_message = 'no data found'
+            raise ValueError('Error reading XDIFile %s\n%s' % (filename, self.error_message))
+
+        try:
+            rows = loadtxt(io.StringIO(text[data_start:]), dtype=float64,
+                           comments='#', ndmin=2)
+        except ValueError as exc:
+            self.status = -1
+            self.error_message = str(exc)
+            raise ValueError('Error reading XDIFile %s\n%s' % (filename, exc))
+
+        self.comments = '\n'.join(comments)
+        self.npts, self.narrays = rows.shape
+        # one contiguous row per column: the per-column attributes are views
+        self.data = rows.T.copy()
 
-        self.array_labels = tostrlist(xdi.array_labels, self.narrays)
+        self.attrs = {}
+        columns = {}
+        for fam, key, val in meta:
+            if fam.lower() == 'column':
+                try:
+                    columns[int(key)] = val
+                except ValueError:
+                    pass
+            self.attrs.setdefault(fam.lower(), {})[key.lower()] = val
+
+        element = self.attrs.get('element', {})
+        self.element = element.get('symbol', '')
+        self.edge = element.get('edge', '')
+        mono = self.attrs.get('mono', {})
+        try:
+            self.dspacing = float(mono.get('d_spacing', '-1').split()[0])
+        except (ValueError, IndexError):
+            self.dspacing = -1.0
+
+        line_labels = (label_line or '').split()
+        self.array_labels = []
+        self.array_units = []
+        self.array_addrs = []
+        for idx in range(self.narrays):
+            desc = columns.get(idx + 1, '')
+            addr = ''
+            if '||' in desc:
+                desc, addr = [x.strip() for x in desc.split('||', 1)]
+            words = desc.split(None, 1)
+            if words:
+                label = words[0]
+                unit = words[1] if len(words) > 1 else ''
+            elif idx < len(line_labels):
+                label, unit = line_labels[idx], ''
+            else:
+                label, unit = 'col%d' % (idx + 1), ''
+            self.array_labels.append(label)
+            self.array_units.append(unit)
+            self.array_addrs.append(addr)
 
         if self.user_labels is not None:
             ulab = self.user_labels.replace(',', ' ')
             ulabs = [l.strip() for l in ulab.split()]
             self.array_labels[:len(ulabs)] = ulabs
 
-        arr_units         = tostrlist(xdi.array_units, self.narrays)
-        self.array_units  = []
-        self.array_addrs  = []
-        for unit in arr_units:
-            addr = ''
-            if '||' in unit:
-                unit, addr = [x.strip() for x in unit.split('||', 1)]
-            self.array_units.append(unit)
-            self.array_addrs.append(addr)
+        self.outer_array    = empty(0)
+        self.outer_breakpts = empty(0, dtype=int)
 
-        mfams = tostrlist(xdi.meta_families, self.nmetadata)
-        mkeys = tostrlist(xdi.meta_keywords, self.nmetadata)
-        mvals = tostrlist(xdi.meta_values,   self.nmetadata)
-        self.attrs = {}
-        for fam, key, val in zip(mfams, mkeys, mvals):
-            fam = fam.lower()
-            key = key.lower()
-            if fam not in self.attrs:
-                self.attrs[fam] = {}
-            self.attrs[fam][key] = val
-
-        parrays = (xdi.narrays*c_void_p).from_address(xdi.array)[:]
-        self.data = [(xdi.npts*c_double).from_address(p)[:] for p in parrays]
-
-        nout = xdi.nouter
-        outer, breaks = [], []
-        if nout > 1:
-            outer  = (nout*c_double).from_address(xdi.outer_array)[:]
-            breaks = (nout*c_long).from_address(xdi.outer_breakpts)[:]
-        for attr in ('outer_array', 'outer_breakpts', 'nouter'):
-            delattr(self, attr)
-        self.outer_array    = array(outer)
-        self.outer_breakpts = array(breaks)
-
-        self.data = array(self.data)
-        self.data.shape = (self.narrays, self.npts)
         self._assign_arrays()
-        for attr in ('nmetadata', 'narray_labels', 'meta_families',
-                     'meta_keywords', 'meta_values', 'array'):
-            delattr(self, attr)
-        xdilib.XDI_cleanup(pxdi, 0)
 
     def _assign_arrays(self):
         """assign data arrays for principle data attributes:
@@ -191,7 +234,6 @@ class XDIFile(object):
         xunits = 'eV'
         xname = None
         ix = -1
-        self.data = array(self.data)
 
         for idx, name in enumerate(self.array_labels):
             dat = self.data[idx,:]
@@ -200,7 +242,7 @@ class XDIFile(object):
                 ix = idx
                 xname = name
                 units = self.array_units[idx]
-                if units is not None:
+                if units:
                     xunits = units
 
         # convert energy to angle, or vice versa
@@ -272,7 +314,7 @@ def read_xdi(filename, labels=None):
 
 
     Example:
-       >>> from larch.io import xdi
+       >>> from xdi import read_xdi
        >>> fe3_data = read_xdi('FeXAFS_Fe2O3.001')
        >>> print(fe3_data.array_labels)
        ['energy', 'mutrans', 'i0']
@@ -281,9 +323,6 @@ def read_xdi(filename, labels=None):
        >>> print(fec3.array_labels)
        ['e', 'x', 'y']
 
-    See Also:
-        read_ascii
-
     """
     xdif = XDIFile(filename, labels=labels)
     group = Group()